@@ -1,19 +1,46 @@
 import logging
 import re
+import time
 import traceback
+from collections.abc import Mapping
 from enum import Enum
-from typing import Any, Dict
-
-from core.agent_template import output_format, query_template
+from typing import Any, Callable, Dict
+
+from core.agent_template import (
+    output_format,
+    query_template,
+    system_template,
+    turn_template,
+)
+from core.context_budget import ContextBudget
 from core.generative_model import GenerativeModel
+from core.step_results import StepResults
+from core.step_scheduler import StepScheduler
+from models.agent_event import AgentEvent
 from models.pydantic_to_xml import PydanticToXMLSerializer
 from models.response import Action, Response, Step, Thought
 from models.response_parser import ResponseParser
+from models.response_stream_parser import ResponseStreamParser
+from models.responsestats import ResponseStats
+from models.session_stats import SessionStats
 from models.tool import Tool
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.text import Text
+from utility.blob_store import BlobStore
+from utility.tracing import get_tracer
+
+VARIABLE_PATTERN = re.compile(r"\$([a-zA-Z0-9_]+)\$")
+
+
+class UnresolvedVariableError(ValueError):
+    """Raised when a $variable$ does not match any step result."""
+
+    def __init__(self, variables: list[str]):
+        self.variables = variables
+        names = ", ".join(f"${variable}$" for variable in variables)
+        super().__init__(f"Unresolved variables: {names}")
 
 
 class AgentState(Enum):
@@ -25,14 +52,61 @@ class AgentState(Enum):
 
 
 class Agent:
-    def __init__(self, model: GenerativeModel, max_iterations: int = 20):
+    def __init__(
+        self,
+        model: GenerativeModel,
+        max_iterations: int = 20,
+        headless: bool = False,
+        event_handler: Callable[[AgentEvent], None] | None = None,
+        approval_handler: Callable[[str, Action], bool] | None = None,
+        max_parallel_steps: int = 4,
+        prompt_caching: bool = False,
+        context_token_budget: int | None = None,
+        blob_store: BlobStore | None = None,
+    ):
+        """Create an agent.
+
+        Args:
+            model (GenerativeModel): The model used to think.
+            max_iterations (int): Maximum number of think/act iterations.
+            headless (bool): Skip all panels and interactive pauses, for unattended runs.
+            event_handler (Callable, optional): Receives an AgentEvent for each step of the loop.
+            approval_handler (Callable, optional): Decides on tools that need validation.
+                In headless mode, such tools are refused when no handler is given.
+            max_parallel_steps (int): Maximum number of independent plan steps run
+                concurrently. Steps only run in parallel in headless mode, handlers
+                must then be thread-safe.
+            prompt_caching (bool): Send the tools, instructions and output format
+                as a stable system message, ahead of the per-iteration content,
+                so that provider and local prompt caches can reuse the prefix.
+            context_token_budget (int, optional): Token budget for the step results
+                shown in the prompt. Oversized results are then truncated or only
+                referenced by name; $variable$ interpolation still uses full values.
+            blob_store (BlobStore, optional): Store holding the step results, each
+                distinct result once. Defaults to a store private to each execution.
+        """
         self.model = model
+        self.headless = headless
+        self.event_handler = event_handler
+        self.approval_handler = approval_handler
+        self.prompt_caching = prompt_caching
+        self.context_budget = (
+            ContextBudget(context_token_budget, model=getattr(model, "model", ""))
+            if context_token_budget is not None
+            else None
+        )
+        self.scheduler = StepScheduler(max_parallel_steps if headless else 1)
+        self._early_calls: dict[str, tuple[Action, Any]] = {}
         self.tools: dict[str, Tool] = {}
+        self._tools_xml_description: str | None = None
         self.memory: list[Response] = []
+        self.session_stats = SessionStats()
         self.current_tought: Thought | None = None
         self.to_do_steps: list[Step] = []
         self.done_steps: list[Step] = []
-        self.step_results: dict[str, str] = {}
+        self._shared_blob_store = blob_store
+        self.blob_store = blob_store or BlobStore()
+        self.step_results = StepResults(self.blob_store)
         self.final_answer: str | None = None
         self.query: str = ""
         self.max_iterations: int = max_iterations
@@ -42,27 +116,76 @@ class Agent:
         # Configure root logger to filter LiteLLM messages
         self.console = Console()
 
+    def _emit(self, event_type: str, **data: Any) -> None:
+        """Send a structured event to the event handler, if any."""
+        if self.event_handler is None:
+            return
+        self.event_handler(
+            AgentEvent(type=event_type, iteration=self.current_iteration, data=data)
+        )
+
+    def _print(self, *renderables: Any) -> None:
+        """Print to the console unless running headless."""
+        if not self.headless:
+            self.console.print(*renderables)
+
+    def _pause(self) -> None:
+        """Wait for the user to press Enter unless running headless."""
+        if not self.headless:
+            self.console.input("[yellow]Press Enter to continue...[/yellow]")
+
     def register(self, tool: Tool) -> None:
         """Register a new tool with the agent."""
         self.tools[tool.name.strip().upper()] = tool
+        self._tools_xml_description = None
         self.logger.info(f"Registered tool: {tool.name}")
 
     def execute(self, query: str) -> str:
         """Main execution entry point"""
+        return self.execute_with_stats(query)[0]
+
+    def execute_with_stats(self, query: str) -> tuple[str, SessionStats]:
+        """Execute a query and return the answer with the session statistics."""
+        start_time = time.perf_counter()
+        with get_tracer().span("agent.execute", query_chars=len(query)) as span:
+            answer = self._execute(query)
+            self.session_stats.total_time = time.perf_counter() - start_time
+            span.set_attributes(
+                iterations=self.current_iteration,
+                state=self.state.value,
+                prompt_tokens=self.session_stats.prompt_tokens,
+                completion_tokens=self.session_stats.completion_tokens,
+            )
+            return answer, self.session_stats
+
+    def _execute(self, query: str) -> str:
         try:
             self._reset_state(query)
-            return self._run_thinking_loop()
+            self._emit("execution_started", query=query)
+            answer = self._run_thinking_loop()
+            self._emit(
+                "execution_finished",
+                state=self.state.value,
+                answer=answer,
+                stats=self.session_stats.model_dump(),
+            )
+            return answer
         except Exception:
             self.logger.error(f"Execution error: {traceback.format_exc()}")
+            self._emit("error", error=traceback.format_exc())
             return f"Error during execution:\n{traceback.format_exc()}"
 
     def _reset_state(self, query: str) -> None:
         """Reset agent state for new execution"""
         self.query = query
         self.memory = []
+        self.session_stats = SessionStats()
         self.final_answer = None
         self.done_steps = []
-        self.step_results = {}  # Changed from dict[str, str] to {}
+        if self._shared_blob_store is None:
+            # Keep the store and its spill directory, drop the previous results
+            self.blob_store.clear()
+        self.step_results = StepResults(self.blob_store)
         self.to_do_steps = []
         self.current_iteration = 0
         self.state = AgentState.READY
@@ -76,13 +199,27 @@ class Agent:
             except Exception:
                 self.state = AgentState.ERROR
                 error_trace = traceback.format_exc()
-                self.console.print(f"[red]Error during thinking:[/red]\n{error_trace}")
+                self._print(f"[red]Error during thinking:[/red]\n{error_trace}")
+                self._emit("error", error=error_trace)
                 return f"Error during thinking:\n{error_trace}"
 
         return self._get_final_answer()
 
     def _think(self) -> bool:
         """Execute one thinking iteration"""
+        if not self._start_iteration():
+            return False
+
+        with get_tracer().span("agent.iteration", iteration=self.current_iteration):
+            try:
+                response = self._get_llm_response()
+            except Exception:
+                self._discard_early_calls()
+                raise
+            return self._decide(response)
+
+    def _start_iteration(self) -> bool:
+        """Move to the next iteration. Returns False when the budget is exhausted."""
         self.state = AgentState.THINKING
         self.current_iteration += 1
 
@@ -90,20 +227,38 @@ class Agent:
             return False
 
         self._display_status()
-        response = self._get_llm_response()
-        return self._decide(response)
+        self._emit("iteration_started", max_iterations=self.max_iterations)
+        return True
 
     def _decide(self, response: Response) -> bool:
         """Process response and decide next action"""
+        try:
+            if self._accept_response(response):
+                return False
+
+            actions = self._collect_actions(response)
+            if not actions:
+                self._add_to_memory(response)
+                return True
+
+            executed = self._execute_actions(response, actions)
+            self._record_results(response, executed)
+            return True
+        finally:
+            self._settle_early_calls()
+
+    def _accept_response(self, response: Response) -> bool:
+        """Validate a response and record the final answer. Returns True when complete."""
         self.state = AgentState.DECIDING
 
-        self.console.print(
-            Panel.fit(
-                response.model_dump_json(indent=2),
-                title="[bold magenta]Decision Response[/bold magenta]",
-                border_style="magenta",
+        if not self.headless:
+            self.console.print(
+                Panel.fit(
+                    response.model_dump_json(indent=2),
+                    title="[bold magenta]Decision Response[/bold magenta]",
+                    border_style="magenta",
+                )
             )
-        )
 
         if not response.thought:
             raise ValueError("Response must contain a thought")
@@ -111,103 +266,419 @@ class Agent:
         if response.final_answer is not None:
             self.state = AgentState.COMPLETE
             self.final_answer = response.final_answer
-            return False
+            self._emit("final_answer", final_answer=response.final_answer)
+            return True
+
+        return False
+
+    def _collect_actions(self, response: Response) -> list[Action]:
+        """Collect the action and every planned step ready to run with it.
+
+        A to-do step is ready when it names a tool and each of its dependencies,
+        from depends_on_steps or from variables in its arguments, is either in
+        step_results or produced by an action earlier in the batch. The step the
+        primary action stands for is not collected again.
+        """
+        actions: list[Action] = []
+        for action in response.get_actions():
+            if all(action.step_name != other.step_name for other in actions):
+                actions.append(action)
+        if not response.thought:
+            return actions
+
+        to_do = response.thought.to_do
+        primary_step = self._primary_action_step(response)
+        produced = {action.step_name for action in actions}
+        for step in to_do:
+            if (
+                not step.tool_name
+                or step is primary_step
+                or step.name in self.step_results
+                or step.name in produced
+            ):
+                continue
+            candidate = Action(
+                step_name=step.name,
+                tool_name=step.tool_name,
+                reason=step.reason,
+                arguments=step.arguments or {},
+            )
+            dependencies = self._action_dependencies(candidate, to_do)
+            if dependencies <= self.step_results.keys() | produced:
+                actions.append(candidate)
+                produced.add(step.name)
+        return actions
+
+    @staticmethod
+    def _primary_action_step(response: Response) -> Step | None:
+        """The plan step run by the primary action when its step_name matches none.
+
+        Such an action runs the first step of the plan.
+        """
+        thought = response.thought
+        action = response.action
+        if action is None or not thought or not thought.to_do:
+            return None
+        if any(step.name == action.step_name for step in thought.to_do):
+            return None
+        return thought.to_do[0]
+
+    def _action_dependencies(self, action: Action, to_do: list[Step]) -> set[str]:
+        """Step names an action depends on, from its plan and its arguments."""
+        dependencies = {
+            dependency
+            for step in to_do
+            if step.name == action.step_name
+            for dependency in step.depends_on_steps
+        }
+        for value in action.arguments.values():
+            dependencies.update(self._find_interpolated_variables(str(value)))
+        return dependencies
+
+    def _execute_actions(
+        self, response: Response, actions: list[Action]
+    ) -> list[tuple[Action, str | None]]:
+        """Execute actions wave by wave, running independent ones concurrently."""
+        to_do = response.thought.to_do if response.thought else []
+        dependencies = {
+            action.step_name: self._action_dependencies(action, to_do)
+            for action in actions
+        }
+        executed: list[tuple[Action, str | None]] = []
+        for wave in self.scheduler.waves(actions, dependencies):
+            results = self.scheduler.run_concurrently(
+                [lambda action=action: self._run_action(action) for action in wave]
+            )
+            executed.extend(self._store_wave_results(wave, results))
+        return executed
+
+    def _run_action(self, action: Action) -> str:
+        """Run an action, or wait for the same call dispatched during generation."""
+        early_call = self._take_early_call(action)
+        if early_call is not None:
+            return early_call.result()
+        return self._handle_action(action)
+
+    @staticmethod
+    def _same_call(early: Action, action: Action) -> bool:
+        """Whether two actions make the same tool call, whatever parser built them."""
+
+        def arguments(a: Action) -> dict[str, str]:
+            return {key.strip(): str(value).strip() for key, value in a.arguments.items()}
+
+        return (
+            early.step_name == action.step_name
+            and early.tool_name.strip().upper() == action.tool_name.strip().upper()
+            and arguments(early) == arguments(action)
+        )
+
+    def _take_early_call(self, action: Action) -> Any:
+        """Return the early call making the same tool call as an action, if any.
 
-        if response.action is not None:
-            result = self._handle_action(response.action)
+        An early call for the same step with other arguments is left pending,
+        it is settled with the calls no action claimed.
+        """
+        early_call = self._early_calls.get(action.step_name)
+        if early_call is None or not self._same_call(early_call[0], action):
+            return None
+        del self._early_calls[action.step_name]
+        return early_call[1]
+
+    def _settle_early_calls(self) -> None:
+        """Wait for the early calls no action claimed and keep their results.
+
+        They are left over when the response also has a final answer, or when
+        the final parse differs from the streamed one. Their tools have run, so
+        their results are stored rather than lost.
+        """
+        early_calls, self._early_calls = self._early_calls, {}
+        for action, call in early_calls.values():
+            self._keep_early_result(action, call.result())
+
+    def _keep_early_result(self, action: Action, result: Any) -> None:
+        """Store the result of an early call that no action claimed."""
+        if result is not None and action.step_name not in self.step_results:
+            self.logger.debug(f"Keeping the result of unclaimed early call {action.step_name}")
+            self.step_results[action.step_name] = str(result)
+        else:
+            self.logger.warning(
+                f"Early call {action.step_name} ran but its result is unused"
+            )
+
+    def _discard_early_calls(self) -> None:
+        """Wait for the early calls of a generation that failed, and drop them.
+
+        A started tool call cannot be cancelled: it runs to completion with its
+        side effects, and only its result is dropped.
+        """
+        early_calls, self._early_calls = self._early_calls, {}
+        for step_name, (_action, call) in early_calls.items():
+            call.exception()  # Waits for the call without raising its error
+            self._log_wasted_call(step_name)
+
+    def _log_wasted_call(self, step_name: str) -> None:
+        self.logger.warning(
+            f"Early call {step_name} ran for a failed generation, its result is dropped"
+        )
+
+    def _dispatch_early(self, action: Action, to_do: list[Step]) -> None:
+        """Start a tool call as soon as its action is parsed from the stream.
+
+        Only done in headless mode, for tools that need no validation and whose
+        dependencies are all available in step_results.
+        """
+        if not self.headless or action.step_name in self._early_calls:
+            return
+        tool = self.tools.get(action.tool_name.strip().upper())
+        if tool is None or tool.need_validation:
+            return
+        if not self._action_dependencies(action, to_do) <= self.step_results.keys():
+            return
+        self._emit("tool_dispatched_early", tool_name=tool.name, step=action.step_name)
+        self._early_calls[action.step_name] = (action, self._start_early_call(action))
+
+    def _start_early_call(self, action: Action) -> Any:
+        """Start an action in the background and return its future."""
+        return self.scheduler.submit(lambda: self._handle_action(action))
+
+    def _store_wave_results(
+        self, wave: list[Action], results: list[Any]
+    ) -> list[tuple[Action, str | None]]:
+        """Store wave results so that later waves can interpolate them."""
+        stored = []
+        for action, result in zip(wave, results):
             # Convert result to string to ensure type compatibility
             result_str = str(result) if result is not None else None
-            response.action_result = result_str
-            self._add_to_memory(response)
-            return True
-
-        self._add_to_memory(response)
-        return True
+            if result_str:
+                self.step_results[action.step_name] = result_str
+            stored.append((action, result_str))
+        return stored
+
+    def _record_results(
+        self, response: Response, executed: list[tuple[Action, str | None]]
+    ) -> None:
+        """Attach the action result to the response and add everything to memory."""
+        for action, result in executed:
+            if action is response.action:
+                # Keep a handle in memory rather than another copy of the result
+                response.action_result = (
+                    self.step_results.handle(action.step_name)
+                    if action.step_name in self.step_results
+                    else result
+                )
+        self._add_to_memory(response, executed)
 
     def _find_interpolated_variables(self, text: str) -> list[str]:
         """Find all interpolated variables in a text string."""
-        return re.findall(r"\$([a-zA-Z0-9_]+)\$", text)
+        return VARIABLE_PATTERN.findall(text)
 
     def _replace_interpolated_variables(
-        self, text: str, variables: dict[str, str]
+        self, text: str, variables: Mapping[str, str]
     ) -> str:
-        """Replace all interpolated variables in a text string with their values."""
-        for variable, value in variables.items():
-            text = text.replace(f"${variable}$", value)
-        return text
+        """Replace all interpolated variables in a text string with their values.
+
+        The text is rebuilt in a single pass, and only the variables used in it
+        are looked up, so results kept in the blob store are read when needed.
+
+        Raises:
+            UnresolvedVariableError: If a variable has no value.
+        """
+        names = dict.fromkeys(self._find_interpolated_variables(text))
+        if not names:
+            return text
+        missing = [name for name in names if name not in variables]
+        if missing:
+            raise UnresolvedVariableError(missing)
+        values = {name: variables[name] for name in names}
+        return VARIABLE_PATTERN.sub(lambda match: values[match.group(1)], text)
 
     def _handle_action(self, action: Action) -> str:
         """Handle tool execution"""
+        tool_name, tool, refusal = self._check_action(action)
+        if refusal is not None:
+            return refusal
+
+        with self._tool_span(tool_name, action) as span:
+            try:
+                named_args = self._build_tool_arguments(action)
+                self._announce_tool(tool_name, named_args)
+                start_time = time.perf_counter()
+                result = tool.execute(**named_args)
+                self.session_stats.record_tool(time.perf_counter() - start_time)
+                self._report_tool_result(tool_name, result)
+                span.set_attribute("result_chars", len(str(result)))
+                return result
+            except Exception:
+                span.set_attribute("failed", True)
+                return self._report_tool_error(tool_name)
+
+    def _tool_span(self, tool_name: str, action: Action) -> Any:
+        """Span timing one tool call."""
+        return get_tracer().span(
+            "tool.execute",
+            tool_name=tool_name,
+            step_name=action.step_name,
+            argument_chars=sum(len(str(value)) for value in action.arguments.values()),
+        )
+
+    def _check_action(self, action: Action) -> tuple[str, Tool | None, str | None]:
+        """Look up the tool for an action and check it may run.
+
+        Returns:
+            tuple: The normalized tool name, the tool, and a refusal message
+                when the action cannot be executed.
+        """
         tool_name = action.tool_name.strip().upper()
         tool = self.tools.get(tool_name)
 
         if not tool:
-            return f"Tool not found: {tool_name}"
-
-        if tool.need_validation and not self._get_user_approval(tool_name, action):
-            return "Action not approved by user"
+            self._emit("tool_not_found", tool_name=tool_name)
+            return tool_name, None, f"Tool not found: {tool_name}"
 
-        try:
-            # Convert dictionary arguments to named arguments
-            # and replace any interpolated variables
-            named_args = {}
-            for key, value in action.arguments.items():
-                # Ensure the key is a valid Python identifier
-                valid_key = key.replace("-", "_").replace(" ", "_")
-                interpolated_value = self._replace_interpolated_variables(
-                    value, self.step_results
-                )
-                named_args[valid_key] = interpolated_value
+        if tool.need_user_input and self.headless:
+            # Nobody answers a headless agent, the model gets an observation instead
+            self._emit("tool_refused", tool_name=tool_name)
+            return tool_name, tool, "Error: No user input is available in headless mode"
 
-            self.console.print(
-                Panel.fit(
-                    f"[bold cyan]Executing tool:[/bold cyan] {tool_name}\n[yellow]Arguments:[/yellow] {named_args}",
-                    title="Tool Execution",
-                    border_style="cyan",
-                )
+        if tool.need_validation and not self._get_user_approval(tool_name, action):
+            self._emit("tool_refused", tool_name=tool_name)
+            return tool_name, tool, "Action not approved by user"
+
+        return tool_name, tool, None
+
+    def _build_tool_arguments(self, action: Action) -> dict[str, str]:
+        """Convert action arguments to named arguments with interpolated variables."""
+        named_args = {}
+        for key, value in action.arguments.items():
+            # Ensure the key is a valid Python identifier
+            valid_key = key.replace("-", "_").replace(" ", "_")
+            interpolated_value = self._replace_interpolated_variables(
+                value, self.step_results
             )
+            named_args[valid_key] = interpolated_value
+        return named_args
 
-            result = tool.execute(**named_args)
-            self.console.print(f"[green]🛠️ Tool execution result:[/green] {result}")
-            input("Press Enter to continue...")
-            return result
-        except Exception:
-            error_trace = traceback.format_exc()
-            safe_error_trace = Text(error_trace)  # Escape special characters
-            self.console.print(
-                f"[red]Error executing tool {tool_name}:[/red]\n{safe_error_trace}"
+    def _announce_tool(self, tool_name: str, named_args: dict[str, str]) -> None:
+        """Display and emit the start of a tool execution."""
+        self._print(
+            Panel.fit(
+                f"[bold cyan]Executing tool:[/bold cyan] {tool_name}\n[yellow]Arguments:[/yellow] {named_args}",
+                title="Tool Execution",
+                border_style="cyan",
             )
-            input("Press Enter to continue...")
-            return f"Error executing tool {tool_name}:\n{safe_error_trace}"
+        )
+        self._emit("tool_started", tool_name=tool_name, arguments=named_args)
+
+    def _report_tool_result(self, tool_name: str, result: Any) -> None:
+        """Display and emit the result of a tool execution."""
+        self._print(f"[green]🛠️ Tool execution result:[/green] {result}")
+        self._emit("tool_finished", tool_name=tool_name, result=str(result))
+        self._pause()
+
+    def _report_tool_error(self, tool_name: str) -> str:
+        """Display and emit the current tool exception, and return it as a result."""
+        error_trace = traceback.format_exc()
+        safe_error_trace = Text(error_trace)  # Escape special characters
+        self._print(
+            f"[red]Error executing tool {tool_name}:[/red]\n{safe_error_trace}"
+        )
+        self._emit("tool_error", tool_name=tool_name, error=error_trace)
+        self._pause()
+        return f"Error executing tool {tool_name}:\n{safe_error_trace}"
 
     def _get_llm_response(self) -> Response:
         """Get response from the language model"""
-        prompt = self._prepare_prompt()
-        self.console.print("\n[bold blue]Generated Prompt[/bold blue]")
-        prompt_for_display = prompt.replace(output_format(), "")
-        # Remove content <available_tools> from prompt
-        prompt_for_display = prompt_for_display.replace(
-            self._available_tools_description("xml"), ""
-        )
-        self.console.print(Panel(prompt_for_display, border_style="blue"))
+        prompt = self._prepare_generation()
+        stream_parser = self._create_stream_parser()
 
         with Progress(
             SpinnerColumn(),
             TextColumn("Generating response..."),
             console=self.console,
             transient=True,
-            disable=False,
+            disable=self.headless,
         ) as progress:
             _task = progress.add_task("", total=None)
-            llm_response = self.model.generate(prompt)
+            start_time = time.perf_counter()
+            llm_response = self.model.generate(
+                prompt, on_delta=stream_parser.feed, **self._generation_kwargs()
+            )
+            self.session_stats.record_response(
+                llm_response, len(prompt), time.perf_counter() - start_time
+            )
+
+        return self._handle_llm_response(llm_response, stream_parser)
+
+    def _create_stream_parser(self) -> ResponseStreamParser:
+        """Create the incremental parser for the next generation."""
+        stream_parser = ResponseStreamParser()
+        stream_parser.on_action = lambda action: self._dispatch_early(
+            action, stream_parser.to_do
+        )
+        return stream_parser
+
+    def _generation_kwargs(self) -> dict[str, Any]:
+        """Extra arguments of the model call, the stable system prompt when caching.
+
+        Left empty otherwise, so that models without system_prompt support still work.
+        """
+        if not self.prompt_caching:
+            return {}
+        return {
+            "system_prompt": system_template(
+                max_iterations=self.max_iterations,
+                tools=self._available_tools_description("xml"),
+                output_format=output_format(),
+            )
+        }
 
-        self.console.print("\n[bold green]LLM Response[/bold green]")
-        self.console.print(Panel(llm_response.content, border_style="green"))
-        self.console.input("[yellow]Press Enter to continue...[/yellow]")
-        return self._parse_response(llm_response.content)
+    def _prepare_generation(self) -> str:
+        """Prepare, display and emit the prompt for the next generation."""
+        prompt = self._prepare_prompt()
+        if not self.headless:
+            self.console.print("\n[bold blue]Generated Prompt[/bold blue]")
+            prompt_for_display = prompt.replace(output_format(), "")
+            # Remove content <available_tools> from prompt
+            prompt_for_display = prompt_for_display.replace(
+                self._available_tools_description("xml"), ""
+            )
+            self.console.print(Panel(prompt_for_display, border_style="blue"))
+        self._emit("prompt_prepared", prompt_length=len(prompt))
+        return prompt
+
+    def _handle_llm_response(
+        self, llm_response: ResponseStats, stream_parser: ResponseStreamParser
+    ) -> Response:
+        """Display and emit the model output, then parse it."""
+        self._print("\n[bold green]LLM Response[/bold green]")
+        self._print(Panel(llm_response.content, border_style="green"))
+        self._emit(
+            "llm_response",
+            content=llm_response.content,
+            prompt_tokens=llm_response.prompt_tokens,
+            cached_prompt_tokens=llm_response.cached_prompt_tokens,
+            completion_tokens=llm_response.completion_tokens,
+            execution_time=llm_response.execution_time,
+        )
+        self._pause()
+        with get_tracer().span(
+            "response.parse", xml_chars=len(llm_response.content), stream=True
+        ) as span:
+            try:
+                response = stream_parser.close()
+                span.set_attribute("stream_fallback", False)
+                return response
+            except ValueError:
+                self.logger.debug("Incremental parsing failed, parsing the full response")
+                span.set_attribute("stream_fallback", True)
+                return self._parse_response(llm_response.content, span)
 
     def _get_user_approval(self, tool_name: str, action: Dict[str, Any]) -> bool:
         """Get user approval for tool execution"""
+        if self.approval_handler is not None:
+            return self.approval_handler(tool_name, action)
+        if self.headless:
+            return False
         self.console.print(
             Panel.fit(
                 f"[yellow]Tool:[/yellow] {tool_name}\n[yellow]Actions:[/yellow] {action}",
@@ -228,13 +699,19 @@ class Agent:
         if not self.step_results:
             return "No step results available."
 
+        step_results = self.step_results
+        if self.context_budget is not None:
+            step_results = self.context_budget.fit(step_results)
+
         content = []
-        for step_name, result in self.step_results.items():
+        for step_name, result in step_results.items():
             content.append(f"   <{step_name}>{result}</{step_name}>")
         return "\n".join(content)
 
     def _display_status(self) -> None:
         """Display current agent status"""
+        if self.headless:
+            return
         self.console.rule("[bold blue]Agent Status")
         self.console.print(
             f"[yellow]Iteration:[/yellow] {self.current_iteration}/{self.max_iterations}"
@@ -244,6 +721,15 @@ class Agent:
 
     def _prepare_prompt(self) -> str:
         """Prepare prompt for LLM"""
+        if self.prompt_caching:
+            return turn_template(
+                query=self.query,
+                history=self._format_tasks(),
+                current_iteration=self.current_iteration,
+                max_iterations=self.max_iterations,
+                remaining_iterations=self.max_iterations - self.current_iteration,
+                step_result_variables=self._format_step_result_variables(),
+            )
         return query_template(
             query=self.query,
             history=self._format_tasks(),
@@ -339,85 +825,123 @@ class Agent:
         # Improved regex to capture XML within code blocks or standalone
         match = re.search(r"```xml\s*([\s\S]*?)\s*```", input)
         if not match:
-            match = re.search(r"(<response>[\\s\S]*?</response>)", input)
+            match = re.search(r"(<response>[\s\S]*?</response>)", input)
             if not match:
                 return None
             return match.group(1)
         return match.group(1)
 
-    def _parse_response(self, response: str) -> Response:
-        """Parse response from LLM"""
+    def _parse_response(self, response: str, span: Any = None) -> Response:
+        """Parse response from LLM, recorded in span when one is open"""
 
         first_xml = self._first_xml_code_block(response)
 
         if first_xml:
-            return ResponseParser.parse(first_xml)
+            return ResponseParser.parse(first_xml, span)
 
         raise ValueError(f"No XML content found in response:\n {response}")
 
     def _available_tools_description(self, format: str) -> str:
-        """Get the description of all available tools in XML format."""
+        """Get the description of all available tools in XML format.
+
+        The XML description is built once and cached until the next call to
+        register(); re-register a tool after changing its fields.
+        """
         if format == "xml":
-            descriptions: list[str] = []
-            descriptions.append("<! -- Available tools -->")
-            #  Appen tool name, as XML comment
-            for tool in self.tools.values():
-                descriptions.append(f"<!-- {tool.name} -->")
-                descriptions.append(PydanticToXMLSerializer.serialize(tool, pretty=True))
-            return "\n".join(descriptions)
+            if self._tools_xml_description is None:
+                descriptions: list[str] = []
+                descriptions.append("<! -- Available tools -->")
+                #  Appen tool name, as XML comment
+                for tool in self.tools.values():
+                    descriptions.append(f"<!-- {tool.name} -->")
+                    descriptions.append(
+                        PydanticToXMLSerializer.serialize(tool, pretty=True)
+                    )
+                self._tools_xml_description = "\n".join(descriptions)
+            return self._tools_xml_description
         if format == "json":
             return {tool.name: tool.to_json() for tool in self.tools.values()}
 
         raise ValueError(f"Unsupported format: {format}")
 
-    def _add_to_memory(self, response: Response) -> None:
-        """Add thought to memory"""
-        if response.final_answer is not None:
+    def _add_to_memory(
+        self,
+        response: Response,
+        executed: list[tuple[Action, str | None]] | None = None,
+    ) -> None:
+        """Add thought to memory, moving executed steps from to-do to done.
+
+        Args:
+            response (Response): The response of the current iteration.
+            executed (list, optional): Executed actions with their results.
+        """
+        thought = response.thought
+        if response.final_answer is not None or not (
+            thought and (thought.to_do or executed)
+        ):
             self.memory.append(response)
-        elif response.thought and response.thought.to_do:
-            thought = response.thought
-            if thought and thought.to_do:
-                current_step = thought.to_do[0]
-                current_step_name = current_step.name
-
-                # Update current_step result
-                current_step.result = f"Result saved in ${current_step_name}$ variable"
-                current_step.tool_name = response.action.tool_name
-                current_step.arguments = response.action.arguments
-
-                # Add current_step to done_steps
-                self.done_steps.append(current_step)
-
-                # Remove the current_step from to_do_steps
-                self.to_do_steps = [
-                    step for step in self.to_do_steps if step.name != current_step_name
-                ]
-
-                self.to_do_steps = thought.to_do[1:]
-
-                if response.action_result:
-                    self.step_results[current_step_name] = response.action_result
-
-                self.current_thought = Thought(
-                    reasoning=thought.reasoning,
-                    to_do=self.to_do_steps,
-                    done=self.done_steps,
+            return
+
+        executed_steps: list[Step] = []
+        for action, result in executed or []:
+            current_step = next(
+                (step for step in thought.to_do if step.name == action.step_name),
+                None,
+            )
+            if current_step is None and action is response.action:
+                current_step = self._primary_action_step(response)
+            if current_step is None:
+                # Unplanned action from an <actions> list
+                current_step = Step(
+                    name=action.step_name,
+                    description=action.reason or f"Run {action.tool_name}",
+                    reason=action.reason,
                 )
+            if any(current_step is step for step in executed_steps):
+                continue
+            current_step_name = current_step.name
+
+            # Update current_step result
+            current_step.result = f"Result saved in ${current_step_name}$ variable"
+            current_step.tool_name = action.tool_name
+            current_step.arguments = action.arguments
+
+            # Add current_step to done_steps
+            self.done_steps.append(current_step)
+            executed_steps.append(current_step)
+
+            if result:
+                self.step_results[current_step_name] = result
+
+        self.to_do_steps = [
+            step
+            for step in thought.to_do
+            if not any(step is done for done in executed_steps)
+        ]
+
+        self.current_thought = Thought(
+            reasoning=thought.reasoning,
+            to_do=self.to_do_steps,
+            done=self.done_steps,
+        )
 
-                # Display current thought in a panel
-                self.console.print(
-                    Panel.fit(
-                        PydanticToXMLSerializer.serialize(
-                            self.current_thought,
-                            pretty=True,
-                            list_item_names={"to_do": "step", "done": "step"},
-                        ),
-                        title="[bold cyan]Current Thought[/bold cyan]",
-                        border_style="cyan",
-                    )
+        # Display current thought in a panel
+        if not self.headless:
+            self.console.print(
+                Panel.fit(
+                    PydanticToXMLSerializer.serialize(
+                        self.current_thought,
+                        pretty=True,
+                        list_item_names={"to_do": "step", "done": "step"},
+                    ),
+                    title="[bold cyan]Current Thought[/bold cyan]",
+                    border_style="cyan",
                 )
-                self.console.input("[yellow]Press Enter to continue...[/yellow]")
-                self.memory.append(response)
-        else:
-            # Handle other cases
-            self.memory.append(response)
+            )
+        self._emit(
+            "thought_updated",
+            done_steps=[step.name for step in self.done_steps],
+            to_do_steps=[step.name for step in self.to_do_steps],
+        )
+        self._pause()
+        self.memory.append(response)
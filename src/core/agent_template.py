@@ -96,6 +96,12 @@ def output_format() -> str:
                     <step_name>step_name</step_name>
                     <!-- Additional step names as needed -->
                 </depends_on_steps>
+                <!-- tool_name and arguments are optional: set them when the step can run now, -->
+                <!-- independent steps are executed in parallel with the action -->
+                <tool_name>EXACT_TOOL_NAME</tool_name>
+                <arguments>
+                    <argument1><![CDATA[value or $previous_step$]]></argument1>
+                </arguments>
             </step>
             <!-- Additional steps as needed -->
         </to_do>
@@ -153,9 +159,21 @@ def output_format() -> str:
     <final_answer><![CDATA[Your final answer to the query, prefer Markdown format if the format is not defined in the query]]></final_answer>
 </response>
 ```
+#### Several tool calls in one turn
+
+To call several tools at once, replace <action> by an <actions> list of <action> elements, each with its own step_name.
+Independent actions run in parallel; an action using $step_name$ of another action of the list runs after it.
+
+```xml
+<actions>
+    <action>...</action>
+    <action>...</action>
+</actions>
+```
+
 ### Key Points to Remember:
 
-- Include either <action> or <final_answer>, but not both.
+- Include either <action> (or <actions>) or <final_answer>, but not both.
 - Ensure that the XML is well-formed and adheres to the specified structure.
 - Do not add any text before or after the XML; responses must be a valid XML format.
 
@@ -169,50 +187,7 @@ Example of formats:
     )
 
 
-def query_template(
-    query: str,
-    history: str,
-    current_iteration: int,
-    max_iterations: int,
-    remaining_iterations: int,
-    tools: str,
-    output_format: str,
-    step_result_variables: str = "",
-) -> str:
-    current_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    operating_system = os.uname().sysname
-    current_shell = os.environ.get("SHELL", "N/A")
-    return f"""
-# Goal to achieve:
-
-You are a ReAct (Reasoning and Acting) agent tasked to achieve the following goal:
-
-## Query to solve:
-
-<query><![CDATA[
-{query}
-]]></query>
-
-### Environment:
-
-Current date: {current_date}
-Operating System: {operating_system}
-Shell: {current_shell}
-
-### Available Tools:
-
-<available_tools>
-<![CDATA[
-{tools}
-]]>
-</available_tools>
-
-### Variables from previous steps:
-
-<step_result_variables>
-{step_result_variables}
-</step_results_variables>
-
+VARIABLES_USAGE = """
 ### Using variables from previous steps:
 
 You can use results from previous steps in your tool arguments using the $step_name$ syntax.
@@ -268,7 +243,11 @@ Important:
 - Always use <![CDATA[...]]> around argument values
 - Variables must exist in step_result_variables
 - Variable names are case-sensitive
+"""
+
 
+def instructions_section(max_iterations: int) -> str:
+    return f"""
 ### Instructions:
 
 1. Analyze the query, history and completed steps to determine the best course of action
@@ -281,7 +260,58 @@ Important:
 4. Response must be within {max_iterations} iterations
 5. Format response as valid XML following the output format below
 6. Adapt tool usage based on results and needs
+"""
+
+
+def environment_section(include_date: bool = True) -> str:
+    operating_system = os.uname().sysname
+    current_shell = os.environ.get("SHELL", "N/A")
+    lines = ["### Environment:", ""]
+    if include_date:
+        current_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        lines.append(f"Current date: {current_date}")
+    lines.append(f"Operating System: {operating_system}")
+    lines.append(f"Shell: {current_shell}")
+    return "\n".join(lines) + "\n"
 
+
+def query_template(
+    query: str,
+    history: str,
+    current_iteration: int,
+    max_iterations: int,
+    remaining_iterations: int,
+    tools: str,
+    output_format: str,
+    step_result_variables: str = "",
+) -> str:
+    return f"""
+# Goal to achieve:
+
+You are a ReAct (Reasoning and Acting) agent tasked to achieve the following goal:
+
+## Query to solve:
+
+<query><![CDATA[
+{query}
+]]></query>
+
+{environment_section()}
+### Available Tools:
+
+<available_tools>
+<![CDATA[
+{tools}
+]]>
+</available_tools>
+
+### Variables from previous steps:
+
+<step_result_variables>
+{step_result_variables}
+</step_results_variables>
+{VARIABLES_USAGE}
+{instructions_section(max_iterations)}
 ### Session History:
 
 <history>
@@ -297,3 +327,67 @@ Important:
 {output_format}
 
 """
+
+
+def system_template(max_iterations: int, tools: str, output_format: str) -> str:
+    """Stable part of the prompt, identical across iterations and sessions.
+
+    Sent as the system message so that providers and local servers can reuse
+    the cached prefix.
+    """
+    return f"""
+# Role:
+
+You are a ReAct (Reasoning and Acting) agent tasked to achieve the goal given in <query>.
+
+{environment_section(include_date=False)}
+### Available Tools:
+
+<available_tools>
+<![CDATA[
+{tools}
+]]>
+</available_tools>
+{VARIABLES_USAGE}
+{instructions_section(max_iterations)}
+### Output Format:
+{output_format}
+"""
+
+
+def turn_template(
+    query: str,
+    history: str,
+    current_iteration: int,
+    max_iterations: int,
+    remaining_iterations: int,
+    step_result_variables: str = "",
+) -> str:
+    """Volatile part of the prompt, sent as the user message after system_template."""
+    current_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return f"""
+## Query to solve:
+
+<query><![CDATA[
+{query}
+]]></query>
+
+Current date: {current_date}
+
+### Session History:
+
+<history>
+{history}
+</history>
+
+### Variables from previous steps:
+
+<step_result_variables>
+{step_result_variables}
+</step_results_variables>
+
+### Context:
+
+- Current iteration: {current_iteration}/{max_iterations}
+- Remaining iterations: {remaining_iterations}
+"""
@@ -0,0 +1,220 @@
+import asyncio
+import contextvars
+import time
+import traceback
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from core.agent import Agent, AgentState
+from core.generative_model import GenerativeModel
+from models.response import Action, Response
+from models.session_stats import SessionStats
+from models.tool import Tool
+from utility.tracing import get_tracer
+
+DEFAULT_MAX_TOOL_WORKERS = 16
+
+# Shared by every AsyncAgent that is not given its own executor, so that
+# hundreds of concurrent sessions do not each spawn a thread pool.
+_default_tool_executor = ThreadPoolExecutor(
+    max_workers=DEFAULT_MAX_TOOL_WORKERS, thread_name_prefix="agent-tool"
+)
+
+
+class AsyncAgent(Agent):
+    """Agent running its think/act loop on an asyncio event loop.
+
+    The model is called through litellm's acompletion. Tools overriding
+    Tool.aexecute are awaited directly, sync-only tools are offloaded to a
+    bounded executor. Create one AsyncAgent per concurrent query: the agent
+    keeps the state of a single session.
+    """
+
+    def __init__(
+        self,
+        model: GenerativeModel,
+        max_iterations: int = 20,
+        headless: bool = True,
+        tool_executor: Executor | None = None,
+        **kwargs: Any,
+    ):
+        """Create an async agent.
+
+        Args:
+            model (GenerativeModel): The model used to think.
+            max_iterations (int): Maximum number of think/act iterations.
+            headless (bool): Skip panels and pauses. Defaults to True, as
+                interactive pauses would block the event loop.
+            tool_executor (Executor, optional): Executor for sync-only tools.
+                Defaults to a process-wide pool of DEFAULT_MAX_TOOL_WORKERS threads.
+            **kwargs: Other Agent arguments (event_handler, approval_handler).
+        """
+        super().__init__(model, max_iterations, headless=headless, **kwargs)
+        self.tool_executor = tool_executor or _default_tool_executor
+
+    async def aexecute(self, query: str) -> str:
+        """Main asynchronous execution entry point"""
+        return (await self.aexecute_with_stats(query))[0]
+
+    async def aexecute_with_stats(self, query: str) -> tuple[str, SessionStats]:
+        """Execute a query and return the answer with the session statistics."""
+        start_time = time.perf_counter()
+        with get_tracer().span("agent.execute", query_chars=len(query)) as span:
+            answer = await self._aexecute(query)
+            self.session_stats.total_time = time.perf_counter() - start_time
+            span.set_attributes(
+                iterations=self.current_iteration,
+                state=self.state.value,
+                prompt_tokens=self.session_stats.prompt_tokens,
+                completion_tokens=self.session_stats.completion_tokens,
+            )
+            return answer, self.session_stats
+
+    async def _aexecute(self, query: str) -> str:
+        try:
+            self._reset_state(query)
+            self._emit("execution_started", query=query)
+            answer = await self._arun_thinking_loop()
+            self._emit(
+                "execution_finished",
+                state=self.state.value,
+                answer=answer,
+                stats=self.session_stats.model_dump(),
+            )
+            return answer
+        except Exception:
+            self.logger.error(f"Execution error: {traceback.format_exc()}")
+            self._emit("error", error=traceback.format_exc())
+            return f"Error during execution:\n{traceback.format_exc()}"
+
+    async def _arun_thinking_loop(self) -> str:
+        """Main asynchronous thinking loop"""
+        while self.current_iteration < self.max_iterations:
+            try:
+                if not await self._athink():
+                    break
+            except Exception:
+                self.state = AgentState.ERROR
+                error_trace = traceback.format_exc()
+                self._print(f"[red]Error during thinking:[/red]\n{error_trace}")
+                self._emit("error", error=error_trace)
+                return f"Error during thinking:\n{error_trace}"
+
+        return self._get_final_answer()
+
+    async def _athink(self) -> bool:
+        """Execute one thinking iteration asynchronously"""
+        if not self._start_iteration():
+            return False
+
+        with get_tracer().span("agent.iteration", iteration=self.current_iteration):
+            try:
+                response = await self._aget_llm_response()
+            except Exception:
+                await self._adiscard_early_calls()
+                raise
+            return await self._adecide(response)
+
+    async def _aget_llm_response(self) -> Response:
+        """Get response from the language model without blocking the loop"""
+        prompt = self._prepare_generation()
+        stream_parser = self._create_stream_parser()
+        start_time = time.perf_counter()
+        llm_response = await self.model.agenerate(
+            prompt, on_delta=stream_parser.feed, **self._generation_kwargs()
+        )
+        self.session_stats.record_response(
+            llm_response, len(prompt), time.perf_counter() - start_time
+        )
+        return self._handle_llm_response(llm_response, stream_parser)
+
+    def _start_early_call(self, action: Action) -> asyncio.Task:
+        """Start an action as a task on the running event loop."""
+        return asyncio.ensure_future(self._ahandle_action(action))
+
+    async def _arun_action(self, action: Action) -> str:
+        """Run an action, or await the same call dispatched during generation."""
+        early_call = self._take_early_call(action)
+        if early_call is not None:
+            return await early_call
+        return await self._ahandle_action(action)
+
+    async def _asettle_early_calls(self) -> None:
+        """Await the early calls no action claimed and keep their results."""
+        early_calls, self._early_calls = self._early_calls, {}
+        for action, call in early_calls.values():
+            self._keep_early_result(action, await call)
+
+    async def _adiscard_early_calls(self) -> None:
+        """Await the early calls of a generation that failed, and drop them."""
+        early_calls, self._early_calls = self._early_calls, {}
+        for step_name, (_action, call) in early_calls.items():
+            await asyncio.gather(call, return_exceptions=True)
+            self._log_wasted_call(step_name)
+
+    async def _adecide(self, response: Response) -> bool:
+        """Process response and decide next action asynchronously"""
+        try:
+            if self._accept_response(response):
+                return False
+
+            actions = self._collect_actions(response)
+            if not actions:
+                self._add_to_memory(response)
+                return True
+
+            executed = await self._aexecute_actions(response, actions)
+            self._record_results(response, executed)
+            return True
+        finally:
+            await self._asettle_early_calls()
+
+    async def _aexecute_actions(
+        self, response: Response, actions: list[Action]
+    ) -> list[tuple[Action, str | None]]:
+        """Execute actions wave by wave, gathering independent ones concurrently."""
+        to_do = response.thought.to_do if response.thought else []
+        dependencies = {
+            action.step_name: self._action_dependencies(action, to_do)
+            for action in actions
+        }
+        executed: list[tuple[Action, str | None]] = []
+        for wave in self.scheduler.waves(actions, dependencies):
+            results = await asyncio.gather(
+                *(self._arun_action(action) for action in wave)
+            )
+            executed.extend(self._store_wave_results(wave, results))
+        return executed
+
+    async def _ahandle_action(self, action: Action) -> str:
+        """Handle tool execution asynchronously"""
+        tool_name, tool, refusal = self._check_action(action)
+        if refusal is not None:
+            return refusal
+
+        with self._tool_span(tool_name, action) as span:
+            try:
+                named_args = self._build_tool_arguments(action)
+                self._announce_tool(tool_name, named_args)
+                start_time = time.perf_counter()
+                result = await self._arun_tool(tool, named_args)
+                self.session_stats.record_tool(time.perf_counter() - start_time)
+                self._report_tool_result(tool_name, result)
+                span.set_attribute("result_chars", len(str(result)))
+                return result
+            except Exception:
+                span.set_attribute("failed", True)
+                return self._report_tool_error(tool_name)
+
+    async def _arun_tool(self, tool: Tool, named_args: dict[str, str]) -> Any:
+        """Await native async tools, offload sync-only tools to the executor."""
+        if type(tool).aexecute is not Tool.aexecute:
+            return await tool.aexecute(**named_args)
+
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the context so that spans opened by the tool nest
+        return await loop.run_in_executor(
+            self.tool_executor,
+            partial(contextvars.copy_context().run, tool.execute, **named_args),
+        )
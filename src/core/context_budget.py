@@ -0,0 +1,98 @@
+import hashlib
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from litellm import token_counter
+
+TRUNCATION_MARKER = "\n[... {omitted} tokens omitted, ${name}$ holds the full value ...]\n"
+# Token counts memoized, least recently used first out
+MAX_MEMOIZED_COUNTS = 1024
+
+
+class ContextBudget:
+    """Fit the step results shown in the prompt into a token budget.
+
+    Only the prompt view is reduced: step_results keep the full values, so
+    $variable$ interpolation in tool arguments and final answers stays exact.
+    Under the budget, results are inlined as they are. Over it, the most
+    recent results are kept first, oversized results are cut to their head
+    and tail, and the results that still do not fit are only referenced by name.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        model: str = "",
+        max_entry_tokens: int | None = None,
+        reference_tokens: int = 32,
+    ):
+        """Create a context budget.
+
+        Args:
+            max_tokens (int): Token budget for all the step results of a prompt.
+            model (str): Model name, selects the tokenizer used by token_counter.
+            max_entry_tokens (int, optional): Cap for a single result once the
+                budget is exceeded. Defaults to a quarter of max_tokens.
+            reference_tokens (int): Tokens reserved for each referenced result.
+        """
+        self.max_tokens = max_tokens
+        self.model = model
+        self.max_entry_tokens = max_entry_tokens or max(max_tokens // 4, 1)
+        self.reference_tokens = reference_tokens
+        self._counts: OrderedDict[str, int] = OrderedDict()
+
+    def count(self, text: str) -> int:
+        """Number of tokens of a text for the configured model, memoized."""
+        # Keyed by the SHA-256 of the text, as in the BlobStore, so that results
+        # spilled out of memory stay out and distinct texts never share a count.
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if key in self._counts:
+            self._counts.move_to_end(key)
+            return self._counts[key]
+        tokens = self._counts[key] = token_counter(model=self.model, text=text)
+        if len(self._counts) > MAX_MEMOIZED_COUNTS:
+            self._counts.popitem(last=False)
+        return tokens
+
+    def truncate(self, name: str, text: str, max_tokens: int) -> str:
+        """Keep the head and tail of a text within max_tokens."""
+        total = self.count(text)
+        if total <= max_tokens:
+            return text
+        # Start from the average characters per token, then shrink until it fits.
+        keep = int(max_tokens * len(text) / total)
+        while True:
+            half = keep // 2
+            head, tail = text[:half], text[len(text) - half :]
+            kept_tokens = token_counter(model=self.model, text=head + tail)
+            if kept_tokens <= max_tokens or not half:
+                break
+            keep = int(keep * max_tokens / kept_tokens * 0.95)
+        marker = TRUNCATION_MARKER.format(omitted=total - kept_tokens, name=name)
+        return head + marker + tail
+
+    @staticmethod
+    def reference(name: str, tokens: int) -> str:
+        """Placeholder for a result left out of the prompt."""
+        return f"[{tokens} tokens not shown, ${name}$ holds the full value]"
+
+    def fit(self, step_results: Mapping[str, str]) -> dict[str, str]:
+        """Return the prompt view of the step results, in their original order."""
+        counts = {name: self.count(result) for name, result in step_results.items()}
+        if sum(counts.values()) <= self.max_tokens:
+            return dict(step_results)
+
+        remaining = self.max_tokens - self.reference_tokens * len(step_results)
+        fitted: dict[str, str] = {}
+        for name in reversed(list(step_results)):
+            result = step_results[name]
+            allowance = min(self.max_entry_tokens, remaining)
+            if counts[name] <= allowance:
+                fitted[name] = result
+                remaining -= counts[name]
+            elif allowance > self.reference_tokens:
+                fitted[name] = self.truncate(name, result, allowance)
+                remaining -= allowance
+            else:
+                fitted[name] = self.reference(name, counts[name])
+        return {name: fitted[name] for name in step_results}
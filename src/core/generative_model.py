@@ -2,12 +2,18 @@
 # Disable all litellm logging before any imports
 import logging
 import os
+import time
+from typing import Any, Callable
 
 # Configure litellm
 import litellm
-from litellm import completion
+from core.model_backend import LiteLLMBackend, ModelBackend
+from litellm import Usage, token_counter
 from models.message import Message
 from models.responsestats import ResponseStats
+from utility.response_close_detector import ResponseCloseDetector
+from utility.sqlite_cache import SqliteCache
+from utility.tracing import get_tracer
 
 os.environ["LITELLM_LOG_LEVEL"] = "ERROR"
 logging.getLogger().setLevel(logging.ERROR)
@@ -24,6 +30,10 @@ for name in logging.root.manager.loggerDict:
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Providers that only cache a prompt prefix marked with cache_control, the
+# others (OpenAI, DeepSeek, local servers...) cache repeated prefixes on their own.
+EXPLICIT_CACHE_PROVIDERS = {"anthropic", "bedrock", "vertex_ai"}
+
 
 class GenerativeModel:
     def __init__(
@@ -32,58 +42,362 @@ class GenerativeModel:
         model: str = "ollama/qwen2.5-coder:14b",
         temperature: float = 0.7,
         max_tokens: int = 5120,
+        cache: SqliteCache | None = None,
+        stream: bool = False,
+        backend: ModelBackend | None = None,
     ) -> None:
+        """Create a generative model.
+
+        Args:
+            cache (SqliteCache, optional): Persistent response cache. When set,
+                identical requests (model, role, messages, temperature and
+                max_tokens) are answered from the cache instead of the provider.
+            stream (bool): Stream the completion and cancel it as soon as the
+                XML response is closed, skipping any trailing text.
+            backend (ModelBackend, optional): Completion endpoint. Defaults to
+                litellm; a ReplayBackend answers offline from scripted responses.
+        """
         self.role = role
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.cache = cache
+        self.stream = stream
+        self.backend = backend or LiteLLMBackend()
 
-    def generate_with_history(
-        self, messages_history: list[Message], prompt: str
-    ) -> ResponseStats:
-        """Get response from the agent along with token statistics."""
-        import time
-
-        start_time = time.time()  # Start timing
+    def _needs_cache_control(self) -> bool:
+        """Whether the provider needs an explicit marker to cache the prompt prefix."""
+        try:
+            provider = litellm.get_llm_provider(self.model)[1]
+        except Exception:
+            return False
+        return provider in EXPLICIT_CACHE_PROVIDERS
 
-        logger.debug(f"Prompt: {prompt}")
+    def _system_message(self, system_prompt: str | None) -> dict:
+        """Build the system message, marked as cacheable when it carries a prompt."""
+        if system_prompt is None:
+            return {"role": "system", "content": self.role}
+        content = f"{self.role}\n{system_prompt}"
+        if not self._needs_cache_control():
+            return {"role": "system", "content": content}
+        return {
+            "role": "system",
+            "content": [
+                {
+                    "type": "text",
+                    "text": content,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+        }
 
-        response = completion(
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            model=self.model,
-            messages=[
-                {"role": "system", "content": self.role},
+    def _completion_kwargs(
+        self,
+        messages_history: list[Message],
+        prompt: str,
+        system_prompt: str | None = None,
+    ) -> dict:
+        """Build the keyword arguments for a litellm completion call."""
+        return {
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "model": self.model,
+            "messages": [
+                self._system_message(system_prompt),
                 *messages_history,
                 {"role": "user", "content": prompt},
             ],
-        )
-
-        end_time = time.time()  # End timing
+        }
 
-        # Calculate the elapsed time and tokens per second
-        elapsed_time = end_time - start_time
-        token_usage = response.usage  # This contains token counts
+    @staticmethod
+    def _cached_prompt_tokens(token_usage) -> int:
+        """Number of prompt tokens the provider read from its prompt cache."""
+        details = getattr(token_usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        if cached_tokens is None:
+            cached_tokens = getattr(token_usage, "cache_read_input_tokens", None)
+        return cached_tokens or 0
 
+    def _build_stats(
+        self, content: str, token_usage, elapsed_time: float, **timings: float
+    ) -> ResponseStats:
+        """Build response statistics from a completion content and token usage."""
         tokens_per_second = (
             (token_usage.total_tokens / elapsed_time) if elapsed_time > 0 else 0
         )
 
         logger.debug(f"Prompt tokens: {token_usage.prompt_tokens}")
         logger.debug(f"Completion tokens: {token_usage.completion_tokens}")
+        logger.debug(f"Cached prompt tokens: {self._cached_prompt_tokens(token_usage)}")
         logger.debug(f"Tokens per second: {tokens_per_second}")
-        logger.debug(f"Content: {response.choices[0].message.content}")
+        logger.debug(f"Content: {content}")
 
         return ResponseStats(
-            content=response.choices[0].message.content,
+            content=content,
             prompt_tokens=token_usage.prompt_tokens,
             completion_tokens=token_usage.completion_tokens,
             total_tokens=token_usage.total_tokens,
+            cached_prompt_tokens=self._cached_prompt_tokens(token_usage),
             tokens_per_second=tokens_per_second,
             execution_time=elapsed_time,
+            **timings,
+        )
+
+    def _stream_usage(self, completion_kwargs: dict, content: str, usage) -> Usage:
+        """Token usage of a stream, estimated when it was cancelled before the end."""
+        if usage is not None:
+            return usage
+        prompt_tokens = token_counter(
+            model=self.model, messages=completion_kwargs["messages"]
+        )
+        completion_tokens = token_counter(model=self.model, text=content)
+        return Usage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+    def _stream_completion(
+        self, completion_kwargs: dict, on_delta: Callable[[str], None] | None = None
+    ) -> ResponseStats:
+        """Stream a completion, stopping as soon as the XML response is closed."""
+        start_time = time.time()
+        detector = ResponseCloseDetector()
+        timings: dict[str, float] = {}
+        usage = None
+
+        stream = self.backend.completion(
+            **completion_kwargs, stream=True, stream_options={"include_usage": True}
+        )
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                timings.setdefault("time_to_first_token", time.time() - start_time)
+                if on_delta is not None:
+                    on_delta(delta)
+                if detector.feed(delta):
+                    timings["time_to_close_tag"] = time.time() - start_time
+                    break
+        finally:
+            completion_stream = getattr(stream, "completion_stream", None)
+            if hasattr(completion_stream, "close"):
+                completion_stream.close()
+
+        return self._build_stats(
+            detector.content,
+            self._stream_usage(completion_kwargs, detector.content, usage),
+            time.time() - start_time,
+            **timings,
+        )
+
+    async def _astream_completion(
+        self, completion_kwargs: dict, on_delta: Callable[[str], None] | None = None
+    ) -> ResponseStats:
+        """Asynchronously stream a completion, stopping once the XML response is closed."""
+        start_time = time.time()
+        detector = ResponseCloseDetector()
+        timings: dict[str, float] = {}
+        usage = None
+
+        stream = await self.backend.acompletion(
+            **completion_kwargs, stream=True, stream_options={"include_usage": True}
         )
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                timings.setdefault("time_to_first_token", time.time() - start_time)
+                if on_delta is not None:
+                    on_delta(delta)
+                if detector.feed(delta):
+                    timings["time_to_close_tag"] = time.time() - start_time
+                    break
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+
+        return self._build_stats(
+            detector.content,
+            self._stream_usage(completion_kwargs, detector.content, usage),
+            time.time() - start_time,
+            **timings,
+        )
+
+    def _cache_key(self, completion_kwargs: dict) -> str | None:
+        """Cache key of a completion request, None when caching is disabled."""
+        if self.cache is None:
+            return None
+        return SqliteCache.make_key(completion_kwargs)
 
-    def generate(self, prompt: str) -> ResponseStats:
+    def _cached_stats(self, key: str | None) -> ResponseStats | None:
+        """Return cached statistics for a request key, if any."""
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        logger.debug("Response cache hit")
+        return ResponseStats.model_validate_json(cached).model_copy(
+            update={"cached": True}
+        )
+
+    def _store_stats(self, key: str | None, stats: ResponseStats) -> ResponseStats:
+        """Store statistics in the cache under a request key and return them."""
+        if key is not None:
+            self.cache.set(key, stats.model_dump_json())
+        return stats
+
+    @staticmethod
+    def _deliver(
+        stats: ResponseStats, on_delta: Callable[[str], None] | None
+    ) -> ResponseStats:
+        """Hand a complete content to the delta callback and return the statistics."""
+        if on_delta is not None:
+            on_delta(stats.content)
+        return stats
+
+    def _generation_span(self, prompt: str, system_prompt: str | None) -> Any:
+        """Span timing one generation."""
+        return get_tracer().span(
+            "model.generate",
+            model=self.model,
+            prompt_chars=len(prompt) + len(system_prompt or ""),
+            stream=self.stream,
+        )
+
+    @staticmethod
+    def _trace_stats(span: Any, stats: ResponseStats) -> None:
+        """Add the token counts and timings of a generation to its span."""
+        span.set_attributes(
+            prompt_tokens=stats.prompt_tokens,
+            completion_tokens=stats.completion_tokens,
+            cached_prompt_tokens=stats.cached_prompt_tokens,
+            response_chars=len(stats.content),
+            cached=stats.cached,
+            time_to_first_token=stats.time_to_first_token,
+        )
+
+    def _generate(
+        self, completion_kwargs: dict, on_delta: Callable[[str], None] | None
+    ) -> ResponseStats:
+        """Answer a completion request from the cache or the backend."""
+        start_time = time.time()
+
+        key = self._cache_key(completion_kwargs)
+        cached = self._cached_stats(key)
+        if cached is not None:
+            return self._deliver(cached, on_delta)
+
+        if self.stream:
+            return self._store_stats(
+                key, self._stream_completion(completion_kwargs, on_delta)
+            )
+
+        response = self.backend.completion(**completion_kwargs)
+
+        stats = self._build_stats(
+            response.choices[0].message.content,
+            response.usage,
+            time.time() - start_time,
+        )
+        return self._deliver(self._store_stats(key, stats), on_delta)
+
+    async def _agenerate(
+        self, completion_kwargs: dict, on_delta: Callable[[str], None] | None
+    ) -> ResponseStats:
+        """Asynchronously answer a completion request from the cache or the backend."""
+        start_time = time.time()
+
+        key = self._cache_key(completion_kwargs)
+        cached = self._cached_stats(key)
+        if cached is not None:
+            return self._deliver(cached, on_delta)
+
+        if self.stream:
+            return self._store_stats(
+                key, await self._astream_completion(completion_kwargs, on_delta)
+            )
+
+        response = await self.backend.acompletion(**completion_kwargs)
+
+        stats = self._build_stats(
+            response.choices[0].message.content,
+            response.usage,
+            time.time() - start_time,
+        )
+        return self._deliver(self._store_stats(key, stats), on_delta)
+
+    def generate_with_history(
+        self,
+        messages_history: list[Message],
+        prompt: str,
+        on_delta: Callable[[str], None] | None = None,
+        system_prompt: str | None = None,
+    ) -> ResponseStats:
+        """Get response from the agent along with token statistics.
+
+        Args:
+            messages_history (list[Message]): Previous messages of the conversation.
+            prompt (str): The user prompt.
+            on_delta (Callable, optional): Receives the generated text, chunk by
+                chunk when streaming, in one piece otherwise.
+            system_prompt (str, optional): Stable instructions appended to the role
+                in the system message. The message is marked as cacheable for
+                providers that need it, so the prefix is reused across calls.
+        """
+        logger.debug(f"Prompt: {prompt}")
+
+        completion_kwargs = self._completion_kwargs(
+            messages_history, prompt, system_prompt
+        )
+        with self._generation_span(prompt, system_prompt) as span:
+            stats = self._generate(completion_kwargs, on_delta)
+            self._trace_stats(span, stats)
+        return stats
+
+    def generate(
+        self,
+        prompt: str,
+        on_delta: Callable[[str], None] | None = None,
+        system_prompt: str | None = None,
+    ) -> ResponseStats:
         """Get response from the agent along with token statistics."""
 
-        return self.generate_with_history([], prompt)
+        return self.generate_with_history(
+            [], prompt, on_delta, system_prompt=system_prompt
+        )
+
+    async def agenerate_with_history(
+        self,
+        messages_history: list[Message],
+        prompt: str,
+        on_delta: Callable[[str], None] | None = None,
+        system_prompt: str | None = None,
+    ) -> ResponseStats:
+        """Asynchronously get response from the agent along with token statistics."""
+        logger.debug(f"Prompt: {prompt}")
+
+        completion_kwargs = self._completion_kwargs(
+            messages_history, prompt, system_prompt
+        )
+        with self._generation_span(prompt, system_prompt) as span:
+            stats = await self._agenerate(completion_kwargs, on_delta)
+            self._trace_stats(span, stats)
+        return stats
+
+    async def agenerate(
+        self,
+        prompt: str,
+        on_delta: Callable[[str], None] | None = None,
+        system_prompt: str | None = None,
+    ) -> ResponseStats:
+        """Asynchronously get response from the agent along with token statistics."""
+
+        return await self.agenerate_with_history(
+            [], prompt, on_delta, system_prompt=system_prompt
+        )
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+from litellm import ModelResponse, Usage, acompletion, completion, token_counter
+from litellm.types.utils import (
+    Choices,
+    Delta,
+    Message,
+    ModelResponseStream,
+    StreamingChoices,
+)
+
+
+class ModelBackend(ABC):
+    """Completion endpoint used by GenerativeModel.
+
+    Backends take the litellm completion arguments and return litellm shaped
+    responses: a ModelResponse, or an iterator of ModelResponseStream chunks
+    when called with stream=True.
+    """
+
+    @abstractmethod
+    def completion(self, **kwargs: Any) -> Any:
+        """Run a completion."""
+
+    @abstractmethod
+    async def acompletion(self, **kwargs: Any) -> Any:
+        """Run a completion asynchronously."""
+
+
+class LiteLLMBackend(ModelBackend):
+    """Default backend, calling the provider through litellm."""
+
+    def completion(self, **kwargs: Any) -> Any:
+        return completion(**kwargs)
+
+    async def acompletion(self, **kwargs: Any) -> Any:
+        return await acompletion(**kwargs)
+
+
+class ReplayedResponse:
+    """One scripted response of a ReplayBackend."""
+
+    def __init__(
+        self,
+        content: str,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        latency: float | None = None,
+    ):
+        self.content = content
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.latency = latency
+
+
+class ReplayBackend(ModelBackend):
+    """Offline backend returning scripted or recorded responses in order.
+
+    Each call sleeps for the simulated latency, then answers with the next
+    response. Token counts not given in the script are estimated with
+    litellm's token_counter, which needs no network.
+    """
+
+    def __init__(
+        self,
+        responses: Sequence[str | ReplayedResponse],
+        latency: float = 0.0,
+        time_to_first_token: float | None = None,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        chunk_size: int = 16,
+        loop: bool = False,
+    ):
+        """Create a replay backend.
+
+        Args:
+            responses (Sequence): Response contents, or ReplayedResponse items
+                with their own token counts and latency.
+            latency (float): Simulated seconds per call, spread over the chunks
+                when streaming.
+            time_to_first_token (float, optional): Part of the latency spent
+                before the first streamed chunk. Defaults to an even spread.
+            prompt_tokens (int, optional): Prompt tokens reported for every call.
+            completion_tokens (int, optional): Completion tokens reported for every call.
+            chunk_size (int): Characters per streamed chunk.
+            loop (bool): Start over once all responses are used, instead of
+                raising IndexError.
+        """
+        self.responses = [
+            item if isinstance(item, ReplayedResponse) else ReplayedResponse(item)
+            for item in responses
+        ]
+        self.latency = latency
+        self.time_to_first_token = time_to_first_token
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.chunk_size = chunk_size
+        self.loop = loop
+        self.calls: list[dict[str, Any]] = []
+        self._position = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_jsonl(cls, path: str, **kwargs: Any) -> "ReplayBackend":
+        """Load the responses recorded by a RecordingBackend."""
+        with open(path, encoding="utf-8") as file:
+            records = [json.loads(line) for line in file if line.strip()]
+        return cls(
+            [
+                ReplayedResponse(
+                    record["content"],
+                    record.get("prompt_tokens"),
+                    record.get("completion_tokens"),
+                    record.get("latency"),
+                )
+                for record in records
+            ],
+            **kwargs,
+        )
+
+    def _next(self, kwargs: dict[str, Any]) -> ReplayedResponse:
+        with self._lock:
+            if self._position >= len(self.responses):
+                if not self.loop or not self.responses:
+                    raise IndexError("No replayed response left")
+                self._position = 0
+            response = self.responses[self._position]
+            self._position += 1
+            self.calls.append(kwargs)
+        return response
+
+    def _usage(self, kwargs: dict[str, Any], response: ReplayedResponse) -> Usage:
+        model = kwargs.get("model", "")
+        prompt_tokens = response.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = self.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = token_counter(model=model, messages=kwargs["messages"])
+        completion_tokens = response.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = self.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = token_counter(model=model, text=response.content)
+        return Usage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+    def _delays(self, response: ReplayedResponse, chunks: int) -> list[float]:
+        """Sleep before each streamed chunk, adding up to the latency."""
+        latency = self.latency if response.latency is None else response.latency
+        if chunks == 0:
+            return []
+        if self.time_to_first_token is None:
+            return [latency / chunks] * chunks
+        first = min(self.time_to_first_token, latency)
+        if chunks == 1:
+            return [latency]
+        return [first] + [(latency - first) / (chunks - 1)] * (chunks - 1)
+
+    def _chunks(self, content: str) -> list[str]:
+        return [
+            content[i : i + self.chunk_size]
+            for i in range(0, len(content), self.chunk_size)
+        ]
+
+    def _model_response(
+        self, kwargs: dict[str, Any], response: ReplayedResponse
+    ) -> ModelResponse:
+        return ModelResponse(
+            model=kwargs.get("model"),
+            choices=[Choices(message=Message(content=response.content))],
+            usage=self._usage(kwargs, response),
+        )
+
+    def _usage_chunk(
+        self, kwargs: dict[str, Any], response: ReplayedResponse
+    ) -> ModelResponseStream:
+        return ModelResponseStream(choices=[], usage=self._usage(kwargs, response))
+
+    @staticmethod
+    def _delta_chunk(text: str) -> ModelResponseStream:
+        return ModelResponseStream(choices=[StreamingChoices(delta=Delta(content=text))])
+
+    def _stream(
+        self, kwargs: dict[str, Any], response: ReplayedResponse
+    ) -> Iterator[ModelResponseStream]:
+        chunks = self._chunks(response.content)
+        for delay, chunk in zip(self._delays(response, len(chunks)), chunks):
+            time.sleep(delay)
+            yield self._delta_chunk(chunk)
+        yield self._usage_chunk(kwargs, response)
+
+    async def _astream(
+        self, kwargs: dict[str, Any], response: ReplayedResponse
+    ) -> AsyncIterator[ModelResponseStream]:
+        chunks = self._chunks(response.content)
+        for delay, chunk in zip(self._delays(response, len(chunks)), chunks):
+            await asyncio.sleep(delay)
+            yield self._delta_chunk(chunk)
+        yield self._usage_chunk(kwargs, response)
+
+    def completion(self, **kwargs: Any) -> Any:
+        response = self._next(kwargs)
+        if kwargs.get("stream"):
+            return self._stream(kwargs, response)
+        time.sleep(self.latency if response.latency is None else response.latency)
+        return self._model_response(kwargs, response)
+
+    async def acompletion(self, **kwargs: Any) -> Any:
+        response = self._next(kwargs)
+        if kwargs.get("stream"):
+            return self._astream(kwargs, response)
+        await asyncio.sleep(
+            self.latency if response.latency is None else response.latency
+        )
+        return self._model_response(kwargs, response)
+
+
+class RecordingBackend(ModelBackend):
+    """Backend recording the responses of another backend for later replay.
+
+    Each non-streamed completion is appended to a JSON lines file readable
+    by ReplayBackend.from_jsonl.
+    """
+
+    def __init__(self, path: str, backend: ModelBackend | None = None):
+        self.path = path
+        self.backend = backend or LiteLLMBackend()
+        self._lock = threading.Lock()
+
+    def _record(self, response: Any, latency: float) -> Any:
+        record = {
+            "content": response.choices[0].message.content,
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "latency": latency,
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+        return response
+
+    def completion(self, **kwargs: Any) -> Any:
+        if kwargs.get("stream"):
+            return self.backend.completion(**kwargs)
+        start_time = time.time()
+        response = self.backend.completion(**kwargs)
+        return self._record(response, time.time() - start_time)
+
+    async def acompletion(self, **kwargs: Any) -> Any:
+        if kwargs.get("stream"):
+            return await self.backend.acompletion(**kwargs)
+        start_time = time.time()
+        response = await self.backend.acompletion(**kwargs)
+        return self._record(response, time.time() - start_time)
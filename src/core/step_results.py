@@ -0,0 +1,40 @@
+from collections.abc import Iterator, MutableMapping
+
+from utility.blob_store import BlobHandle, BlobStore
+
+
+class StepResults(MutableMapping[str, str]):
+    """Step results of a session, stored once in a BlobStore.
+
+    Only handles are kept here; values are read from the store when looked up.
+    """
+
+    def __init__(self, store: BlobStore):
+        self.store = store
+        self._handles: dict[str, BlobHandle] = {}
+
+    def handle(self, step_name: str) -> BlobHandle:
+        """Return the handle of a step result."""
+        return self._handles[step_name]
+
+    def __getitem__(self, step_name: str) -> str:
+        return self.store.get(self._handles[step_name])
+
+    def __setitem__(self, step_name: str, result: str) -> None:
+        self._handles[step_name] = self.store.put(result)
+
+    def __delitem__(self, step_name: str) -> None:
+        del self._handles[step_name]
+
+    def __contains__(self, step_name: object) -> bool:
+        return step_name in self._handles
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._handles)
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def __repr__(self) -> str:
+        handles = {name: str(handle) for name, handle in self._handles.items()}
+        return f"StepResults({handles})"
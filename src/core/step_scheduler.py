@@ -0,0 +1,67 @@
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+from models.response import Action
+
+
+class StepScheduler:
+    """Schedule the tool calls of a plan as waves of independent calls.
+
+    A call is ready once none of its dependencies is still pending in the
+    batch. Each wave holds every ready call; calls of a wave run concurrently
+    in a thread pool, and a wave starts when the previous one is complete.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="agent-step"
+            )
+        return self._executor
+
+    def waves(
+        self, actions: list[Action], dependencies: dict[str, set[str]]
+    ) -> Iterator[list[Action]]:
+        """Yield the actions wave by wave.
+
+        Args:
+            actions (list[Action]): The actions of the batch, keyed by step_name.
+            dependencies (dict[str, set[str]]): Step names each action depends on.
+
+        Yields:
+            list[Action]: Actions whose dependencies are outside the pending batch.
+                Actions caught in a dependency cycle are never yielded.
+        """
+        pending = {action.step_name: action for action in actions}
+        while pending:
+            wave = [
+                action
+                for name, action in pending.items()
+                if not (dependencies.get(name, set()) & (pending.keys() - {name}))
+            ]
+            if not wave:
+                return
+            yield wave
+            for action in wave:
+                pending.pop(action.step_name, None)
+
+    def run_concurrently(self, calls: list[Callable[[], Any]]) -> list[Any]:
+        """Run calls in the thread pool and return their results in order."""
+        if len(calls) <= 1 or self.max_workers <= 1:
+            return [call() for call in calls]
+
+        futures = [self.submit(call) for call in calls]
+        return [future.result() for future in futures]
+
+    def submit(self, call: Callable[[], Any]) -> Future:
+        """Start a call in the thread pool ahead of its wave.
+
+        The call runs in a copy of the caller's context, so that context
+        variables such as the current tracing span follow it.
+        """
+        return self._get_executor().submit(contextvars.copy_context().run, call)
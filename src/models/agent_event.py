@@ -0,0 +1,17 @@
+import time
+from typing import Any, Dict
+
+from pydantic import BaseModel, Field
+
+
+class AgentEvent(BaseModel):
+    """Structured event emitted by the agent during execution."""
+
+    type: str = Field(..., description="The kind of event, e.g. tool_started.")
+    iteration: int = Field(..., description="The iteration the event belongs to.")
+    timestamp: float = Field(
+        default_factory=time.time, description="Unix time when the event was emitted."
+    )
+    data: Dict[str, Any] = Field(
+        default_factory=dict, description="Event payload, as key-value pairs."
+    )
@@ -74,8 +74,16 @@ class Response(BaseModel):
 
     thought: Optional[Thought] = None
     action: Optional[Action] = None
+    actions: List[Action] = Field(
+        default_factory=list,
+        description="Additional actions to run in the same turn as the action.",
+    )
     final_answer: Optional[str] = None
 
+    def get_actions(self) -> List[Action]:
+        """Return every action of the turn, the single action first."""
+        return ([self.action] if self.action is not None else []) + self.actions
+
     @validator("*", pre=True)
     def validate_response(cls, v, values):
         if (
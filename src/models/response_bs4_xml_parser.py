@@ -44,11 +44,16 @@ class ResponseBs4XmlParser:
                 for step_name in depends_elem.find_all("step_name")
             ]
 
+        tool_name_elem = step_elem.find("tool_name")
+        tool_name = tool_name_elem.get_text().strip() if tool_name_elem else None
+
         return Step(
             name=name,
             description=description,
             reason=reason,
             result=result,
+            tool_name=tool_name or None,
+            arguments=ResponseBs4XmlParser._parse_arguments(step_elem),
             depends_on_steps=depends_on_steps,
         )
 
@@ -70,6 +75,16 @@ class ResponseBs4XmlParser:
 
         return arguments
 
+    @staticmethod
+    def _parse_action(action_elem) -> Action:
+        """Parse a single action element into an Action object."""
+        return Action(
+            step_name=action_elem.find("step_name").get_text().strip(),
+            tool_name=action_elem.find("tool_name").get_text().strip(),
+            reason=ResponseBs4XmlParser._get_text_or_cdata(action_elem.find("reason")),
+            arguments=ResponseBs4XmlParser._parse_arguments(action_elem),
+        )
+
     @staticmethod
     def parse(xml_data: str) -> Response:
         """Parse XML string to create a Response object.
@@ -122,9 +137,10 @@ class ResponseBs4XmlParser:
                     ),
                 )
 
-            # Otherwise parse the full format with action
-            action_elem = response_elem.find("action")
-            if not action_elem:
+            # Otherwise parse the full format with action or actions
+            actions_elem = response_elem.find("actions", recursive=False)
+            action_elem = response_elem.find("action", recursive=False)
+            if not action_elem and not actions_elem:
                 raise ValueError("Missing action element")
 
             # Parse to_do and done steps
@@ -145,14 +161,17 @@ class ResponseBs4XmlParser:
                     for step in done_container.find_all("step")
                 ]
 
-            # Create action object
-            action = Action(
-                step_name=action_elem.find("step_name").get_text().strip(),
-                tool_name=action_elem.find("tool_name").get_text().strip(),
-                reason=ResponseBs4XmlParser._get_text_or_cdata(
-                    action_elem.find("reason")
-                ),
-                arguments=ResponseBs4XmlParser._parse_arguments(action_elem),
+            # Create action objects
+            action = (
+                ResponseBs4XmlParser._parse_action(action_elem) if action_elem else None
+            )
+            actions = (
+                [
+                    ResponseBs4XmlParser._parse_action(elem)
+                    for elem in actions_elem.find_all("action", recursive=False)
+                ]
+                if actions_elem
+                else []
             )
 
             return Response(
@@ -164,6 +183,7 @@ class ResponseBs4XmlParser:
                     done=done_steps,
                 ),
                 action=action,
+                actions=actions,
             )
 
         except Exception as e:
@@ -1,3 +1,8 @@
+from contextlib import nullcontext
+from typing import Any, Optional
+
+from utility.tracing import get_tracer
+
 from .response import Response
 from .response_bs4_xml_parser import ResponseBs4XmlParser
 from .response_xml_parser import ResponseXmlParser
@@ -7,11 +12,13 @@ class ResponseParser:
     """Parser that tries to parse using ResponseXmlParser, then falls back to ResponseBs4XmlParser."""
 
     @staticmethod
-    def parse(xml_data: str) -> Response:
+    def parse(xml_data: str, span: Optional[Any] = None) -> Response:
         """Parse XML string to create a Response object using available parsers.
 
         Args:
             xml_data (str): XML string representation of the Response.
+            span (Span, optional): Open response.parse span of the caller. The
+                parse is recorded in it rather than in a new span.
 
         Returns:
             Response: A Pydantic Response object.
@@ -19,17 +26,24 @@ class ResponseParser:
         Raises:
             ValueError: If parsing fails with both parsers.
         """
-        try:
-            # Try parsing with ResponseXmlParser
-            return ResponseXmlParser.parse(xml_data)
-        except ValueError:
+        parse_span = (
+            nullcontext(span)
+            if span is not None
+            else get_tracer().span("response.parse", xml_chars=len(xml_data))
+        )
+        with parse_span as span:
             try:
-                # Fallback to ResponseBs4XmlParser
-                return ResponseBs4XmlParser.parse(xml_data)
-            except ValueError as e:
-                raise ValueError(
-                    "Failed to parse XML data with available parsers."
-                ) from e
+                # Try parsing with ResponseXmlParser
+                return ResponseXmlParser.parse(xml_data)
+            except ValueError:
+                span.set_attribute("fallback", True)
+                try:
+                    # Fallback to ResponseBs4XmlParser
+                    return ResponseBs4XmlParser.parse(xml_data)
+                except ValueError as e:
+                    raise ValueError(
+                        "Failed to parse XML data with available parsers."
+                    ) from e
 
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+import re
+from typing import Callable, List, Optional
+
+from lxml import etree
+
+from .response import Action, Response, Step
+from .response_xml_parser import ResponseXmlParser
+
+CDATA_OPEN = "<![CDATA["
+CDATA_CLOSE = "]]>"
+RESPONSE_OPEN = "<response"
+
+_ENTITY = re.compile(r"&(#[0-9]+|#x[0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);")
+_TAG_START = re.compile(r"<[a-zA-Z_/!?]")
+_TAG_NAME = re.compile(r"</?([a-zA-Z_][\w.-]*)")
+
+
+class _XmlRepairFilter:
+    """Streaming filter repairing the XML mistakes models commonly make.
+
+    - malformed CDATA openers such as `<![CDATA]>` are dropped,
+    - a CDATA section left open is closed before the end tag of its element,
+    - stray `<` and `&` in text are escaped.
+
+    Text is held back only while a construct is incomplete, so the output
+    lags the input by at most one tag or CDATA section. Text after the end
+    tag of the root element is dropped, end tags inside CDATA are content.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._in_cdata = False
+        self._open_tags: List[str] = []
+        self.root_closed = False
+
+    def feed(self, chunk: str, final: bool = False) -> str:
+        """Add text and return the repaired text that is safe to emit."""
+        if self.root_closed:
+            return ""
+        self._pending += chunk
+        output: List[str] = []
+        while self._pending and not self.root_closed:
+            consumed = (
+                self._consume_cdata(output, final)
+                if self._in_cdata
+                else self._consume_text(output, final)
+            )
+            if not consumed:
+                break
+        if self.root_closed:
+            self._pending = ""
+        return "".join(output)
+
+    def _consume_cdata(self, output: List[str], final: bool) -> bool:
+        end = self._pending.find(CDATA_CLOSE)
+        element_end = (
+            self._pending.find(f"</{self._open_tags[-1]}>") if self._open_tags else -1
+        )
+        if element_end >= 0 and (end < 0 or element_end < end):
+            # Unterminated CDATA: close it before the end tag of its element
+            output.append(self._pending[:element_end].rstrip("]") + CDATA_CLOSE)
+            self._pending = self._pending[element_end:]
+        elif end >= 0:
+            output.append(self._pending[: end + len(CDATA_CLOSE)])
+            self._pending = self._pending[end + len(CDATA_CLOSE) :]
+        elif final:
+            output.append(self._pending + CDATA_CLOSE)
+            self._pending = ""
+        else:
+            return False
+        self._in_cdata = False
+        return True
+
+    def _consume_text(self, output: List[str], final: bool) -> bool:
+        pending = self._pending
+        special = min(
+            (index for index in (pending.find("<"), pending.find("&")) if index >= 0),
+            default=-1,
+        )
+        if special < 0:
+            output.append(pending)
+            self._pending = ""
+            return True
+        if special > 0:
+            output.append(pending[:special])
+            self._pending = pending[special:]
+            return True
+
+        if pending.startswith("&"):
+            entity = _ENTITY.match(pending)
+            if entity:
+                output.append(entity.group(0))
+                self._pending = pending[entity.end() :]
+            elif len(pending) < 12 and ";" not in pending and not final:
+                return False
+            else:
+                output.append("&amp;")
+                self._pending = pending[1:]
+            return True
+
+        if pending.startswith(CDATA_OPEN):
+            output.append(CDATA_OPEN)
+            self._pending = pending[len(CDATA_OPEN) :]
+            self._in_cdata = True
+            return True
+        if pending.startswith("<![CDATA"):
+            # Malformed opener such as <![CDATA]> or <![CDATA>
+            closing = pending.find(">")
+            if closing < 0:
+                if final:
+                    self._pending = ""
+                return final
+            self._pending = pending[closing + 1 :]
+            return True
+        if CDATA_OPEN.startswith(pending) and not final:
+            return False
+
+        if len(pending) < 2 and not final:
+            return False
+        if not _TAG_START.match(pending):
+            output.append("&lt;")
+            self._pending = pending[1:]
+            return True
+
+        closing = pending.find(">")
+        if closing < 0:
+            if final:
+                output.append(pending)
+                self._pending = ""
+            return final
+        tag = pending[: closing + 1]
+        self._track_tag(tag)
+        output.append(tag)
+        self._pending = pending[closing + 1 :]
+        return True
+
+    def _track_tag(self, tag: str) -> None:
+        name = _TAG_NAME.match(tag)
+        if not name or tag.startswith(("<!", "<?")) or tag.endswith("/>"):
+            return
+        if tag.startswith("</"):
+            if name.group(1) in self._open_tags:
+                while self._open_tags.pop() != name.group(1):
+                    pass
+                self.root_closed = not self._open_tags
+        else:
+            self._open_tags.append(name.group(1))
+
+
+class ResponseStreamParser:
+    """Incremental, pull-based parser building a Response while tokens stream in.
+
+    Text before `<response>` (such as a code fence) is skipped. Each action is
+    reported through `on_action` as soon as its `</action>` end tag is parsed,
+    so that the tool call can start before the end of the generation. Actions
+    completed after a `<final_answer>` are not reported.
+    """
+
+    def __init__(self, on_action: Optional[Callable[[Action], None]] = None):
+        self.on_action = on_action
+        self.actions: List[Action] = []
+        self.to_do: List[Step] = []
+        self.closed = False
+        self.final_answer_seen = False
+        self._started = False
+        self._buffer = ""
+        self._repair = _XmlRepairFilter()
+        self._parser = etree.XMLPullParser(events=("end",), recover=True)
+
+    def feed(self, chunk: str) -> List[Action]:
+        """Feed generated text. Returns the actions completed by this chunk."""
+        if self.closed:
+            return []
+
+        if not self._started:
+            self._buffer += chunk
+            start = self._buffer.find(RESPONSE_OPEN)
+            if start < 0:
+                # Keep a tail long enough to hold a split <response tag
+                self._buffer = self._buffer[-len(RESPONSE_OPEN) :]
+                return []
+            self._started = True
+            chunk = self._buffer[start:]
+            self._buffer = ""
+
+        # The repair filter stops at the end tag of <response>, outside CDATA
+        self._parser.feed(self._repair.feed(chunk))
+        return self._read_events()
+
+    def _read_events(self) -> List[Action]:
+        completed = []
+        for _event, element in self._parser.read_events():
+            parent = element.getparent()
+            if element.tag == "action" and parent is not None and parent.tag in (
+                "response",
+                "actions",
+            ):
+                action = Action(**ResponseXmlParser._parse_action(element))
+                self.actions.append(action)
+                completed.append(action)
+                if self.on_action is not None and not self.final_answer_seen:
+                    self.on_action(action)
+            elif element.tag == "final_answer" and parent is not None:
+                self.final_answer_seen = True
+            elif element.tag == "thought" and parent is not None:
+                self.to_do = [
+                    Step(**step)
+                    for step in ResponseXmlParser._parse_steps(element, "to_do")
+                ]
+            elif element.tag == "response" and parent is None:
+                self.closed = True
+        return completed
+
+    def close(self) -> Response:
+        """Finish parsing and return the Response.
+
+        Raises:
+            ValueError: If no response element was found in the stream.
+        """
+        if not self._started:
+            raise ValueError("No response element found in the stream.")
+        if not self.closed:
+            self._parser.feed(self._repair.feed("", final=True))
+            self._read_events()
+        try:
+            root = self._parser.close()
+        except etree.XMLSyntaxError as e:
+            raise ValueError("Malformed XML data.") from e
+        if root is None:
+            raise ValueError("No response element found in the stream.")
+        return ResponseXmlParser.parse_element(root)
+
+    @staticmethod
+    def parse(text: str) -> Response:
+        """Parse a complete text in one call."""
+        parser = ResponseStreamParser()
+        parser.feed(text)
+        return parser.close()
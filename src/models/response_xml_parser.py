@@ -46,6 +46,9 @@ class ResponseXmlParser:
                     ),
                     "reason": ResponseXmlParser._safe_find_text(step, "reason", ""),
                     "result": ResponseXmlParser._safe_find_text(step, "result"),
+                    "tool_name": ResponseXmlParser._safe_find_text(step, "tool_name")
+                    or None,
+                    "arguments": ResponseXmlParser._parse_arguments(step),
                     "depends_on_steps": depends_on,
                 }
                 steps.append(step_data)
@@ -68,17 +71,37 @@ class ResponseXmlParser:
                 arguments[arg.tag] = arg.text
         return arguments
 
+    @staticmethod
+    def _parse_action(action_elem: etree._Element) -> dict:
+        """Parse a single action element."""
+        return {
+            "step_name": ResponseXmlParser._safe_find_text(action_elem, "step_name"),
+            "tool_name": ResponseXmlParser._safe_find_text(
+                action_elem, "tool_name", "no_tool"
+            ),
+            "reason": ResponseXmlParser._safe_find_text(action_elem, "reason"),
+            "arguments": ResponseXmlParser._parse_arguments(action_elem),
+        }
+
     @staticmethod
     def parse(xml_data: str) -> Response:
         """Parse XML string to create a Response object."""
         try:
-            root = etree.fromstring(xml_data)
+            return ResponseXmlParser.parse_element(etree.fromstring(xml_data))
+        except etree.XMLSyntaxError as e:
+            raise ValueError("Malformed XML data.") from e
 
+    @staticmethod
+    def parse_element(root: etree._Element) -> Response:
+        """Create a Response object from a parsed response element."""
+        try:
             # Check which format we're dealing with
             if root.find("final_answer") is not None:
                 # Format 2 - Simple response with thought and final answer
                 response_data = {
-                    "thought": ResponseXmlParser._safe_find_text(root, "thought"),
+                    "thought": {
+                        "reasoning": ResponseXmlParser._safe_find_text(root, "thought")
+                    },
                     "final_answer": ResponseXmlParser._safe_find_text(
                         root, "final_answer"
                     ),
@@ -87,6 +110,7 @@ class ResponseXmlParser:
                 # Format 1 - Complex response with thought object and action
                 thought_elem = root.find("thought")
                 action_elem = root.find("action")
+                actions_elem = root.find("actions")
 
                 response_data = {
                     "thought": {
@@ -96,24 +120,19 @@ class ResponseXmlParser:
                         "to_do": ResponseXmlParser._parse_steps(thought_elem, "to_do"),
                         "done": ResponseXmlParser._parse_steps(thought_elem, "done"),
                     },
-                    "action": {
-                        "step_name": ResponseXmlParser._safe_find_text(
-                            action_elem, "step_name"
-                        ),
-                        "tool_name": ResponseXmlParser._safe_find_text(
-                            action_elem, "tool_name", "no_tool"
-                        ),
-                        "reason": ResponseXmlParser._safe_find_text(
-                            action_elem, "reason"
-                        ),
-                        "arguments": ResponseXmlParser._parse_arguments(action_elem),
-                    },
                 }
+                if action_elem is not None or actions_elem is None:
+                    response_data["action"] = ResponseXmlParser._parse_action(
+                        action_elem
+                    )
+                if actions_elem is not None:
+                    response_data["actions"] = [
+                        ResponseXmlParser._parse_action(elem)
+                        for elem in actions_elem.findall("action")
+                    ]
 
             return Response(**response_data)
 
-        except etree.XMLSyntaxError as e:
-            raise ValueError("Malformed XML data.") from e
         except ValidationError as e:
             raise ValueError("Validation error while creating Response object.") from e
         except Exception as e:
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -20,6 +22,11 @@ class ResponseStats(BaseModel):
         title="Total Tokens",
         description="Total number of tokens used (input + output).",
     )
+    cached_prompt_tokens: int = Field(
+        0,
+        title="Cached Prompt Tokens",
+        description="Number of prompt tokens read from the provider prompt cache.",
+    )
     tokens_per_second: float = Field(
         title="Tokens Per Second",
         description="The rate of tokens generated per second.",
@@ -28,3 +35,18 @@ class ResponseStats(BaseModel):
         title="Execution Time",
         description="Time taken to generate the response in seconds.",
     )
+    time_to_first_token: Optional[float] = Field(
+        None,
+        title="Time To First Token",
+        description="Seconds until the first streamed token, when streaming.",
+    )
+    time_to_close_tag: Optional[float] = Field(
+        None,
+        title="Time To Close Tag",
+        description="Seconds until the XML response was closed, when streaming.",
+    )
+    cached: bool = Field(
+        False,
+        title="Cached",
+        description="Whether the response was served from the response cache.",
+    )
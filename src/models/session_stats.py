@@ -0,0 +1,74 @@
+import threading
+from typing import List
+
+from models.responsestats import ResponseStats
+from pydantic import BaseModel, Field, PrivateAttr, computed_field
+
+
+class SessionStats(BaseModel):
+    """Token and latency statistics of one agent execution."""
+
+    llm_calls: int = Field(0, description="Number of model calls.")
+    cached_responses: int = Field(
+        0, description="Model calls answered from the response cache."
+    )
+    prompt_tokens: int = Field(0, description="Prompt tokens over all model calls.")
+    completion_tokens: int = Field(
+        0, description="Completion tokens over all model calls."
+    )
+    cached_prompt_tokens: int = Field(
+        0, description="Prompt tokens read from the provider prompt cache."
+    )
+    model_time: float = Field(0.0, description="Seconds spent waiting for the model.")
+    tool_calls: int = Field(0, description="Number of tool calls.")
+    tool_time: float = Field(
+        0.0,
+        description="Seconds spent in tools, summed over calls that may run concurrently.",
+    )
+    total_time: float = Field(0.0, description="Wall time of the execution in seconds.")
+    prompt_tokens_per_iteration: List[int] = Field(
+        default_factory=list, description="Prompt tokens of each model call, in order."
+    )
+    prompt_chars_per_iteration: List[int] = Field(
+        default_factory=list, description="Prompt characters of each model call, in order."
+    )
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @computed_field
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @computed_field
+    @property
+    def tokens_per_second(self) -> float:
+        """Completion tokens generated per second of model time."""
+        return self.completion_tokens / self.model_time if self.model_time > 0 else 0.0
+
+    @computed_field
+    @property
+    def prompt_growth(self) -> float:
+        """Ratio of the last prompt size to the first one, in tokens."""
+        sizes = self.prompt_tokens_per_iteration
+        return sizes[-1] / sizes[0] if sizes and sizes[0] > 0 else 0.0
+
+    def record_response(
+        self, stats: ResponseStats, prompt_chars: int, elapsed: float
+    ) -> None:
+        """Add the statistics of one model call, which took elapsed seconds."""
+        with self._lock:
+            self.llm_calls += 1
+            self.cached_responses += int(stats.cached)
+            self.prompt_tokens += stats.prompt_tokens
+            self.completion_tokens += stats.completion_tokens
+            self.cached_prompt_tokens += stats.cached_prompt_tokens
+            self.model_time += elapsed
+            self.prompt_tokens_per_iteration.append(stats.prompt_tokens)
+            self.prompt_chars_per_iteration.append(prompt_chars)
+
+    def record_tool(self, elapsed: float) -> None:
+        """Add the duration of one tool call."""
+        with self._lock:
+            self.tool_calls += 1
+            self.tool_time += elapsed
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 
@@ -35,6 +36,10 @@ class Tool(BaseModel):
         False, description="Indicates if the tool needs the parent context.",
         exclude=True
     )
+    need_user_input: bool = Field(
+        False, description="Indicates if the tool reads input from the user.",
+        exclude=True
+    )
 
     @field_validator("arguments", mode="before")  # V2 style validator
     @classmethod
@@ -51,6 +56,14 @@ class Tool(BaseModel):
         """Execute the tool with provided arguments."""
         raise NotImplementedError("This method should be implemented by subclasses.")
 
+    async def aexecute(self, **kwargs) -> str:
+        """Execute the tool asynchronously with provided arguments.
+
+        Tools doing native async I/O override this method. By default the
+        synchronous execute() is run in a worker thread.
+        """
+        return await asyncio.to_thread(self.execute, **kwargs)
+
     def to_json(self) -> str:
         """Convert the tool to a JSON string representation."""
         return self.model_dump_json()
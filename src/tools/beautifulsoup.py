@@ -1,15 +1,28 @@
+import json
 import logging
+import os
 import random
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Dict, List, Optional, Union
 
 import requests
-from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4 import BeautifulSoup, Comment, NavigableString, SoupStrainer, Tag
 from models.tool import Tool, ToolArgument
 from pydantic import Field, PrivateAttr
-from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, HTTPError, RequestException
-from urllib3.util.retry import Retry
+from tools import lxml_extractor, main_content
+from tools.http_client import get_session
+from tools.lxml_extractor import FAST_PARSER
+from tools.main_content import MAIN_CONTENT
+from tools.page_cache import (
+    PageCache,
+    PageTooLargeError,
+    UnexpectedContentTypeError,
+    WebPage,
+)
+from tools.rate_limiter import HostRateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +36,22 @@ USER_AGENTS = [
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.96 Safari/537.36",
 ]
 
+# Pages downloaded at the same time by a batch of urls
+DEFAULT_MAX_WORKERS = 8
+# Pages downloaded at the same time from a single host
+DEFAULT_MAX_PER_HOST = 2
+# Pages parsed at the same time
+DEFAULT_EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+# Seconds a whole batch of urls may take
+DEFAULT_TOTAL_TIMEOUT = 60
+# Largest page downloaded, in bytes
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+# Content type of the pages read, others are rejected before their download
+HTML_CONTENT_TYPE = "text/html"
+
+# Elements parsed for the extract types that need only some of the page
+STRAINED_TAGS = {"links": "a", "images": "img"}
+
 
 class BeautifulSoupAPIError(Exception):
     """Custom exception for BeautifulSoup API errors."""
@@ -32,6 +61,15 @@ class BeautifulSoupAPIError(Exception):
 
 class BeautifulSoupTool(Tool):
     _session: requests.Session = PrivateAttr()
+    _page_cache: Optional[PageCache] = PrivateAttr(default=None)
+    _max_workers: int = PrivateAttr(default=DEFAULT_MAX_WORKERS)
+    _max_per_host: int = PrivateAttr(default=DEFAULT_MAX_PER_HOST)
+    _extract_workers: int = PrivateAttr(default=DEFAULT_EXTRACT_WORKERS)
+    _max_bytes: Optional[int] = PrivateAttr(default=DEFAULT_MAX_BYTES)
+    _fetch_executor: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+    _extract_executor: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+    _host_slots: Dict[str, threading.Semaphore] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     name: str = Field(
         "BeautifulSoupTool",
@@ -47,46 +85,127 @@ class BeautifulSoupTool(Tool):
             type="string",
             description="The URL of the web page to read",
         ),
+        ToolArgument(
+            name="urls",
+            type="string",
+            description=(
+                "Several URLs to read concurrently instead of url, as a JSON list or "
+                "one per line. Returns a JSON object with the content of each URL "
+                "under 'results' and the failures under 'errors'"
+            ),
+            required=False,
+        ),
         ToolArgument(
             name="parser",
             type="string",
-            description="The parser to use with BeautifulSoup (e.g., 'html.parser', 'lxml')",
+            description=(
+                "The parser to use with BeautifulSoup (e.g., 'html.parser', 'lxml'), "
+                f"or '{FAST_PARSER}' for faster extraction of large pages without BeautifulSoup"
+            ),
             default="html.parser",
             required=False,
         ),
         ToolArgument(
             name="extract_type",
             type="string",
-            description="Type of content to extract (markdown, text, links, images, all), markdown can capture more information.",
+            description=(
+                "Type of content to extract (markdown, main_content, text, links, images, all), "
+                "markdown can capture more information, main_content keeps only the article "
+                "as markdown, without navigation, sidebars and footers"
+            ),
             default="markdown",
             required=True,
         ),
         ToolArgument(
             name="timeout",
             type="int",
-            description="Request timeout in seconds",
+            description="Request timeout in seconds, for each URL",
             default="30",
             required=False,
         ),
+        ToolArgument(
+            name="total_timeout",
+            type="int",
+            description="Timeout in seconds of the whole batch when reading urls",
+            default=str(DEFAULT_TOTAL_TIMEOUT),
+            required=False,
+        ),
     ]
 
-    def __init__(self, **kwargs):
+    def __init__(
+        self,
+        session: requests.Session | None = None,
+        page_cache: PageCache | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        extract_workers: int = DEFAULT_EXTRACT_WORKERS,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+        **kwargs,
+    ):
+        """Create the tool.
+
+        Args:
+            session (requests.Session, optional): Session for the requests.
+                Defaults to the shared pooled session.
+            page_cache (PageCache, optional): Persistent cache of pages and
+                extracted content. Stale pages are revalidated with conditional GETs.
+            max_workers (int): Pages downloaded concurrently when reading urls.
+            max_per_host (int): Pages downloaded concurrently from one host.
+            extract_workers (int): Pages parsed concurrently when reading urls.
+            max_bytes (int, optional): Largest page read, in bytes. Bodies are
+                streamed and larger pages fail without being fully downloaded.
+                None disables the limit.
+        """
         super().__init__(**kwargs)
-        self._session = self._create_session()
-
-    def _create_session(self) -> requests.Session:
-        """Create a session with retry strategy"""
-        session = requests.Session()
-        retry_strategy = Retry(
-            total=5,
-            backoff_factor=1,  # Exponential backoff factor
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"],
+        self._session = session or get_session()
+        self._page_cache = page_cache
+        self._max_workers = max_workers
+        self._max_per_host = max_per_host
+        self._extract_workers = extract_workers
+        self._max_bytes = max_bytes
+
+    def _get_executors(self) -> tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        """Return the download and extraction pools, created on first use."""
+        with self._lock:
+            if self._fetch_executor is None:
+                self._fetch_executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="soup-fetch"
+                )
+                self._extract_executor = ThreadPoolExecutor(
+                    max_workers=self._extract_workers, thread_name_prefix="soup-extract"
+                )
+            return self._fetch_executor, self._extract_executor
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        """Return the semaphore bounding concurrent downloads from the host of url."""
+        host = HostRateLimiter.host(url)
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self._max_per_host)
+            return self._host_slots[host]
+
+    def _fetch_page(self, url: str, timeout: int) -> WebPage:
+        """Download a page, or get it from the page cache when one is set."""
+        headers = self._get_headers()
+        if self._page_cache is not None:
+            return self._page_cache.fetch(
+                self._session, url, headers, timeout, self._max_bytes, HTML_CONTENT_TYPE
+            )
+
+        response = self._session.get(
+            url,
+            headers=headers,
+            timeout=timeout,
+            verify=True,  # SSL verification
+            stream=True,
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
+        try:
+            response.raise_for_status()
+            return WebPage.from_response(
+                url, response, self._max_bytes, HTML_CONTENT_TYPE
+            )
+        finally:
+            response.close()
 
     def _get_headers(self) -> Dict[str, str]:
         """Generate random headers for the request"""
@@ -115,6 +234,8 @@ class BeautifulSoupTool(Tool):
         self, element: Union[Tag, NavigableString], level: int = 0
     ) -> str:
         """Convert HTML to Markdown format"""
+        if isinstance(element, Comment):
+            return ""
         if isinstance(element, NavigableString):
             return str(element).strip()
 
@@ -213,60 +334,198 @@ class BeautifulSoupTool(Tool):
 
         return "Error: Invalid extract_type specified"
 
+    @staticmethod
+    def _parse(html: str, parser: str, extract_type: str) -> BeautifulSoup:
+        """Parse a page, keeping only the elements extract_type needs"""
+        tag = STRAINED_TAGS.get(extract_type)
+        if tag is None:
+            return BeautifulSoup(html, parser)
+        return BeautifulSoup(html, parser, parse_only=SoupStrainer(tag))
+
+    def _extract_main_content(self, page: WebPage) -> str:
+        """Extract the main article of a page as markdown, with lxml whatever the parser"""
+        extracted = main_content.extract(page.body)
+        logger.info(
+            f"Main content of {page.url}: {extracted.main_chars} of "
+            f"{extracted.page_chars} characters ({extracted.reduction:.1f}x smaller)"
+        )
+        return extracted.markdown
+
+    def _extract_fast(self, html: str, extract_type: str) -> Union[str, Dict]:
+        """Extract content with the lxml extractor instead of BeautifulSoup"""
+        try:
+            return lxml_extractor.extract(html, extract_type)
+        except Exception as e:
+            if extract_type != "markdown":
+                raise
+            logger.warning(
+                f"Failed to convert to markdown: {e}. Falling back to text extraction."
+            )
+            return lxml_extractor.extract(html, "text")
+
+    def _read_page(self, url: str, timeout: int) -> WebPage:
+        """Download an HTML page.
+
+        Raises:
+            requests.RequestException: If the request fails.
+            BeautifulSoupAPIError: If the page is not HTML.
+        """
+        try:
+            # The content type is checked before the body is downloaded
+            return self._fetch_page(url, timeout)
+        except UnexpectedContentTypeError as e:
+            logger.warning(str(e))
+            raise BeautifulSoupAPIError(str(e)) from e
+
+    def _extract_page(self, page: WebPage, parser: str, extract_type: str) -> str:
+        """Extract content from a page, through the page cache when one is set."""
+        if self._page_cache is not None:
+            cached = self._page_cache.get_extract(page, parser, extract_type)
+            if cached is not None:
+                logger.info(f"Read web page from cache: {page.url}")
+                return cached
+
+        if extract_type == MAIN_CONTENT:
+            content = self._extract_main_content(page)
+        elif parser == FAST_PARSER:
+            content = self._extract_fast(page.body, extract_type)
+        else:
+            soup = self._parse(page.body, parser, extract_type)
+            content = self._extract_content(soup, extract_type)
+
+        logger.info(f"Successfully read web page: {page.url}")
+
+        if isinstance(content, dict):
+            content = str(content)
+        if self._page_cache is not None:
+            self._page_cache.put_extract(page, parser, extract_type, content)
+        return content
+
+    @staticmethod
+    def _error_message(url: str, error: Exception) -> str:
+        """Log an error raised while reading url and return its message."""
+        if isinstance(error, BeautifulSoupAPIError):
+            return f"Error: {error}"
+        if isinstance(error, PageTooLargeError):
+            logger.warning(f"Page too large at '{url}': {error}")
+            return f"Error: {error}"
+        if isinstance(error, (HTTPError, ConnectionError)):
+            logger.error(f"Network error when accessing '{url}': {error}")
+            return f"Error: Network error when accessing '{url}': {error}"
+        if isinstance(error, RequestException):
+            logger.error(f"Request error for URL '{url}': {error}")
+            return f"Error: Request error for URL '{url}': {error}"
+        logger.error(f"Unexpected error for URL '{url}': {error}")
+        return f"Error: An unexpected error occurred: {error}"
+
+    @staticmethod
+    def _parse_urls(urls: str) -> List[str]:
+        """Split the urls argument, given as a JSON list or one URL per line."""
+        urls = urls.strip()
+        if urls.startswith("["):
+            parsed = [str(url).strip() for url in json.loads(urls)]
+        else:
+            parsed = [url.strip() for url in urls.splitlines()]
+        return list(dict.fromkeys(url for url in parsed if url))
+
+    def _download(self, url: str, timeout: int) -> WebPage:
+        with self._host_slot(url):
+            return self._read_page(url, timeout)
+
+    def execute_many(
+        self,
+        urls: List[str],
+        parser: str = "html.parser",
+        extract_type: str = "markdown",
+        timeout: int = 30,
+        total_timeout: float = DEFAULT_TOTAL_TIMEOUT,
+    ) -> Dict[str, Dict[str, str]]:
+        """Read several web pages concurrently.
+
+        Pages are downloaded by a bounded pool, with at most max_per_host
+        downloads per host, and each downloaded page is parsed in the
+        extraction pool while the others are still downloading.
+
+        Args:
+            urls (List[str]): The URLs to read.
+            parser (str): The parser to use.
+            extract_type (str): Type of content to extract.
+            timeout (int): Request timeout of each URL, in seconds.
+            total_timeout (float): Seconds after which URLs still pending fail.
+
+        Returns:
+            Dict[str, Dict[str, str]]: Content of each URL read under "results",
+                error message of each URL that failed under "errors".
+        """
+        fetch_executor, extract_executor = self._get_executors()
+        deadline = time.monotonic() + total_timeout
+        results: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+
+        pending: Dict[Future, tuple[str, str]] = {
+            fetch_executor.submit(self._download, url, timeout): ("fetch", url)
+            for url in urls
+        }
+        while pending:
+            done, _ = wait(
+                pending,
+                timeout=max(deadline - time.monotonic(), 0),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for future in done:
+                stage, url = pending.pop(future)
+                try:
+                    if stage == "fetch":
+                        page = future.result()
+                        extraction = extract_executor.submit(
+                            self._extract_page, page, parser, extract_type
+                        )
+                        pending[extraction] = ("extract", url)
+                    else:
+                        results[url] = future.result()
+                except Exception as e:
+                    errors[url] = self._error_message(url, e)
+
+        for future, (_, url) in pending.items():
+            future.cancel()
+            logger.error(f"Timed out reading '{url}' after {total_timeout}s")
+            errors[url] = f"Error: Timed out after {total_timeout} seconds"
+        return {"results": results, "errors": errors}
+
     def execute(
         self,
-        url: str,
+        url: str = "",
         parser: str = "html.parser",
         extract_type: str = "markdown",
         timeout: int = 30,
+        urls: str = "",
+        total_timeout: int = DEFAULT_TOTAL_TIMEOUT,
     ) -> str:
         """Execute reading a web page using BeautifulSoup and return the parsed content."""
+        if urls.strip():
+            try:
+                url_list = self._parse_urls(urls)
+                timeout, total_timeout = int(timeout), float(total_timeout)
+            except (ValueError, TypeError) as e:
+                logger.error(f"Invalid urls argument: {e}")
+                return f"Error: Invalid urls argument: {e}"
+            batch = self.execute_many(
+                url_list, parser, extract_type, timeout, total_timeout
+            )
+            return json.dumps(batch, ensure_ascii=False, indent=2)
+
         if not url.strip():
             logger.error("URL cannot be empty or whitespace.")
             return "Error: URL cannot be empty."
 
         try:
-            # Add random delay to avoid rate limiting
-            time.sleep(random.uniform(1, 3))
-
             # Ensure timeout is an integer
             timeout = int(timeout)
 
-            headers = self._get_headers()
-
-            response = self._session.get(
-                url,
-                headers=headers,
-                timeout=timeout,
-                verify=True,  # SSL verification
-            )
-
-            response.raise_for_status()
-
-            # Check content type
-            content_type = response.headers.get("content-type", "").lower()
-            if "text/html" not in content_type:
-                logger.warning(f"Unexpected content type: {content_type}")
-                return f"Error: Unexpected content type: {content_type}"
-
-            # Detect and use correct encoding
-            response.encoding = response.apparent_encoding
-
-            soup = BeautifulSoup(response.text, parser)
-            content = self._extract_content(soup, extract_type)
-
-            logger.info(f"Successfully read web page: {url}")
-
-            if isinstance(content, dict):
-                return str(content)
-            return content
+            page = self._read_page(url, timeout)
+            return self._extract_page(page, parser, extract_type)
 
-        except (HTTPError, ConnectionError) as e:
-            logger.error(f"Network error when accessing '{url}': {e}")
-            return f"Error: Network error when accessing '{url}': {e}"
-        except RequestException as e:
-            logger.error(f"Request error for URL '{url}': {e}")
-            return f"Error: Request error for URL '{url}': {e}"
         except Exception as e:
-            logger.error(f"Unexpected error for URL '{url}': {e}")
-            return f"Error: An unexpected error occurred: {e}"
+            return self._error_message(url, e)
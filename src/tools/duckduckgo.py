@@ -1,7 +1,9 @@
+import json
 import logging
-import time
-from functools import lru_cache
-from typing import List
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 try:
     from duckduckgo_search import DDGS
@@ -12,11 +14,34 @@ except ImportError as err:
     ) from err
 
 from models.tool import Tool, ToolArgument
-from pydantic import Field
+from pydantic import Field, PrivateAttr
+from tools.rate_limiter import get_rate_limiter
+from tools.search_cache import SearchCache, get_search_cache
 
 logger = logging.getLogger(__name__)
 
 
+DUCKDUCKGO_HOST = "duckduckgo.com"
+# Queries of a batch searched at the same time, within the host rate limit
+DEFAULT_MAX_WORKERS = 4
+# Damping constant of reciprocal rank fusion, higher values favor consensus over top ranks
+RRF_K = 60
+
+# DDGS uses its own HTTP client rather than requests, and keeps request pacing
+# state that is not thread safe. Each thread reuses its own instance, so that
+# its connections and cookies are reused while searches run concurrently; the
+# host rate limiter paces the searches of all threads.
+_ddgs_local = threading.local()
+
+
+def get_ddgs() -> DDGS:
+    """Return the DDGS client of the calling thread."""
+    ddgs = getattr(_ddgs_local, "ddgs", None)
+    if ddgs is None:
+        ddgs = _ddgs_local.ddgs = DDGS()
+    return ddgs
+
+
 class DuckDuckGoAPIError(Exception):
     """Custom exception for DuckDuckGo API errors."""
 
@@ -24,6 +49,11 @@ class DuckDuckGoAPIError(Exception):
 
 
 class DuckDuckGoSearchTool(Tool):
+    _search_cache: Optional[SearchCache] = PrivateAttr(default=None)
+    _max_workers: int = PrivateAttr(default=DEFAULT_MAX_WORKERS)
+    _executor: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
     name: str = Field(
         "DuckDuckGoSearchTool",
         description="A DuckDuckGo search tool for finding current URL pages containing information about a query.",
@@ -40,10 +70,19 @@ class DuckDuckGoSearchTool(Tool):
             type="string",
             description="The search term to query on DuckDuckGo",
         ),
+        ToolArgument(
+            name="queries",
+            type="string",
+            description=(
+                "Several related search terms to query together instead of query, "
+                "as a JSON list or one per line. Returns one ranked list without duplicate URLs"
+            ),
+            required=False,
+        ),
         ToolArgument(
             name="max_results",
             type="int",
-            description="Maximum number of total results to fetch",
+            description="Maximum number of total results to fetch, per query",
             default="30",
             required=False,
         ),
@@ -63,12 +102,123 @@ class DuckDuckGoSearchTool(Tool):
         ),
     ]
 
-    @staticmethod
-    @lru_cache(maxsize=128)
-    def cached_search(query: str, max_results: int) -> List[dict]:
+    def __init__(
+        self,
+        search_cache: SearchCache | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        **kwargs,
+    ):
+        """Create the tool.
+
+        Args:
+            search_cache (SearchCache, optional): Cache of search results.
+                Defaults to the cache shared by the processes of the host.
+            max_workers (int): Queries of a batch searched concurrently.
+        """
+        super().__init__(**kwargs)
+        self._search_cache = search_cache
+        self._max_workers = max_workers
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="ddg-search"
+                )
+            return self._executor
+
+    @property
+    def search_cache(self) -> SearchCache:
+        return self._search_cache or get_search_cache()
+
+    def cached_search(self, query: str, max_results: int) -> List[dict]:
         """Cache search results to reduce redundant API calls."""
-        with DDGS() as ddgs:
-            return list(ddgs.text(query, max_results=max_results))
+        cache = self.search_cache
+        results = cache.get(DUCKDUCKGO_HOST, query, max_results)
+        if results is not None:
+            return results
+
+        ddgs = get_ddgs()
+        # Only searches that miss the cache reach the network and wait
+        get_rate_limiter().acquire(DUCKDUCKGO_HOST)
+        results = list(ddgs.text(query, max_results=max_results))
+        # Empty results may come from throttling, they are searched again
+        if results:
+            cache.put(DUCKDUCKGO_HOST, query, max_results, results)
+        return results
+
+    @staticmethod
+    def _href_key(href: str) -> str:
+        """Key identifying a result URL, ignoring scheme, www., fragment and trailing slash."""
+        parts = urllib.parse.urlsplit(href.strip())
+        host = parts.netloc.lower().removeprefix("www.")
+        return f"{host}{parts.path.rstrip('/')}?{parts.query}"
+
+    @staticmethod
+    def _parse_queries(queries: str) -> List[str]:
+        """Split the queries argument, given as a JSON list or one query per line."""
+        queries = queries.strip()
+        if queries.startswith("["):
+            parsed = [str(query).strip() for query in json.loads(queries)]
+        else:
+            parsed = [query.strip() for query in queries.splitlines()]
+        unique = {}
+        for query in parsed:
+            if query:
+                unique.setdefault(" ".join(query.split()).lower(), query)
+        return list(unique.values())
+
+    def search_many(
+        self, queries: List[str], max_results: int
+    ) -> Tuple[List[dict], Dict[str, str]]:
+        """Search several queries concurrently and merge their results.
+
+        Each query goes through the search cache, and queries missing it wait
+        for the DuckDuckGo rate limit. Results are deduplicated by URL and
+        ranked by reciprocal rank fusion: a result scores 1 / (RRF_K + rank)
+        in each query returning it, so results found by several queries come
+        first.
+
+        Args:
+            queries (List[str]): The search terms.
+            max_results (int): Maximum number of results fetched per query.
+
+        Returns:
+            Tuple[List[dict], Dict[str, str]]: The ranked results, each with the
+                queries that found it under "queries", and the error of each
+                query that failed.
+        """
+        executor = self._get_executor()
+        futures = {
+            query: executor.submit(self.cached_search, query, max_results)
+            for query in queries
+        }
+
+        merged: Dict[str, dict] = {}
+        scores: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+        for query, future in futures.items():
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error(f"Search failed for query '{query}': {e}")
+                errors[query] = str(e)
+                continue
+            for rank, result in enumerate(results, 1):
+                href = result.get("href")
+                if not href:
+                    continue
+                key = self._href_key(href)
+                if key not in merged:
+                    merged[key] = {**result, "queries": []}
+                    scores[key] = 0.0
+                if query not in merged[key]["queries"]:
+                    merged[key]["queries"].append(query)
+                    scores[key] += 1 / (RRF_K + rank)
+
+        # sorted is stable: equal scores keep the order results were first seen in
+        ranked = sorted(merged, key=lambda key: scores[key], reverse=True)
+        return [merged[key] for key in ranked], errors
 
     def truncate_text(self, text: str, max_lines: int) -> str:
         """Truncate text to specified number of lines."""
@@ -77,14 +227,86 @@ class DuckDuckGoSearchTool(Tool):
             return text
         return '\n'.join(lines[:max_lines]) + '...'
 
+    def _format_result(self, idx: int, result: dict, max_lines: int) -> str:
+        """Format one search result for the model."""
+        title = result.get("text", "").split(" - ")[0]
+        link = result.get("href", "No URL")
+        description = self.truncate_text(
+            result.get("text", "No description"),
+            max_lines
+        )
+        summary = self.truncate_text(
+            result.get("summary", "No summary"),
+            max_lines
+        )
+
+        formatted = f"{idx}. {title}\n   URL: {link}\n   Description: {description}\n   Summary: {summary}\n"
+        if "queries" in result:
+            formatted += f"   Found by: {'; '.join(result['queries'])}\n"
+        return formatted
+
+    def _execute_batch(
+        self,
+        queries: str,
+        max_results: str,
+        number_of_articles: str,
+        max_lines_per_article: str,
+    ) -> str:
+        """Search several queries and return one ranked list of results."""
+        try:
+            query_list = self._parse_queries(queries)
+            max_results_int = int(max_results)
+            num_articles = int(number_of_articles)
+            max_lines = max(1, int(max_lines_per_article))
+
+            if max_results_int <= 0:
+                raise ValueError("max_results must be a positive integer.")
+            if not query_list:
+                raise ValueError("Queries cannot be empty.")
+        except (ValueError, TypeError) as e:
+            logger.error(f"Invalid batch search arguments: {e}")
+            return f"Error: {e}"
+
+        results, errors = self.search_many(query_list, max_results_int)
+        if len(errors) == len(query_list):
+            raise DuckDuckGoAPIError(
+                f"Failed to fetch search results for {query_list}"
+            )
+        if not results:
+            logger.warning(f"No results found for {query_list}")
+            return f"No results found for {query_list}"
+
+        articles = results[:num_articles]
+        formatted_results = [
+            self._format_result(idx, result, max_lines)
+            for idx, result in enumerate(articles, 1)
+        ]
+        if errors:
+            formatted_results.append(
+                "Failed queries:\n"
+                + "\n".join(f"- {query}: {error}" for query, error in errors.items())
+            )
+
+        logger.info(
+            f"Batch search successful: {len(articles)} articles from "
+            f"{len(results)} unique results for {len(query_list)} queries"
+        )
+        return "\n".join(formatted_results)
+
     def execute(
         self, 
-        query: str, 
+        query: str = "", 
         max_results: str = "30",
         number_of_articles: str = "5",
-        max_lines_per_article: str = "3"
+        max_lines_per_article: str = "3",
+        queries: str = "",
     ) -> str:
         """Execute a search query using DuckDuckGo and return results."""
+        if queries.strip():
+            return self._execute_batch(
+                queries, max_results, number_of_articles, max_lines_per_article
+            )
+
         if not query.strip():
             logger.error("Query cannot be empty or whitespace.")
             return "Error: Query cannot be empty."
@@ -96,8 +318,6 @@ class DuckDuckGoSearchTool(Tool):
 
             if max_results_int <= 0:
                 raise ValueError("max_results must be a positive integer.")
-            
-            time.sleep(0.5)  # Rate limiting
 
             results = self.cached_search(query, max_results_int)
 
@@ -105,22 +325,10 @@ class DuckDuckGoSearchTool(Tool):
                 logger.warning(f"No results found for '{query}'")
                 return f"No results found for '{query}'"
 
-            formatted_results = []
-            for idx, result in enumerate(results[:num_articles], 1):
-                title = result.get("text", "").split(" - ")[0]
-                link = result.get("href", "No URL")
-                description = self.truncate_text(
-                    result.get("text", "No description"),
-                    max_lines
-                )
-                summary = self.truncate_text(
-                    result.get("summary", "No summary"),
-                    max_lines
-                )
-
-                formatted_results.append(
-                    f"{idx}. {title}\n   URL: {link}\n   Description: {description}\n   Summary: {summary}\n"
-                )
+            formatted_results = [
+                self._format_result(idx, result, max_lines)
+                for idx, result in enumerate(results[:num_articles], 1)
+            ]
 
             logger.info(
                 f"Search successful: {len(formatted_results)} articles from {len(results)} results for '{query}'"
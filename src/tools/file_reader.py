@@ -8,7 +8,8 @@ from typing import ClassVar, List, Optional, Set, Tuple
 import requests
 from markitdown import MarkItDown
 from models.tool import Tool, ToolArgument
-from pydantic import Field
+from pydantic import Field, PrivateAttr
+from tools.http_client import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,8 @@ class FileReadError(Exception):
 
 
 class FileReaderTool(Tool):
+    _session: requests.Session = PrivateAttr()
+
     # Add constants for file validation
     MAX_FILE_SIZE: ClassVar[int] = 10 * 1024 * 1024  # 10MB
     TIMEOUT: ClassVar[int] = 30  # seconds
@@ -72,6 +75,11 @@ class FileReaderTool(Tool):
         False, description="Indicates if the tool needs validation."
     )
 
+    def __init__(self, session: requests.Session | None = None, **kwargs):
+        """Create the tool, downloading through the shared pooled session by default."""
+        super().__init__(**kwargs)
+        self._session = session or get_session()
+
     def _is_url(self, path: str) -> bool:
         """Check if the given path is a valid URL."""
         try:
@@ -151,7 +159,7 @@ class FileReaderTool(Tool):
     def _download_file(self, url: str) -> Tuple[Optional[Path], Optional[str]]:
         """Download a file from a URL and return the file path and content type."""
         try:
-            response = requests.get(
+            response = self._session.get(
                 url,
                 stream=True,
                 timeout=self.TIMEOUT,
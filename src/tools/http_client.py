@@ -0,0 +1,92 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from tools.rate_limiter import HostRateLimiter, get_rate_limiter
+from urllib3.util.retry import Retry
+
+# Number of hosts whose connections are kept alive at the same time
+DEFAULT_POOL_CONNECTIONS = 32
+# Connections open at the same time to a single host
+DEFAULT_POOL_MAXSIZE = 8
+# Timeout used when a caller gives none, (connect, read) in seconds
+DEFAULT_TIMEOUT = (5, 30)
+
+
+class PooledSession(requests.Session):
+    """Session applying a default timeout and the per-host rate limit to every request."""
+
+    def __init__(
+        self,
+        timeout: float | tuple[float, float] = DEFAULT_TIMEOUT,
+        rate_limiter: HostRateLimiter | None = None,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        (self.rate_limiter or get_rate_limiter()).acquire(url)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    retries: int = 5,
+    backoff_factor: float = 1,
+    timeout: float | tuple[float, float] = DEFAULT_TIMEOUT,
+    rate_limiter: HostRateLimiter | None = None,
+) -> requests.Session:
+    """Create a session with keep-alive pools, per-host limits and retries.
+
+    Args:
+        pool_connections (int): Number of per-host pools kept alive.
+        pool_maxsize (int): Maximum connections to a single host. Requests
+            beyond it wait for a free connection instead of opening a new one.
+        retries (int): Retries on connection errors and 429/5xx responses, for
+            idempotent methods, with exponential backoff.
+        backoff_factor (float): Backoff factor between retries.
+        timeout (float | tuple): Default timeout of requests without one.
+        rate_limiter (HostRateLimiter, optional): Per-host rate limit. Defaults
+            to the limiter shared by the process.
+    """
+    session = PooledSession(timeout, rate_limiter)
+    retry_strategy = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "OPTIONS"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry_strategy,
+        pool_block=True,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the session shared by the network tools of the process."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def set_session(session: requests.Session) -> requests.Session | None:
+    """Replace the shared session and return the previous one."""
+    global _session
+    with _session_lock:
+        previous, _session = _session, session
+    return previous
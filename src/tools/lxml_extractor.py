@@ -0,0 +1,137 @@
+"""Fast content extraction with lxml.
+
+Produces the same output as BeautifulSoupTool's BeautifulSoup based
+extraction, with a single iterative traversal writing to one buffer
+instead of a recursive walk building intermediate strings.
+"""
+
+import re
+from typing import Callable, Dict, List, Union
+
+import lxml.html
+from lxml import etree
+
+# Value of the BeautifulSoupTool parser argument selecting this engine
+FAST_PARSER = "lxml-fast"
+
+# XML declaration of XHTML pages, rejected by lxml in str input
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+def _inner_text(element: etree._Element) -> str:
+    return " ".join(element.text_content().split())
+
+
+def _list_items(element: etree._Element) -> List[etree._Element]:
+    return [child for child in element if child.tag == "li"]
+
+
+def _unordered_list(element: etree._Element) -> str:
+    items = [f"* {_inner_text(li)}" for li in _list_items(element)]
+    return "\n".join(items) + "\n\n"
+
+
+def _ordered_list(element: etree._Element) -> str:
+    items = [
+        f"{i}. {_inner_text(li)}" for i, li in enumerate(_list_items(element), 1)
+    ]
+    return "\n".join(items) + "\n\n"
+
+
+def _blockquote(element: etree._Element) -> str:
+    inner = _inner_text(element)
+    return "\n".join(f"> {line}" for line in inner.split("\n")) + "\n\n"
+
+
+# Elements rendered as a whole; other elements are rendered through their children
+_RENDERERS: Dict[str, Callable[[etree._Element], str]] = {
+    "h1": lambda e: f"# {_inner_text(e)}\n\n",
+    "h2": lambda e: f"## {_inner_text(e)}\n\n",
+    "h3": lambda e: f"### {_inner_text(e)}\n\n",
+    "p": lambda e: f"{_inner_text(e)}\n\n",
+    "a": lambda e: f"[{_inner_text(e)}]({e.get('href', '')})",
+    "ul": _unordered_list,
+    "ol": _ordered_list,
+    "img": lambda e: f"![{e.get('alt', '')}]({e.get('src', '')})\n\n",
+    "code": lambda e: f"`{_inner_text(e)}`",
+    "pre": lambda e: f"```\n{_inner_text(e)}\n```\n\n",
+    "blockquote": _blockquote,
+}
+
+
+def parse(html: str) -> etree._Element:
+    """Parse a page and drop its scripts and styles.
+
+    The page is already decoded, so the encoding of an XML declaration is
+    ignored. An empty page gives an empty html element.
+    """
+    try:
+        root = lxml.html.document_fromstring(_XML_DECLARATION.sub("", html, count=1))
+    except etree.ParserError:  # Document is empty
+        return lxml.html.Element("html")
+    for element in root.xpath("//script | //style"):
+        element.drop_tree()  # Keeps the text following the element
+    return root
+
+
+def to_markdown(element: etree._Element) -> str:
+    """Convert the content of an element, such as the page body, to markdown."""
+    output: List[str] = []
+    # Pending nodes, last first: elements, or text between them as strings
+    stack: List[Union[etree._Element, str]] = [element]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            output.append(node.strip())
+            continue
+        if not isinstance(node.tag, str):
+            continue  # Comments and processing instructions
+        renderer = _RENDERERS.get(node.tag)
+        if renderer is not None and node is not element:
+            output.append(renderer(node))
+            continue
+        children: List[Union[etree._Element, str]] = []
+        if node.text:
+            children.append(node.text)
+        for child in node:
+            children.append(child)
+            if child.tail:
+                children.append(child.tail)
+        stack.extend(reversed(children))
+    return "".join(output).strip()
+
+
+def extract(html: str, extract_type: str) -> Union[str, Dict]:
+    """Extract content from a page, like BeautifulSoupTool._extract_content."""
+    root = parse(html)
+
+    if extract_type == "markdown":
+        body = root.find("body")
+        return to_markdown(body) if body is not None else ""
+
+    if extract_type == "text":
+        return " ".join(text.strip() for text in root.itertext() if text.strip())
+
+    if extract_type == "links":
+        links = []
+        for link in root.iter("a"):
+            href = link.get("href")
+            if href:
+                text = "".join(part.strip() for part in link.itertext())
+                links.append({"text": text, "url": href})
+        return {"links": links}
+
+    if extract_type == "images":
+        images = []
+        for img in root.iter("img"):
+            src = img.get("src")
+            if src:
+                images.append({"src": src, "alt": img.get("alt", "")})
+        return {"images": images}
+
+    if extract_type == "all":
+        if not len(root):
+            return ""
+        return lxml.html.tostring(root, pretty_print=True, encoding="unicode")
+
+    return "Error: Invalid extract_type specified"
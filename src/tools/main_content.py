@@ -0,0 +1,174 @@
+"""Main content extraction.
+
+Keeps the article of a page and drops its navigation, sidebars and footers,
+in the manner of Readability: text blocks score their ancestors by length
+and commas, the scores are discounted by link density, and the best scoring
+container is kept with the siblings that score close to it.
+"""
+
+import re
+from typing import Dict, List
+
+import lxml.html
+from lxml import etree
+from pydantic import BaseModel, Field, computed_field
+from tools import lxml_extractor
+
+# Value of the BeautifulSoupTool extract_type argument selecting this mode
+MAIN_CONTENT = "main_content"
+
+# Elements never part of the main content
+BOILERPLATE_TAGS = ["nav", "header", "footer", "aside", "form", "noscript", "iframe"]
+# Class and id hints of boilerplate and of content
+UNLIKELY = re.compile(
+    r"banner|breadcrumb|comment|cookie|footer|header|menu|modal|nav|popup|"
+    r"related|share|sidebar|social|sponsor|subscribe|toolbar|widget",
+    re.IGNORECASE,
+)
+LIKELY = re.compile(r"article|body|content|entry|main|post|story|text", re.IGNORECASE)
+# Elements whose text scores their ancestors
+TEXT_BLOCKS = ["p", "pre", "td", "blockquote", "li"]
+# Shortest text block that is scored, in characters
+MIN_BLOCK_CHARS = 25
+# Siblings of the best container scoring at least this fraction of it are kept
+SIBLING_THRESHOLD = 0.2
+
+TAG_SCORES = {
+    "article": 10,
+    "main": 10,
+    "div": 5,
+    "section": 3,
+    "pre": 3,
+    "td": 3,
+    "blockquote": 3,
+    "ol": -3,
+    "ul": -3,
+    "dl": -3,
+    "li": -3,
+    "th": -5,
+    "h1": -5,
+    "h2": -5,
+    "h3": -5,
+}
+
+
+class MainContent(BaseModel):
+    """The main content of a page and how much of the page it keeps."""
+
+    markdown: str = Field(..., description="The main content as markdown.")
+    page_chars: int = Field(..., description="Text characters of the whole page body.")
+    main_chars: int = Field(..., description="Text characters of the main content.")
+
+    @computed_field
+    @property
+    def reduction(self) -> float:
+        """How many times smaller the main content is than the page."""
+        return self.page_chars / self.main_chars if self.main_chars else 0.0
+
+
+def _text(element: etree._Element) -> str:
+    return " ".join(element.text_content().split())
+
+
+def _hints(element: etree._Element) -> str:
+    return f"{element.get('class', '')} {element.get('id', '')}"
+
+
+def _class_weight(element: etree._Element) -> int:
+    hints = _hints(element)
+    weight = 0
+    if UNLIKELY.search(hints):
+        weight -= 25
+    if LIKELY.search(hints):
+        weight += 25
+    return weight
+
+
+def link_density(element: etree._Element) -> float:
+    """Fraction of the text of an element inside links."""
+    length = len(_text(element))
+    if not length:
+        return 0.0
+    linked = sum(len(_text(link)) for link in element.iter("a"))
+    return min(linked / length, 1.0)
+
+
+def remove_boilerplate(body: etree._Element) -> None:
+    """Drop the elements that are unlikely to belong to the main content."""
+    for element in list(body.iter(*BOILERPLATE_TAGS)):
+        if element.getparent() is not None:
+            element.drop_tree()
+    for element in list(body.iter("div", "section", "span", "ul", "table")):
+        if element.getparent() is None:
+            continue  # Inside an element dropped before
+        hints = _hints(element)
+        if UNLIKELY.search(hints) and not LIKELY.search(hints):
+            element.drop_tree()
+
+
+def score_candidates(body: etree._Element) -> Dict[etree._Element, float]:
+    """Score the containers of the text blocks, discounted by link density."""
+    scores: Dict[etree._Element, float] = {}
+    for block in body.iter(*TEXT_BLOCKS):
+        text = _text(block)
+        if len(text) < MIN_BLOCK_CHARS:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        for depth, ancestor in enumerate(block.iterancestors()):
+            if depth > 1:
+                break
+            if ancestor not in scores:
+                scores[ancestor] = TAG_SCORES.get(ancestor.tag, 0) + _class_weight(
+                    ancestor
+                )
+            scores[ancestor] += score if depth == 0 else score / 2
+            if ancestor is body:
+                break
+    return {
+        element: score * (1 - link_density(element))
+        for element, score in scores.items()
+    }
+
+
+def select_main(body: etree._Element) -> List[etree._Element]:
+    """Return the best scoring container with the siblings worth keeping."""
+    scores = score_candidates(body)
+    if not scores:
+        return [body]
+    best = max(scores, key=scores.get)
+    parent = best.getparent()
+    if parent is None or best is body:
+        return [best]
+
+    threshold = max(10.0, scores[best] * SIBLING_THRESHOLD)
+    kept = []
+    for sibling in parent:
+        if not isinstance(sibling.tag, str):
+            continue
+        if sibling is best or scores.get(sibling, 0.0) >= threshold:
+            kept.append(sibling)
+        elif sibling.tag == "p":
+            text = _text(sibling)
+            if len(text) > 80 and link_density(sibling) < 0.25:
+                kept.append(sibling)
+    return kept
+
+
+def extract(html: str) -> MainContent:
+    """Extract the main content of a page as markdown."""
+    root = lxml_extractor.parse(html)
+    body = root.find("body")
+    if body is None:
+        return MainContent(markdown="", page_chars=0, main_chars=0)
+
+    page_chars = len(_text(body))
+    remove_boilerplate(body)
+    kept = select_main(body)
+
+    main = lxml.html.Element("div")
+    main.extend(kept)  # Moves the elements, they are no longer in body
+    return MainContent(
+        markdown=lxml_extractor.to_markdown(main),
+        page_chars=page_chars,
+        main_chars=len(_text(main)),
+    )
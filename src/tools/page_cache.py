@@ -0,0 +1,220 @@
+import hashlib
+import re
+import time
+from typing import Dict, Optional
+
+import requests
+from pydantic import BaseModel, Field
+from utility.sqlite_cache import SqliteCache
+
+# Bytes read per chunk when streaming a response body
+CHUNK_SIZE = 64 * 1024
+
+
+class PageTooLargeError(Exception):
+    """Raised when a response body exceeds the maximum page size."""
+
+    pass
+
+
+class UnexpectedContentTypeError(Exception):
+    """Raised when a response is not of the expected content type."""
+
+    pass
+
+
+def read_body(response: requests.Response, max_bytes: int | None = None) -> bytes:
+    """Read the body of a streamed response, up to max_bytes.
+
+    The body is read in chunks and the download stops as soon as the limit
+    is exceeded, so that a huge page is never held in memory.
+
+    Raises:
+        PageTooLargeError: If the body is larger than max_bytes.
+    """
+    if max_bytes is not None:
+        length = response.headers.get("content-length", "")
+        if length.isdigit() and int(length) > max_bytes:
+            response.close()
+            raise PageTooLargeError(
+                f"Page of {length} bytes exceeds the limit of {max_bytes} bytes"
+            )
+
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            response.close()
+            raise PageTooLargeError(
+                f"Page exceeds the limit of {max_bytes} bytes"
+            )
+        chunks.append(chunk)
+    # Later accesses to response.content and response.text use the body read
+    response._content = b"".join(chunks)
+    response._content_consumed = True
+    return response._content
+
+
+class WebPage(BaseModel):
+    """A downloaded page with its HTTP validators."""
+
+    url: str = Field(..., description="The requested URL.")
+    body: str = Field(..., description="The decoded page body.")
+    content_type: str = Field("", description="The Content-Type header, lower case.")
+    etag: Optional[str] = Field(None, description="The ETag header, if any.")
+    last_modified: Optional[str] = Field(None, description="The Last-Modified header, if any.")
+    max_age: Optional[float] = Field(
+        None, description="Seconds the page stays fresh, from Cache-Control."
+    )
+    no_store: bool = Field(False, description="Whether Cache-Control forbids storing.")
+    fetched_at: float = Field(default_factory=time.time)
+    digest: str = Field("", description="SHA-256 of the body.")
+
+    @classmethod
+    def from_response(
+        cls,
+        url: str,
+        response: requests.Response,
+        max_bytes: int | None = None,
+        content_type: str | None = None,
+    ) -> "WebPage":
+        """Create a page from a response, streamed or not.
+
+        When content_type is given, a response of another type is closed
+        before its body is downloaded.
+
+        Raises:
+            UnexpectedContentTypeError: If the response is not of content_type.
+            PageTooLargeError: If the body is larger than max_bytes.
+        """
+        received_type = response.headers.get("content-type", "").lower()
+        if content_type is not None and content_type not in received_type:
+            response.close()
+            raise UnexpectedContentTypeError(
+                f"Unexpected content type: {received_type}"
+            )
+        read_body(response, max_bytes)
+        # Detect and use correct encoding
+        response.encoding = response.apparent_encoding
+        body = response.text
+        cache_control = response.headers.get("cache-control", "").lower()
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        return cls(
+            url=url,
+            body=body,
+            content_type=received_type,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            max_age=float(max_age.group(1)) if max_age else None,
+            no_store="no-store" in cache_control,
+            digest=hashlib.sha256(body.encode("utf-8")).hexdigest(),
+        )
+
+
+class PageCache:
+    """On-disk HTTP cache of pages and of the content extracted from them.
+
+    A page younger than its max-age (or than fresh_for) is served without any
+    request. An older page is revalidated with a conditional GET using its
+    ETag and Last-Modified validators, and a 304 reuses the stored body.
+    Extracted content is keyed by the body digest, so a fresh or revalidated
+    page also skips parsing.
+    """
+
+    def __init__(self, cache: SqliteCache, fresh_for: float = 0.0):
+        """Create a page cache.
+
+        Args:
+            cache (SqliteCache): Storage for pages and extracted content.
+            fresh_for (float): Seconds a page is served without revalidation
+                when the server gives no longer max-age.
+        """
+        self.cache = cache
+        self.fresh_for = fresh_for
+
+    @staticmethod
+    def _page_key(url: str) -> str:
+        return SqliteCache.make_key("page", url)
+
+    @staticmethod
+    def _extract_key(page: WebPage, parser: str, extract_type: str) -> str:
+        return SqliteCache.make_key("extract", page.digest, parser, extract_type)
+
+    def get(self, url: str) -> WebPage | None:
+        """Return the stored page of a URL, if any."""
+        cached = self.cache.get(self._page_key(url))
+        return WebPage.model_validate_json(cached) if cached is not None else None
+
+    def put(self, page: WebPage) -> WebPage:
+        """Store a page unless the server forbids it, and return it."""
+        if not page.no_store:
+            self.cache.set(self._page_key(page.url), page.model_dump_json())
+        return page
+
+    def is_fresh(self, page: WebPage) -> bool:
+        """Whether a page can be served without revalidation."""
+        fresh_for = max(page.max_age or 0.0, self.fresh_for)
+        return time.time() - page.fetched_at < fresh_for
+
+    @staticmethod
+    def conditional_headers(page: WebPage) -> Dict[str, str]:
+        """Validators to send when revalidating a page."""
+        headers = {}
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def fetch(
+        self,
+        session: requests.Session,
+        url: str,
+        headers: Dict[str, str],
+        timeout: float,
+        max_bytes: int | None = None,
+        content_type: str | None = None,
+    ) -> WebPage:
+        """Return a page from the cache, revalidating or downloading it as needed.
+
+        Raises:
+            requests.RequestException: If the request fails.
+            UnexpectedContentTypeError: If the response is not of content_type.
+            PageTooLargeError: If the body is larger than max_bytes.
+        """
+        page = self.get(url)
+        if page is not None and self.is_fresh(page):
+            return page
+
+        request_headers = dict(headers)
+        if page is not None:
+            request_headers.update(self.conditional_headers(page))
+        response = session.get(
+            url, headers=request_headers, timeout=timeout, stream=True
+        )
+
+        try:
+            if page is not None and response.status_code == 304:
+                refreshed = page.model_copy(update={"fetched_at": time.time()})
+                return self.put(refreshed)
+
+            response.raise_for_status()
+            return self.put(
+                WebPage.from_response(url, response, max_bytes, content_type)
+            )
+        finally:
+            response.close()
+
+    def get_extract(
+        self, page: WebPage, parser: str, extract_type: str
+    ) -> Optional[str]:
+        """Return the content extracted from a page, if stored."""
+        return self.cache.get(self._extract_key(page, parser, extract_type))
+
+    def put_extract(
+        self, page: WebPage, parser: str, extract_type: str, content: str
+    ) -> None:
+        """Store the content extracted from a page."""
+        if not page.no_store:
+            self.cache.set(self._extract_key(page, parser, extract_type), content)
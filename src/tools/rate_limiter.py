@@ -0,0 +1,114 @@
+import threading
+import time
+import urllib.parse
+
+# Requests per second allowed to a host once its burst is used up
+DEFAULT_RATE = 1.0
+# Requests a host may receive back to back before the rate applies
+DEFAULT_BURST = 3
+
+# Hosts known to throttle aggressively, matched on the host or its parent domains
+DEFAULT_HOST_LIMITS: dict[str, tuple[float, int]] = {
+    "duckduckgo.com": (1.0, 2),
+    "wikipedia.org": (5.0, 10),
+}
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second, holding up to burst tokens."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Tokens may go negative: later callers queue behind earlier ones
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Wait until a token is available. Returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """One token bucket per host, so that only requests to a busy host wait."""
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        host_limits: dict[str, tuple[float, int]] | None = None,
+    ):
+        """Create a rate limiter.
+
+        Args:
+            rate (float): Requests per second per host.
+            burst (int): Requests a host may receive without waiting.
+            host_limits (dict, optional): (rate, burst) of specific hosts, also
+                applied to their subdomains. Defaults to DEFAULT_HOST_LIMITS.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.host_limits = (
+            DEFAULT_HOST_LIMITS if host_limits is None else host_limits
+        )
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(url_or_host: str) -> str:
+        """Host of a URL, or the argument itself when it is already a host."""
+        if "://" not in url_or_host:
+            return url_or_host.lower()
+        return (urllib.parse.urlsplit(url_or_host).hostname or "").lower()
+
+    def _limits(self, host: str) -> tuple[float, int]:
+        parts = host.split(".")
+        for i in range(len(parts)):
+            limits = self.host_limits.get(".".join(parts[i:]))
+            if limits is not None:
+                return limits
+        return self.rate, self.burst
+
+    def bucket(self, url_or_host: str) -> TokenBucket:
+        """Return the bucket of a host, created on first use."""
+        host = self.host(url_or_host)
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(*self._limits(host))
+            return self._buckets[host]
+
+    def acquire(self, url_or_host: str) -> float:
+        """Wait until a request to the host is allowed. Returns the seconds waited."""
+        return self.bucket(url_or_host).acquire()
+
+
+_rate_limiter = HostRateLimiter()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Return the rate limiter shared by every agent of the process."""
+    return _rate_limiter
+
+
+def set_rate_limiter(rate_limiter: HostRateLimiter) -> HostRateLimiter:
+    """Replace the shared rate limiter and return the previous one."""
+    global _rate_limiter
+    previous, _rate_limiter = _rate_limiter, rate_limiter
+    return previous
@@ -0,0 +1,175 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utility.sqlite_cache import SqliteCache
+
+logger = logging.getLogger(__name__)
+
+# Cache shared by every agent process of the host
+DEFAULT_SEARCH_CACHE_PATH = Path("~/.cache/quantafold/search.sqlite")
+# Seconds search results are reused before searching again
+DEFAULT_SEARCH_TTL = 24 * 3600
+# Maximum size of the on-disk search cache
+DEFAULT_SEARCH_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class SearchCache(ABC):
+    """Cache of search results, keyed by engine, normalized query and result count."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # Lookups come from the threads of batch searches
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(engine: str, query: str, max_results: int) -> str:
+        """Key of a search. Queries differing only in case or spacing share it."""
+        normalized = " ".join(query.split()).lower()
+        return SqliteCache.make_key("search", engine, normalized, max_results)
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[List[dict]]: ...
+
+    @abstractmethod
+    def _set(self, key: str, results: List[dict]) -> None: ...
+
+    def get(self, engine: str, query: str, max_results: int) -> Optional[List[dict]]:
+        """Return the cached results of a search, or None when missing or expired."""
+        results = self._get(self.make_key(engine, query, max_results))
+        with self._stats_lock:
+            if results is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return results
+
+    def put(self, engine: str, query: str, max_results: int, results: List[dict]) -> None:
+        """Store the results of a search."""
+        self._set(self.make_key(engine, query, max_results), results)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hit and miss counters of this process."""
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+class MemorySearchCache(SearchCache):
+    """In-process LRU cache of search results with a time to live."""
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = DEFAULT_SEARCH_TTL):
+        """Create the cache.
+
+        Args:
+            maxsize (int): Maximum number of searches kept.
+            ttl (float, optional): Time to live of an entry, in seconds. None never expires.
+        """
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, List[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, results = entry
+            if self.ttl is not None and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def _set(self, key: str, results: List[dict]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {**super().stats(), "entries": entries}
+
+
+class SqliteSearchCache(SearchCache):
+    """Search cache on a SQLite file, shared by the processes of a host.
+
+    Expiry and size-bounded LRU eviction are those of the SqliteCache.
+    """
+
+    def __init__(self, cache: SqliteCache):
+        """Create the cache.
+
+        Args:
+            cache (SqliteCache): Storage of the results, with its ttl and max_bytes.
+        """
+        super().__init__()
+        self.cache = cache
+
+    def _get(self, key: str) -> Optional[List[dict]]:
+        cached = self.cache.get(key)
+        return json.loads(cached) if cached is not None else None
+
+    def _set(self, key: str, results: List[dict]) -> None:
+        self.cache.set(key, json.dumps(results, ensure_ascii=False))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        return {
+            **super().stats(),
+            "entries": stats["entries"],
+            "size_bytes": stats["size_bytes"],
+        }
+
+
+_search_cache: SearchCache | None = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Return the search cache shared by the search tools of the process.
+
+    Defaults to a SqliteSearchCache at DEFAULT_SEARCH_CACHE_PATH, shared by
+    every process of the host, or to a MemorySearchCache when the file
+    cannot be opened.
+    """
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            try:
+                _search_cache = SqliteSearchCache(
+                    SqliteCache(
+                        DEFAULT_SEARCH_CACHE_PATH,
+                        ttl=DEFAULT_SEARCH_TTL,
+                        max_bytes=DEFAULT_SEARCH_CACHE_BYTES,
+                    )
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Search cache unavailable, using memory: {e}")
+                _search_cache = MemorySearchCache()
+        return _search_cache
+
+
+def set_search_cache(cache: SearchCache) -> SearchCache | None:
+    """Replace the shared search cache and return the previous one."""
+    global _search_cache
+    with _search_cache_lock:
+        previous, _search_cache = _search_cache, cache
+    return previous
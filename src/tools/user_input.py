@@ -38,6 +38,9 @@ class UserInputTool(Tool):
     need_validation: bool = Field(
         False, description="Indicates if the tool needs validation."
     )
+    need_user_input: bool = Field(
+        True, description="Indicates if the tool reads input from the user.", exclude=True
+    )
 
     def _format_prompt(self, prompt: str, is_multiline: bool) -> None:
         """Format and display the input prompt with styling."""
@@ -1,11 +1,13 @@
 import logging
-import time
 from functools import lru_cache
 from typing import List
 
+import requests
 import wikipedia
+import wikipedia.wikipedia
 from models.tool import Tool, ToolArgument
 from pydantic import Field
+from tools.http_client import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,22 @@ def find_best_match(query: str, search_results: List[str]) -> str:
     return search_results[0] if search_results else None
 
 
+class _SessionRequests:
+    """Stand-in for the requests module used by the wikipedia package.
+
+    The package calls requests.get directly; routing it through the shared
+    session keeps connections to the Wikipedia API alive between calls. The
+    session is looked up on each call, so set_session applies to it.
+    """
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return get_session().get(url, **kwargs)
+
+
+# The wikipedia package is process-wide, so is the session it uses
+wikipedia.wikipedia.requests = _SessionRequests()
+
+
 class WikipediaAPIError(Exception):
     """Custom exception for Wikipedia API errors."""
 
@@ -143,7 +161,6 @@ class WikipediaTool(Tool):
 
     def fetch_summary(self, title: str, max_lines: str) -> str:
         """Fetch and format article summary."""
-        time.sleep(0.5)  # Rate limiting
         page = wikipedia.page(title, auto_suggest=False)
         summary = page.summary
 
@@ -0,0 +1,120 @@
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+from pydantic import BaseModel, Field
+
+
+class BlobHandle(BaseModel):
+    """Reference to a text stored in a BlobStore."""
+
+    digest: str = Field(..., description="SHA-256 hex digest of the UTF-8 content.")
+    size: int = Field(..., description="Size of the UTF-8 content in bytes.")
+
+    def __str__(self) -> str:
+        return f"sha256:{self.digest}"
+
+
+class BlobStore:
+    """Content-addressed store for large texts, in memory with spill to disk.
+
+    Texts are keyed by the SHA-256 of their content, so a text stored several
+    times is kept once. Once the texts held in memory exceed max_memory_bytes,
+    the least recently used ones are written to spill_dir and read back on demand.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        spill_dir: str | None = None,
+    ):
+        """Create a blob store.
+
+        Args:
+            max_memory_bytes (int): Bytes of text kept in memory before spilling.
+            spill_dir (str, optional): Directory for spilled blobs. Defaults to a
+                temporary directory removed with the store.
+        """
+        self.max_memory_bytes = max_memory_bytes
+        if spill_dir is None:
+            temporary_dir = tempfile.TemporaryDirectory(prefix="blob-store-")
+            weakref.finalize(self, temporary_dir.cleanup)
+            spill_dir = temporary_dir.name
+        else:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = spill_dir
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.spill_dir, digest)
+
+    def put(self, text: str) -> BlobHandle:
+        """Store a text and return its handle."""
+        data = text.encode("utf-8")
+        handle = BlobHandle(digest=hashlib.sha256(data).hexdigest(), size=len(data))
+        with self._lock:
+            if handle.digest in self._sizes:
+                if handle.digest in self._memory:
+                    self._memory.move_to_end(handle.digest)
+                return handle
+            self._sizes[handle.digest] = handle.size
+            self._memory[handle.digest] = text
+            self._memory_bytes += handle.size
+            self._spill()
+        return handle
+
+    def get(self, handle: BlobHandle | str) -> str:
+        """Return the text of a handle or digest.
+
+        Raises:
+            KeyError: If the blob is not in the store.
+        """
+        digest = handle.digest if isinstance(handle, BlobHandle) else handle
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+            if digest not in self._sizes:
+                raise KeyError(digest)
+        with open(self._path(digest), encoding="utf-8", newline="") as file:
+            return file.read()
+
+    def __contains__(self, handle: BlobHandle | str) -> bool:
+        digest = handle.digest if isinstance(handle, BlobHandle) else handle
+        return digest in self._sizes
+
+    def _spill(self) -> None:
+        """Write least recently used blobs to disk until memory fits the limit."""
+        # The most recent blob stays in memory, even when larger than the limit.
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            digest, text = self._memory.popitem(last=False)
+            with open(self._path(digest), "w", encoding="utf-8", newline="") as file:
+                file.write(text)
+            self._memory_bytes -= self._sizes[digest]
+
+    def clear(self) -> None:
+        """Remove every blob, deleting the spilled ones from disk."""
+        with self._lock:
+            for digest in self._sizes.keys() - self._memory.keys():
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._path(digest))
+            self._memory.clear()
+            self._sizes.clear()
+            self._memory_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of blobs and bytes, in memory and in total."""
+        with self._lock:
+            return {
+                "blobs": len(self._sizes),
+                "memory_blobs": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "total_bytes": sum(self._sizes.values()),
+            }
@@ -0,0 +1,78 @@
+from typing import Tuple
+
+XML_FENCE = "```xml"
+CODE_FENCE = "```"
+RESPONSE_CLOSE_TAG = "</response>"
+CDATA_OPEN = "<![CDATA["
+CDATA_CLOSE = "]]>"
+
+
+class ResponseCloseDetector:
+    """Detect the end of the XML response while model tokens stream in.
+
+    The response is complete at the first `</response>` tag, or at the code
+    fence closing a ```xml block. Text after it is trailing chatter that the
+    agent never reads, so generation can be cancelled there. Both markers are
+    content inside a CDATA section, as in the code argument of a tool.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._scan_from = 0
+        self._in_fence = False
+        self._in_cdata = False
+        self.closed = False
+
+    @property
+    def content(self) -> str:
+        """The text received up to the end of the response."""
+        return self._text
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk of generated text. Returns True once the response is closed."""
+        if self.closed:
+            return True
+
+        self._text += chunk
+        while not self.closed:
+            marker, index = self._next_marker()
+            if index < 0:
+                # Markers may be split across chunks: rescan the tail of the text
+                tail = len(self._text) - len(RESPONSE_CLOSE_TAG) + 1
+                self._scan_from = max(self._scan_from, tail)
+                break
+            self._scan_from = index + len(marker)
+            if marker == CDATA_OPEN:
+                self._in_cdata = True
+            elif marker == CDATA_CLOSE:
+                self._in_cdata = False
+            elif marker == XML_FENCE:
+                self._in_fence = True
+            elif marker == CODE_FENCE:
+                self._text = self._text[: self._scan_from]
+                self.closed = True
+            else:
+                self._text = self._text[: self._scan_from]
+                if self._in_fence:
+                    # Keep the code block well-formed for the XML extraction
+                    self._text += "\n" + CODE_FENCE
+                self.closed = True
+
+        return self.closed
+
+    def _next_marker(self) -> Tuple[str, int]:
+        """The first marker after the scanned text that matters in this state."""
+        if self._in_cdata:
+            markers = [CDATA_CLOSE]
+        elif self._in_fence:
+            markers = [CDATA_OPEN, RESPONSE_CLOSE_TAG, CODE_FENCE]
+        else:
+            markers = [CDATA_OPEN, RESPONSE_CLOSE_TAG, XML_FENCE]
+        found = [
+            (marker, self._text.find(marker, self._scan_from)) for marker in markers
+        ]
+        return min(
+            ((marker, index) for marker, index in found if index >= 0),
+            key=lambda item: item[1],
+            default=("", -1),
+        )
@@ -0,0 +1,270 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+def _random_id(length: int) -> str:
+    return os.urandom(length).hex()
+
+
+class Span(BaseModel):
+    """A timed operation of a trace, nested under its parent span."""
+
+    name: str = Field(..., description="Name of the operation, e.g. model.generate.")
+    trace_id: str = Field(..., description="32 hex digits shared by a whole trace.")
+    span_id: str = Field(..., description="16 hex digits identifying the span.")
+    parent_id: Optional[str] = Field(None, description="span_id of the parent span.")
+    start_time_ns: int = Field(..., description="Unix time of the start, in nanoseconds.")
+    end_time_ns: Optional[int] = Field(None, description="Unix time of the end, in nanoseconds.")
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+    status: str = Field("ok", description="ok, or error when an exception escaped.")
+    error: Optional[str] = Field(None, description="The escaped exception, if any.")
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return ((self.end_time_ns or time.time_ns()) - self.start_time_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+class _NoopSpan:
+    """Span handed out when tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Receives finished spans."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+    def flush(self) -> None:
+        """Send buffered spans, if any."""
+
+    def shutdown(self) -> None:
+        self.flush()
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Append each finished span as a JSON line to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = span.model_dump_json()
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """Send spans to an OpenTelemetry collector with OTLP/HTTP and JSON encoding."""
+
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:4318/v1/traces",
+        service_name: str = "quantafold",
+        batch_size: int = 64,
+        timeout: float = 5.0,
+        session: requests.Session | None = None,
+    ):
+        """Create an OTLP exporter.
+
+        Args:
+            endpoint (str): Traces endpoint of the collector.
+            service_name (str): service.name resource attribute.
+            batch_size (int): Spans buffered before they are sent.
+            timeout (float): Request timeout in seconds.
+            session (requests.Session, optional): Session used for the requests.
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _value(value: Any) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    @classmethod
+    def _attributes(cls, attributes: Dict[str, Any]) -> list[dict]:
+        return [
+            {"key": key, "value": cls._value(value)}
+            for key, value in attributes.items()
+            if value is not None
+        ]
+
+    @classmethod
+    def _otlp_span(cls, span: Span) -> dict:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(span.end_time_ns),
+            "attributes": cls._attributes(span.attributes),
+            # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+            "status": {"code": 2, "message": span.error or ""}
+            if span.status == "error"
+            else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return otlp_span
+
+    def payload(self, spans: list[Span]) -> dict:
+        """OTLP ExportTraceServiceRequest for the spans."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": self._attributes(
+                            {"service.name": self.service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "quantafold"},
+                            "spans": [self._otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            if len(self._spans) < self.batch_size:
+                return
+            spans, self._spans = self._spans, []
+        self._send(spans)
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if spans:
+            self._send(spans)
+
+    def _send(self, spans: list[Span]) -> None:
+        # Tracing must never break the agent, failures are only logged
+        try:
+            response = self.session.post(
+                self.endpoint,
+                data=json.dumps(self.payload(spans)),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Failed to export {len(spans)} spans: {e}")
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Tracer:
+    """Create nested spans and hand them to an exporter once finished.
+
+    The current span is kept in a context variable, so spans opened in asyncio
+    tasks, or in threads started with a copied context, nest under the span
+    that was current when they were started.
+    """
+
+    def __init__(self, exporter: SpanExporter | None = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+        """Time the enclosed block as a span, child of the current span."""
+        if self.exporter is None:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else _random_id(16),
+            span_id=_random_id(8),
+            parent_id=parent.span_id if parent else None,
+            start_time_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time_ns = time.time_ns()
+            try:
+                self.exporter.export(span)
+            except Exception:
+                logger.exception("Failed to export span")
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer, disabled until set_tracer is called."""
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """Install the process-wide tracer and return the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def current_span() -> Span | None:
+    """Return the span the caller runs in, if any."""
+    return _current_span.get()
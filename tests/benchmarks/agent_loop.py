@@ -0,0 +1,211 @@
+"""Agent loop benchmark.
+
+Runs Agent end to end against a ReplayBackend and a stub tool, and reports
+per-iteration timings of each phase as JSON, for tracking regressions:
+
+    python tests/benchmarks/agent_loop.py --output agent_loop.json
+
+Phases are timed exclusively, a nested phase is not counted in its parent:
+
+- format_tasks: Agent._format_tasks
+- prompt: the rest of Agent._prepare_prompt
+- model: GenerativeModel.generate, without the incremental parsing it feeds
+- parsing: incremental parsing of the streamed text and Agent._handle_llm_response,
+  including the ResponseParser.parse fallback
+- tools: Agent._execute_actions
+- memory: Agent._record_results and Agent._add_to_memory
+- overhead: the rest of the iteration
+
+prompt_building adds up format_tasks and prompt.
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "src"))
+
+from core.agent import Agent  # noqa: E402
+from core.generative_model import GenerativeModel  # noqa: E402
+from core.model_backend import ReplayBackend  # noqa: E402
+
+from tests.helpers import ACTION_TEMPLATE, FINAL_RESPONSE, StubTool  # noqa: E402
+
+PHASES = ["format_tasks", "prompt", "model", "parsing", "tools", "memory", "overhead"]
+
+
+class PhaseTimer:
+    """Exclusive per-iteration timings of wrapped methods."""
+
+    def __init__(self):
+        self.iterations: list[dict[str, float]] = []
+        self._current: dict[str, float] | None = None
+        self._stack: list[list[float]] = []
+        self._thread = threading.get_ident()
+
+    def wrap(self, obj: Any, attribute: str, phase: str) -> None:
+        method = getattr(obj, attribute)
+
+        def timed(*args, **kwargs):
+            if threading.get_ident() != self._thread or self._current is None:
+                return method(*args, **kwargs)
+            frame = [time.perf_counter(), 0.0]
+            self._stack.append(frame)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._stack.pop()
+                elapsed = time.perf_counter() - frame[0]
+                self._current[phase] += elapsed - frame[1]
+                if self._stack:
+                    self._stack[-1][1] += elapsed
+
+        setattr(obj, attribute, timed)
+
+    def wrap_iteration(self, agent: Agent, on_iteration: Callable[[], None]) -> None:
+        think = agent._think
+
+        def timed_think():
+            self._current = dict.fromkeys(PHASES, 0.0)
+            start_time = time.perf_counter()
+            try:
+                return think()
+            finally:
+                total = time.perf_counter() - start_time
+                self._current["overhead"] = total - sum(self._current.values())
+                self._current["total"] = total
+                self.iterations.append(self._current)
+                self._current = None
+                on_iteration()
+
+        agent._think = timed_think
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "mean": sum(values) / len(values),
+        "total": sum(values),
+    }
+
+
+def run_scenario(
+    iterations: int, result_bytes: int, repeat: int = 1, latency: float = 0.0
+) -> dict[str, Any]:
+    """Run an agent for the given number of iterations, repeat times."""
+    timer = PhaseTimer()
+    wall_times = []
+    for _ in range(repeat):
+        contents = [ACTION_TEMPLATE.format(index=i) for i in range(iterations - 1)]
+        backend = ReplayBackend(
+            contents + [FINAL_RESPONSE],
+            latency=latency,
+            prompt_tokens=1000,
+            completion_tokens=100,
+        )
+        agent = Agent(
+            GenerativeModel(model="gpt-4o", backend=backend),
+            max_iterations=iterations,
+            headless=True,
+        )
+        agent.register(StubTool(result_bytes=result_bytes))
+
+        timer.wrap(agent, "_format_tasks", "format_tasks")
+        timer.wrap(agent, "_prepare_prompt", "prompt")
+        timer.wrap(agent.model, "generate", "model")
+        timer.wrap(agent, "_handle_llm_response", "parsing")
+        timer.wrap(agent, "_execute_actions", "tools")
+        timer.wrap(agent, "_record_results", "memory")
+        timer.wrap(agent, "_add_to_memory", "memory")
+        create_stream_parser = agent._create_stream_parser
+
+        def timed_stream_parser(create=create_stream_parser):
+            stream_parser = create()
+            timer.wrap(stream_parser, "feed", "parsing")
+            return stream_parser
+
+        agent._create_stream_parser = timed_stream_parser
+        # Replayed calls keep their prompts, drop them to bound memory use
+        timer.wrap_iteration(agent, backend.calls.clear)
+
+        start_time = time.perf_counter()
+        answer = agent.execute("Fetch every part")
+        wall_times.append(time.perf_counter() - start_time)
+        if answer != "Done":
+            raise RuntimeError(f"Scenario did not complete: {answer}")
+
+    samples = timer.iterations
+    phases = {phase: summarize([s[phase] for s in samples]) for phase in PHASES}
+    phases["prompt_building"] = summarize(
+        [s["format_tasks"] + s["prompt"] for s in samples]
+    )
+    return {
+        "name": f"{iterations}_iterations_{result_bytes}_bytes",
+        "iterations": iterations,
+        "result_bytes": result_bytes,
+        "repeat": repeat,
+        "latency": latency,
+        "wall_time": summarize(wall_times),
+        "iteration": summarize([s["total"] for s in samples]),
+        "phases": phases,
+    }
+
+
+def run(
+    iterations: list[int],
+    result_bytes: list[int],
+    repeat: int = 1,
+    latency: float = 0.0,
+) -> dict[str, Any]:
+    """Run every combination of iterations and result sizes."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "scenarios": [
+            run_scenario(count, size, repeat, latency)
+            for count in iterations
+            for size in result_bytes
+        ],
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument(
+        "--result-bytes", type=int, nargs="+", default=[1024, 256 * 1024]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Simulated model latency, seconds"
+    )
+    parser.add_argument("--output", help="JSON file to write, stdout by default")
+    args = parser.parse_args(argv)
+
+    report = json.dumps(
+        run(args.iterations, args.result_bytes, args.repeat, args.latency), indent=2
+    )
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
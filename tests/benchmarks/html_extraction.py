@@ -0,0 +1,165 @@
+"""HTML extraction benchmark.
+
+Times BeautifulSoupTool content extraction with the BeautifulSoup parsers
+and with the lxml fast path on a large page, and reports the speedup of the
+fast path as JSON, with the size of each extract type's output:
+
+    python tests/benchmarks/html_extraction.py --html saved_page.html
+
+Without --html, a synthetic Wikipedia-like article of --size bytes is used.
+Only parsing and extraction are timed, the page is never downloaded.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.append(str(Path(__file__).parent.parent.parent / "src"))
+
+from tools.beautifulsoup import BeautifulSoupTool  # noqa: E402
+from tools.lxml_extractor import FAST_PARSER  # noqa: E402
+from tools.page_cache import WebPage  # noqa: E402
+
+BASELINE_PARSERS = ["html.parser", "lxml"]
+
+SECTION = """<div class="mw-heading"><h2 id="section-{index}">Section {index}</h2></div>
+<p>The <b>subject</b> of section {index} is described in <a href="/wiki/Topic_{index}"
+title="Topic {index}">topic {index}</a>, with a reference<sup class="reference">
+<a href="#cite_note-{index}">[{index}]</a></sup> and <i>emphasis</i> across a long
+paragraph that wraps over several lines of text, as article bodies do.</p>
+<figure><img src="//upload.example.org/{index}.png" alt="Figure {index}" width="220">
+<figcaption>Caption of figure {index}</figcaption></figure>
+<ul><li><a href="/wiki/Item_{index}_a">Item A</a> with details</li>
+<li>Item B with <code>inline_code()</code></li><li>Item C</li></ul>
+<table class="wikitable"><tr><th>Key</th><th>Value</th></tr>
+<tr><td>alpha</td><td>{index}</td></tr><tr><td>beta</td><td>{index}</td></tr></table>
+<blockquote><p>A quotation from source {index}.</p></blockquote>
+<pre>print("example {index}")</pre>
+<!-- comment {index} -->
+<script>var config{index} = {{"section": {index}}};</script>
+"""
+
+NAVIGATION = (
+    '<header class="vector-header"><nav id="p-navigation"><ul>'
+    + "".join(f'<li><a href="/wiki/Portal_{i}">Portal {i}</a></li>' for i in range(200))
+    + '</ul></nav></header><div class="vector-sidebar"><ul>'
+    + "".join(f'<li><a href="/wiki/Tool_{i}">Tool {i}</a></li>' for i in range(200))
+    + "</ul></div>"
+)
+FOOTER = (
+    '<footer id="footer"><ul>'
+    + "".join(f'<li><a href="/wiki/Policy_{i}">Policy {i}</a></li>' for i in range(100))
+    + "</ul></footer>"
+)
+
+
+def synthetic_page(size: int) -> str:
+    """A Wikipedia-like article of about size bytes."""
+    sections = []
+    total = 0
+    index = 0
+    while total < size:
+        section = SECTION.format(index=index)
+        sections.append(section)
+        total += len(section)
+        index += 1
+    return (
+        "<!DOCTYPE html><html><head><title>Article</title>"
+        "<style>.mw-heading { font-weight: bold; }</style></head>"
+        "<body>" + NAVIGATION + '<div id="content"><h1>Article</h1>'
+        + "".join(sections)
+        + "</div>" + FOOTER + "</body></html>"
+    )
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "mean": statistics.mean(values),
+    }
+
+
+def time_extraction(
+    tool: BeautifulSoupTool, html: str, parser: str, extract_type: str, repeat: int
+) -> tuple[list[float], Any]:
+    """Seconds taken by each extraction, and the last extracted content."""
+    page = WebPage(url="https://example.com/article", body=html)
+    durations = []
+    content = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        content = tool._extract_page(page, parser, extract_type)
+        durations.append(time.perf_counter() - start)
+    return durations, content
+
+
+def run(html: str, extract_types: list[str], repeat: int = 3) -> dict[str, Any]:
+    """Time every parser on every extract type."""
+    tool = BeautifulSoupTool()
+    results = []
+    for extract_type in extract_types:
+        fast, fast_content = time_extraction(
+            tool, html, FAST_PARSER, extract_type, repeat
+        )
+        parsers = {FAST_PARSER: summarize(fast)}
+        speedup = {}
+        same_output = {}
+        for parser in BASELINE_PARSERS:
+            durations, content = time_extraction(
+                tool, html, parser, extract_type, repeat
+            )
+            parsers[parser] = summarize(durations)
+            speedup[parser] = (
+                parsers[parser]["median"] / parsers[FAST_PARSER]["median"]
+            )
+            same_output[parser] = content == fast_content
+        results.append(
+            {
+                "extract_type": extract_type,
+                "output_chars": len(fast_content),
+                "parsers": parsers,
+                "speedup": speedup,
+                "same_output": same_output,
+            }
+        )
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "page_bytes": len(html.encode("utf-8")),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--html", help="HTML file to extract, synthetic page by default")
+    parser.add_argument(
+        "--size", type=int, default=2 * 1024 * 1024, help="Synthetic page size, bytes"
+    )
+    parser.add_argument(
+        "--extract-types", nargs="+", default=["markdown", "main_content", "text", "links"]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file to write, stdout by default")
+    args = parser.parse_args(argv)
+
+    if args.html:
+        html = Path(args.html).read_text(encoding="utf-8", errors="replace")
+    else:
+        html = synthetic_page(args.size)
+    report = json.dumps(run(html, args.extract_types, args.repeat), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
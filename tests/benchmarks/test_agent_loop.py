@@ -0,0 +1,32 @@
+import json
+
+from tests.benchmarks import agent_loop
+
+
+class TestAgentLoopBenchmark:
+    def test_reports_phase_percentiles(self, tmp_path):
+        output = tmp_path / "agent_loop.json"
+
+        agent_loop.main(
+            [
+                "--iterations", "1", "3",
+                "--result-bytes", "2048",
+                "--repeat", "2",
+                "--output", str(output),
+            ]
+        )
+
+        report = json.loads(output.read_text())
+        assert [s["iterations"] for s in report["scenarios"]] == [1, 3]
+        scenario = report["scenarios"][1]
+        assert set(scenario["phases"]) == {*agent_loop.PHASES, "prompt_building"}
+        for timings in scenario["phases"].values():
+            assert 0 <= timings["p50"] <= timings["p95"]
+        assert scenario["phases"]["tools"]["total"] > 0
+        assert scenario["phases"]["model"]["total"] > 0
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+
+        assert agent_loop.percentile(values, 50) == 50
+        assert agent_loop.percentile(values, 95) == 95
@@ -0,0 +1,24 @@
+import json
+
+from tests.benchmarks import html_extraction
+
+
+class TestHtmlExtractionBenchmark:
+    def test_reports_speedup(self, tmp_path):
+        output = tmp_path / "html_extraction.json"
+
+        html_extraction.main(
+            [
+                "--size", "20000",
+                "--extract-types", "markdown", "text",
+                "--repeat", "2",
+                "--output", str(output),
+            ]
+        )
+
+        report = json.loads(output.read_text())
+        assert report["page_bytes"] >= 20000
+        assert [r["extract_type"] for r in report["results"]] == ["markdown", "text"]
+        for result in report["results"]:
+            assert set(result["speedup"]) == set(html_extraction.BASELINE_PARSERS)
+            assert all(result["same_output"].values())
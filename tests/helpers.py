@@ -0,0 +1,49 @@
+"""Scripted model responses and stub tools shared by the tests and benchmarks."""
+
+from typing import List
+
+from models.tool import Tool, ToolArgument
+
+ACTION_TEMPLATE = """```xml
+<response>
+    <thought>
+        <reasoning><![CDATA[Fetch part {index}.]]></reasoning>
+        <to_do>
+            <step>
+                <name>fetch_{index}</name>
+                <description><![CDATA[Fetch part {index}]]></description>
+                <reason><![CDATA[Needed for the answer]]></reason>
+            </step>
+        </to_do>
+    </thought>
+    <action>
+        <step_name>fetch_{index}</step_name>
+        <tool_name>StubTool</tool_name>
+        <reason><![CDATA[Fetch]]></reason>
+        <arguments>
+            <part><![CDATA[{index}]]></part>
+        </arguments>
+    </action>
+</response>
+```"""
+
+FINAL_RESPONSE = """```xml
+<response>
+    <thought><![CDATA[All parts fetched.]]></thought>
+    <final_answer><![CDATA[Done]]></final_answer>
+</response>
+```"""
+
+
+class StubTool(Tool):
+    name: str = "StubTool"
+    description: str = "Return a result of a fixed size."
+    arguments: List[ToolArgument] = [
+        ToolArgument(name="part", type="string", description="Part to fetch")
+    ]
+    need_validation: bool = False
+    result_bytes: int = 1024
+
+    def execute(self, part: str) -> str:
+        line = f"part {part} line\n"
+        return (line * (self.result_bytes // len(line) + 1))[: self.result_bytes]
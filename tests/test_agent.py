@@ -0,0 +1,654 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import List
+
+import pytest
+from core.agent import Agent, AgentState, UnresolvedVariableError
+from core.async_agent import AsyncAgent
+from models.pydantic_to_xml import PydanticToXMLSerializer
+from models.response import Action
+from models.responsestats import ResponseStats
+from models.tool import Tool, ToolArgument
+from tools.user_input import UserInputTool
+
+ACTION_RESPONSE = """```xml
+<response>
+    <thought>
+        <reasoning>Echo the message first.</reasoning>
+        <to_do>
+            <step>
+                <name>echo_message</name>
+                <description><![CDATA[Echo the message]]></description>
+                <reason><![CDATA[Needed for the answer]]></reason>
+            </step>
+        </to_do>
+    </thought>
+    <action>
+        <step_name>echo_message</step_name>
+        <tool_name>EchoTool</tool_name>
+        <reason><![CDATA[Echo]]></reason>
+        <arguments>
+            <text><![CDATA[hello]]></text>
+        </arguments>
+    </action>
+</response>
+```"""
+
+FINAL_RESPONSE = """```xml
+<response>
+    <thought><![CDATA[Done.]]></thought>
+    <final_answer><![CDATA[The echo was $echo_message$]]></final_answer>
+</response>
+```"""
+
+
+class ScriptedModel:
+    """Model stub returning scripted contents in order."""
+
+    def __init__(self, contents: List[str]):
+        self.contents = list(contents)
+
+    def generate(self, prompt: str, on_delta=None) -> ResponseStats:
+        stats = ResponseStats(
+            content=self.contents.pop(0),
+            prompt_tokens=10,
+            completion_tokens=5,
+            total_tokens=15,
+            tokens_per_second=0.0,
+            execution_time=0.0,
+        )
+        if on_delta is not None:
+            for i in range(0, len(stats.content), 16):
+                on_delta(stats.content[i : i + 16])
+        return stats
+
+    async def agenerate(self, prompt: str, on_delta=None) -> ResponseStats:
+        await asyncio.sleep(0.01)
+        return self.generate(prompt, on_delta)
+
+
+class EchoTool(Tool):
+    name: str = "EchoTool"
+    description: str = "Echo the given text."
+    arguments: List[ToolArgument] = [
+        ToolArgument(name="text", type="string", description="Text to echo")
+    ]
+    need_validation: bool = False
+
+    def execute(self, text: str) -> str:
+        return f"echo: {text}"
+
+
+@pytest.fixture()
+def _no_input(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("headless agent must not wait for input")
+
+    monkeypatch.setattr("builtins.input", fail)
+
+
+class TestHeadlessAgent:
+    @pytest.mark.usefixtures("_no_input")
+    def test_runs_without_interaction(self, capsys):
+        events = []
+        agent = Agent(
+            ScriptedModel([ACTION_RESPONSE, FINAL_RESPONSE]),
+            headless=True,
+            event_handler=events.append,
+        )
+        agent.register(EchoTool())
+
+        answer = agent.execute("Echo hello")
+
+        assert answer == "The echo was $echo_message$"
+        assert agent.state == AgentState.COMPLETE
+        assert agent.step_results == {"echo_message": "echo: hello"}
+        assert capsys.readouterr().out == ""
+
+        types = [event.type for event in events]
+        assert types[0] == "execution_started"
+        assert "tool_dispatched_early" in types
+        assert types.index("tool_dispatched_early") < types.index("llm_response")
+        assert types.count("tool_started") == 1
+        assert types[-1] == "execution_finished"
+
+    @pytest.mark.usefixtures("_no_input")
+    def test_validation_refused_without_handler(self):
+        agent = Agent(ScriptedModel([ACTION_RESPONSE, FINAL_RESPONSE]), headless=True)
+        tool = EchoTool()
+        tool.need_validation = True
+        agent.register(tool)
+
+        agent.execute("Echo hello")
+
+        assert agent.step_results == {"echo_message": "Action not approved by user"}
+
+    @pytest.mark.usefixtures("_no_input")
+    def test_validation_uses_approval_handler(self):
+        agent = Agent(
+            ScriptedModel([ACTION_RESPONSE, FINAL_RESPONSE]),
+            headless=True,
+            approval_handler=lambda tool_name, action: True,
+        )
+        tool = EchoTool()
+        tool.need_validation = True
+        agent.register(tool)
+
+        agent.execute("Echo hello")
+
+        assert agent.step_results == {"echo_message": "echo: hello"}
+
+    def test_user_input_refused(self, monkeypatch):
+        prompts = []
+        monkeypatch.setattr("builtins.input", lambda *args: prompts.append(args) or "")
+        user_input_response = ACTION_RESPONSE.replace(
+            "<tool_name>EchoTool</tool_name>", "<tool_name>UserInputTool</tool_name>"
+        ).replace("<text>", "<prompt>").replace("</text>", "</prompt>")
+        agent = Agent(
+            ScriptedModel([user_input_response, FINAL_RESPONSE]),
+            headless=True,
+            approval_handler=lambda tool_name, action: True,
+        )
+        agent.register(UserInputTool())
+
+        agent.execute("Ask the user")
+
+        assert prompts == []
+        assert agent.step_results == {
+            "echo_message": "Error: No user input is available in headless mode"
+        }
+
+
+class TestAsyncAgent:
+    @pytest.mark.usefixtures("_no_input")
+    def test_concurrent_sessions(self):
+        tool_threads = set()
+
+        class ThreadEchoTool(EchoTool):
+            def execute(self, text: str) -> str:
+                tool_threads.add(threading.current_thread().name)
+                return super().execute(text)
+
+        def make_agent() -> AsyncAgent:
+            agent = AsyncAgent(ScriptedModel([ACTION_RESPONSE, FINAL_RESPONSE]))
+            agent.register(ThreadEchoTool())
+            return agent
+
+        agents = [make_agent() for _ in range(5)]
+
+        async def run_all():
+            return await asyncio.gather(
+                *(agent.aexecute("Echo hello") for agent in agents)
+            )
+
+        answers = asyncio.run(run_all())
+
+        assert answers == ["The echo was $echo_message$"] * 5
+        assert all(agent.step_results == {"echo_message": "echo: hello"} for agent in agents)
+        assert all(name.startswith("agent-tool") for name in tool_threads)
+
+    @pytest.mark.usefixtures("_no_input")
+    def test_native_async_tool_is_awaited(self):
+        class AsyncEchoTool(EchoTool):
+            async def aexecute(self, text: str) -> str:
+                return f"async echo: {text}"
+
+        agent = AsyncAgent(ScriptedModel([ACTION_RESPONSE, FINAL_RESPONSE]))
+        agent.register(AsyncEchoTool())
+
+        asyncio.run(agent.aexecute("Echo hello"))
+
+        assert agent.step_results == {"echo_message": "async echo: hello"}
+
+
+FAN_OUT_RESPONSE = """```xml
+<response>
+    <thought>
+        <reasoning>Search three sources then summarize.</reasoning>
+        <to_do>
+            <step>
+                <name>search_a</name>
+                <description>Search a</description>
+                <reason>Source a</reason>
+            </step>
+            <step>
+                <name>search_b</name>
+                <description>Search b</description>
+                <reason>Source b</reason>
+                <tool_name>BarrierTool</tool_name>
+                <arguments><text>b</text></arguments>
+            </step>
+            <step>
+                <name>search_c</name>
+                <description>Search c</description>
+                <reason>Source c</reason>
+                <tool_name>BarrierTool</tool_name>
+                <arguments><text>c</text></arguments>
+            </step>
+            <step>
+                <name>summarize</name>
+                <description>Summarize</description>
+                <reason>Answer</reason>
+                <depends_on_steps>
+                    <step_name>search_a</step_name>
+                    <step_name>search_b</step_name>
+                    <step_name>search_c</step_name>
+                </depends_on_steps>
+                <tool_name>EchoTool</tool_name>
+                <arguments><text>$search_a$|$search_b$|$search_c$</text></arguments>
+            </step>
+            <step>
+                <name>blocked</name>
+                <description>Needs a missing result</description>
+                <reason>Later</reason>
+                <depends_on_steps><step_name>not_run_yet</step_name></depends_on_steps>
+                <tool_name>EchoTool</tool_name>
+                <arguments><text>never</text></arguments>
+            </step>
+        </to_do>
+    </thought>
+    <action>
+        <step_name>search_a</step_name>
+        <tool_name>BarrierTool</tool_name>
+        <arguments><text>a</text></arguments>
+    </action>
+</response>
+```"""
+
+
+class TestParallelSteps:
+    @pytest.mark.usefixtures("_no_input")
+    def test_ready_steps_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        class BarrierTool(EchoTool):
+            name: str = "BarrierTool"
+
+            def execute(self, text: str) -> str:
+                barrier.wait()
+                return text
+
+        model = ScriptedModel([FAN_OUT_RESPONSE, FINAL_RESPONSE])
+        agent = Agent(model, headless=True)
+        agent.register(EchoTool())
+        agent.register(BarrierTool())
+
+        agent.execute("Search three sources then summarize")
+
+        assert agent.current_iteration == 2
+        assert agent.step_results == {
+            "search_a": "a",
+            "search_b": "b",
+            "search_c": "c",
+            "summarize": "echo: a|b|c",
+        }
+        assert [step.name for step in agent.done_steps] == [
+            "search_a",
+            "search_b",
+            "search_c",
+            "summarize",
+        ]
+        assert [step.name for step in agent.to_do_steps] == ["blocked"]
+
+    @pytest.mark.usefixtures("_no_input")
+    def test_step_waits_for_referenced_variable(self):
+        events = []
+        model = ScriptedModel([UNLISTED_DEPENDENCY_RESPONSE, FINAL_RESPONSE])
+        agent = Agent(model, headless=True, event_handler=events.append)
+        agent.register(EchoTool())
+
+        agent.execute("Search then read")
+
+        assert [event.type for event in events].count("tool_error") == 0
+        assert set(agent.step_results) == {"search"}
+        assert [step.name for step in agent.done_steps] == ["search"]
+        assert [step.name for step in agent.to_do_steps] == ["read_page"]
+
+    @pytest.mark.usefixtures("_no_input")
+    def test_action_for_unnamed_step_runs_once(self):
+        events = []
+        model = ScriptedModel([RENAMED_STEP_RESPONSE, FINAL_RESPONSE])
+        agent = Agent(model, headless=True, event_handler=events.append)
+        agent.register(EchoTool())
+
+        agent.execute("Search")
+
+        assert [event.type for event in events].count("tool_started") == 1
+        assert [step.name for step in agent.done_steps] == ["search_python"]
+        assert agent.to_do_steps == []
+
+
+UNLISTED_DEPENDENCY_RESPONSE = """```xml
+<response>
+    <thought>
+        <reasoning>Search, then read the page found.</reasoning>
+        <to_do>
+            <step>
+                <name>search</name>
+                <description>Search</description>
+                <reason>Find the page</reason>
+            </step>
+            <step>
+                <name>read_page</name>
+                <description>Read the page</description>
+                <reason>Details</reason>
+                <tool_name>EchoTool</tool_name>
+                <arguments><text>$fetch_page$</text></arguments>
+            </step>
+        </to_do>
+    </thought>
+    <action>
+        <step_name>search</step_name>
+        <tool_name>EchoTool</tool_name>
+        <arguments><text>python</text></arguments>
+    </action>
+</response>
+```"""
+
+RENAMED_STEP_RESPONSE = """```xml
+<response>
+    <thought>
+        <reasoning>Search.</reasoning>
+        <to_do>
+            <step>
+                <name>search_python</name>
+                <description>Search python</description>
+                <reason>Find pages</reason>
+                <tool_name>EchoTool</tool_name>
+                <arguments><text>python</text></arguments>
+            </step>
+        </to_do>
+    </thought>
+    <action>
+        <step_name>search</step_name>
+        <tool_name>EchoTool</tool_name>
+        <arguments><text>python</text></arguments>
+    </action>
+</response>
+```"""
+
+
+MULTI_ACTION_RESPONSE = """```xml
+<response>
+    <thought>
+        <reasoning>Echo twice then join.</reasoning>
+        <to_do>
+            <step>
+                <name>first</name>
+                <description>First echo</description>
+                <reason>Needed</reason>
+            </step>
+        </to_do>
+    </thought>
+    <actions>
+        <action>
+            <step_name>first</step_name>
+            <tool_name>EchoTool</tool_name>
+            <arguments><text>one</text></arguments>
+        </action>
+        <action>
+            <step_name>second</step_name>
+            <tool_name>EchoTool</tool_name>
+            <arguments><text>two</text></arguments>
+        </action>
+        <action>
+            <step_name>joined</step_name>
+            <tool_name>EchoTool</tool_name>
+            <arguments><text>$first$ + $second$</text></arguments>
+        </action>
+    </actions>
+</response>
+```"""
+
+
+class TestMultiAction:
+    @pytest.mark.parametrize("agent_class", [Agent, AsyncAgent])
+    @pytest.mark.usefixtures("_no_input")
+    def test_actions_run_as_one_batch(self, agent_class):
+        agent = agent_class(
+            ScriptedModel([MULTI_ACTION_RESPONSE, FINAL_RESPONSE]), headless=True
+        )
+        agent.register(EchoTool())
+
+        if agent_class is AsyncAgent:
+            asyncio.run(agent.aexecute("Echo"))
+        else:
+            agent.execute("Echo")
+
+        assert agent.current_iteration == 2
+        assert agent.step_results == {
+            "first": "echo: one",
+            "second": "echo: two",
+            "joined": "echo: echo: one + echo: two",
+        }
+        assert [step.name for step in agent.done_steps] == ["first", "second", "joined"]
+        assert agent.to_do_steps == []
+
+
+ACTION_WITH_FINAL_ANSWER = """```xml
+<response>
+    <thought><![CDATA[Echo and answer.]]></thought>
+    <action>
+        <step_name>echo_message</step_name>
+        <tool_name>EchoTool</tool_name>
+        <arguments><text><![CDATA[hello]]></text></arguments>
+    </action>
+    <final_answer><![CDATA[Done]]></final_answer>
+</response>
+```"""
+
+FINAL_ANSWER_THEN_ACTION = """```xml
+<response>
+    <thought><![CDATA[Answer.]]></thought>
+    <final_answer><![CDATA[Done]]></final_answer>
+    <action>
+        <step_name>echo_message</step_name>
+        <tool_name>EchoTool</tool_name>
+        <arguments><text><![CDATA[hello]]></text></arguments>
+    </action>
+</response>
+```"""
+
+
+class TestEarlyDispatch:
+    @pytest.mark.parametrize("agent_class", [Agent, AsyncAgent])
+    @pytest.mark.usefixtures("_no_input")
+    def test_action_with_final_answer_keeps_result(self, agent_class):
+        events = []
+        agent = agent_class(
+            ScriptedModel([ACTION_WITH_FINAL_ANSWER]),
+            headless=True,
+            event_handler=events.append,
+        )
+        agent.register(EchoTool())
+
+        if agent_class is AsyncAgent:
+            answer = asyncio.run(agent.aexecute("Echo"))
+        else:
+            answer = agent.execute("Echo")
+
+        assert answer == "Done"
+        assert [event.type for event in events].count("tool_started") == 1
+        assert agent.step_results == {"echo_message": "echo: hello"}
+        assert agent._early_calls == {}
+
+    @pytest.mark.usefixtures("_no_input")
+    def test_no_dispatch_after_final_answer(self):
+        events = []
+        agent = Agent(
+            ScriptedModel([FINAL_ANSWER_THEN_ACTION]),
+            headless=True,
+            event_handler=events.append,
+        )
+        agent.register(EchoTool())
+
+        assert agent.execute("Echo") == "Done"
+        assert "tool_started" not in [event.type for event in events]
+
+    @pytest.mark.usefixtures("_no_input")
+    def test_fallback_action_reuses_early_call(self):
+        agent = Agent(model=None, headless=True)
+        agent.register(EchoTool())
+        streamed = Action(
+            step_name="echo", tool_name="EchoTool", arguments={"text": "hello"}
+        )
+        agent._dispatch_early(streamed, [])
+
+        reparsed = Action(
+            step_name="echo", tool_name=" echotool ", arguments={"text": "hello\n"}
+        )
+
+        assert agent._run_action(reparsed) == "echo: hello"
+        assert agent._early_calls == {}
+
+    @pytest.mark.parametrize("agent_class", [Agent, AsyncAgent])
+    @pytest.mark.usefixtures("_no_input")
+    def test_failed_generation_waits_for_early_calls(self, caplog, agent_class):
+        caplog.set_level(logging.WARNING, logger="core.agent")
+        finished = []
+
+        class SlowEchoTool(EchoTool):
+            def execute(self, text: str) -> str:
+                time.sleep(0.05)
+                finished.append(text)
+                return super().execute(text)
+
+        class FailingModel(ScriptedModel):
+            def generate(self, prompt, on_delta=None):
+                on_delta(ACTION_RESPONSE[: ACTION_RESPONSE.index("</action>") + 9])
+                raise RuntimeError("stream interrupted")
+
+        agent = agent_class(FailingModel([]), headless=True, max_iterations=1)
+        agent.register(SlowEchoTool())
+
+        if agent_class is AsyncAgent:
+            answer = asyncio.run(agent.aexecute("Echo"))
+        else:
+            answer = agent.execute("Echo")
+
+        assert "stream interrupted" in answer
+        assert finished == ["hello"]
+        assert agent._early_calls == {}
+        assert "Early call echo_message ran for a failed generation" in caplog.text
+
+
+class TestToolDescriptionCache:
+    def test_serialized_once_per_registration(self, monkeypatch):
+        calls = []
+        serialize = PydanticToXMLSerializer.serialize
+
+        def counting_serialize(obj, **kwargs):
+            calls.append(obj)
+            return serialize(obj, **kwargs)
+
+        monkeypatch.setattr(PydanticToXMLSerializer, "serialize", counting_serialize)
+        agent = Agent(ScriptedModel([]), headless=True)
+        agent.register(EchoTool())
+
+        first = agent._available_tools_description("xml")
+        assert agent._available_tools_description("xml") is first
+        assert len(calls) == 1
+
+        class OtherTool(EchoTool):
+            name: str = "OtherTool"
+
+        agent.register(OtherTool())
+
+        assert "OtherTool" in agent._available_tools_description("xml")
+        assert len(calls) == 3
+
+
+class TestPromptCaching:
+    @pytest.mark.usefixtures("_no_input")
+    def test_stable_prefix_sent_as_system_prompt(self):
+        calls = []
+
+        class CachingModel(ScriptedModel):
+            def generate(self, prompt, on_delta=None, system_prompt=None):
+                calls.append((system_prompt, prompt))
+                return super().generate(prompt, on_delta)
+
+        agent = Agent(
+            CachingModel([ACTION_RESPONSE, FINAL_RESPONSE]),
+            headless=True,
+            prompt_caching=True,
+        )
+        agent.register(EchoTool())
+
+        assert agent.execute("Echo hello") == "The echo was $echo_message$"
+        (first_system, first_turn), (second_system, second_turn) = calls
+        assert first_system == second_system
+        assert "<available_tools>" in first_system
+        assert "<available_tools>" not in first_turn
+        assert "Current date" not in first_system
+        assert first_turn != second_turn
+
+
+class TestInterpolation:
+    def test_replaces_each_occurrence_in_one_pass(self):
+        agent = Agent(model=None, headless=True)
+        variables = {"a": "$b$", "b": "B"}
+
+        text = agent._replace_interpolated_variables("$a$ $b$ $a$", variables)
+
+        assert text == "$b$ B $b$"
+
+    def test_large_values(self):
+        agent = Agent(model=None, headless=True)
+        page = "x" * 5_000_000
+
+        text = agent._replace_interpolated_variables("<$page$>", {"page": page})
+
+        assert len(text) == len(page) + 2
+
+    def test_unresolved_variables_raise(self):
+        agent = Agent(model=None, headless=True)
+
+        with pytest.raises(UnresolvedVariableError) as error:
+            agent._replace_interpolated_variables("$known$ $missing$", {"known": "k"})
+
+        assert error.value.variables == ["missing"]
+
+    @pytest.mark.usefixtures("_no_input")
+    def test_unresolved_variable_reported_as_tool_error(self):
+        events = []
+        agent = Agent(model=None, headless=True, event_handler=events.append)
+        agent.register(EchoTool())
+        action = Action(
+            step_name="echo", tool_name="EchoTool", arguments={"text": "$nope$"}
+        )
+
+        result = agent._handle_action(action)
+
+        assert "Unresolved variables: $nope$" in result
+        assert [event.type for event in events] == ["tool_error"]
+
+
+class TestSessionStats:
+    @pytest.mark.parametrize("agent_class", [Agent, AsyncAgent])
+    @pytest.mark.usefixtures("_no_input")
+    def test_returned_with_the_answer(self, agent_class):
+        events = []
+        agent = agent_class(
+            ScriptedModel([ACTION_RESPONSE, FINAL_RESPONSE]),
+            headless=True,
+            event_handler=events.append,
+        )
+        agent.register(EchoTool())
+
+        if agent_class is AsyncAgent:
+            answer, stats = asyncio.run(agent.aexecute_with_stats("Echo hello"))
+        else:
+            answer, stats = agent.execute_with_stats("Echo hello")
+
+        assert answer == "The echo was $echo_message$"
+        assert stats.llm_calls == 2
+        assert (stats.prompt_tokens, stats.completion_tokens) == (20, 10)
+        assert stats.total_tokens == 30
+        assert stats.tool_calls == 1
+        assert len(stats.prompt_chars_per_iteration) == 2
+        assert stats.prompt_chars_per_iteration[1] > stats.prompt_chars_per_iteration[0]
+        assert stats.total_time >= stats.model_time
+        assert events[-1].data["stats"]["llm_calls"] == 2
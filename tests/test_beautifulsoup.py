@@ -0,0 +1,197 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+import requests
+from bs4 import BeautifulSoup
+from tools.beautifulsoup import BeautifulSoupTool
+from tools.page_cache import PageCache
+from utility.sqlite_cache import SqliteCache
+
+from tests.test_page_cache import make_response
+
+
+class SlowSession:
+    """Session answering every URL after a delay, tracking concurrency per host."""
+
+    def __init__(self, delay=0.05, failures=(), delays=None):
+        self.delay = delay
+        self.failures = set(failures)
+        self.delays = delays or {}
+        self.active = {}
+        self.max_active = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        host = url.split("/")[2]
+        with self._lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.max_active[host] = max(self.max_active.get(host, 0), self.active[host])
+        try:
+            time.sleep(self.delays.get(url, self.delay))
+            if url in self.failures:
+                raise requests.ConnectionError("refused")
+            body = f"<html><body><h1>{url}</h1></body></html>".encode()
+            return make_response(200, body, **{"content-type": "text/html"})
+        finally:
+            with self._lock:
+                self.active[host] -= 1
+
+
+class TestBatchRead:
+    def test_results_and_errors_keyed_by_url(self):
+        session = SlowSession(failures={"https://b.example/down"})
+        tool = BeautifulSoupTool(session=session)
+        urls = ["https://a.example/1", "https://b.example/down", "https://a.example/1"]
+
+        batch = json.loads(tool.execute(urls=json.dumps(urls)))
+
+        assert batch["results"] == {"https://a.example/1": "# https://a.example/1"}
+        assert list(batch["errors"]) == ["https://b.example/down"]
+        assert "Network error" in batch["errors"]["https://b.example/down"]
+
+    def test_bounds_downloads_per_host(self):
+        session = SlowSession()
+        tool = BeautifulSoupTool(session=session, max_workers=8, max_per_host=2)
+        urls = [f"https://a.example/{i}" for i in range(6)] + [
+            f"https://b.example/{i}" for i in range(2)
+        ]
+
+        start = time.monotonic()
+        batch = tool.execute_many(urls)
+        elapsed = time.monotonic() - start
+
+        assert len(batch["results"]) == 8
+        assert session.max_active == {"a.example": 2, "b.example": 2}
+        # Three rounds of two downloads from a.example
+        assert elapsed < 6 * session.delay
+
+    def test_total_timeout_fails_pending_urls(self):
+        session = SlowSession(delay=0.01, delays={"https://a.example/slow": 1.0})
+        tool = BeautifulSoupTool(session=session)
+
+        batch = tool.execute_many(
+            ["https://a.example/fast", "https://a.example/slow"], total_timeout=0.3
+        )
+
+        assert list(batch["results"]) == ["https://a.example/fast"]
+        assert batch["errors"]["https://a.example/slow"].startswith("Error: Timed out")
+
+    def test_parses_url_lines(self):
+        urls = (
+            " https://a.example\n\nhttps://en.wikipedia.org/wiki/Washington,_D.C.\n"
+            "https://b.example/a,b/?ids=1,2 \nhttps://a.example"
+        )
+
+        assert BeautifulSoupTool._parse_urls(urls) == [
+            "https://a.example",
+            "https://en.wikipedia.org/wiki/Washington,_D.C.",
+            "https://b.example/a,b/?ids=1,2",
+        ]
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, body: bytes):
+        super().__init__(body)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def make_streamed_response(body: bytes, **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = CountingStream(body)
+    response.headers.update({"content-type": "text/html", **headers})
+    return response
+
+
+class StreamSession:
+    def __init__(self, response):
+        self.response = response
+        self.kwargs = {}
+
+    def get(self, url, **kwargs):
+        self.kwargs = kwargs
+        return self.response
+
+
+class TestSelectiveParsing:
+    PAGE = (
+        "<html><head><script>var a = '<a href=\"/fake\">';</script></head><body>"
+        '<p>Intro <a href="/one">One</a></p><img src="/i.png" alt="I">'
+        '<div><a href="/two"><b>Two</b></a><a>No href</a></div></body></html>'
+    )
+
+    @pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+    @pytest.mark.parametrize("extract_type", ["links", "images"])
+    def test_strained_parse_matches_full_parse(self, parser, extract_type):
+        tool = BeautifulSoupTool(session=SlowSession())
+        full = tool._extract_content(BeautifulSoup(self.PAGE, parser), extract_type)
+
+        strained = tool._parse(self.PAGE, parser, extract_type)
+
+        assert tool._extract_content(strained, extract_type) == full
+        assert {tag.name for tag in strained.find_all(recursive=False)} <= {"a", "img"}
+
+
+class TestMaxBytes:
+    def test_streams_and_stops_at_limit(self):
+        response = make_streamed_response(b"<html>" + b"x" * 500_000)
+        session = StreamSession(response)
+        tool = BeautifulSoupTool(session=session, max_bytes=100_000)
+
+        result = tool.execute("https://example.com")
+
+        assert result.startswith("Error: Page exceeds the limit of 100000 bytes")
+        assert session.kwargs["stream"] is True
+        assert response.raw.bytes_read < 500_000
+
+    def test_rejects_large_content_length(self):
+        response = make_streamed_response(b"", **{"content-length": "200000"})
+        tool = BeautifulSoupTool(session=StreamSession(response), max_bytes=100_000)
+
+        result = tool.execute("https://example.com")
+
+        assert result.startswith("Error: Page of 200000 bytes exceeds")
+        assert response.raw.bytes_read == 0
+
+    @pytest.mark.parametrize("cached", [False, True])
+    def test_rejects_other_content_types_unread(self, tmp_path, cached):
+        response = make_streamed_response(
+            b"%PDF" + b"x" * 100_000, **{"content-type": "application/pdf"}
+        )
+        page_cache = PageCache(SqliteCache(tmp_path / "pages.sqlite")) if cached else None
+        tool = BeautifulSoupTool(session=StreamSession(response), page_cache=page_cache)
+
+        result = tool.execute("https://example.com/paper.pdf")
+
+        assert result == "Error: Unexpected content type: application/pdf"
+        assert response.raw.bytes_read == 0
+        assert response.raw.closed
+
+    def test_page_cache_closes_failed_responses(self, tmp_path):
+        response = make_streamed_response(b"Not found")
+        response.status_code = 404
+        tool = BeautifulSoupTool(
+            session=StreamSession(response),
+            page_cache=PageCache(SqliteCache(tmp_path / "pages.sqlite")),
+        )
+
+        result = tool.execute("https://example.com/missing")
+
+        assert result.startswith("Error: Network error")
+        assert response.raw.closed
+
+    def test_reads_pages_within_limit(self):
+        body = b"<html><body><h1>Title</h1></body></html>"
+        tool = BeautifulSoupTool(
+            session=StreamSession(make_streamed_response(body)), max_bytes=len(body)
+        )
+
+        assert tool.execute("https://example.com") == "# Title"
@@ -0,0 +1,89 @@
+from core.agent import Agent
+from core.step_results import StepResults
+from utility.blob_store import BlobHandle, BlobStore
+
+
+class TestBlobStore:
+    def test_identical_texts_are_stored_once(self):
+        store = BlobStore()
+
+        first = store.put("large document")
+        second = store.put("large document")
+
+        assert first == second
+        assert store.stats()["blobs"] == 1
+        assert store.get(first) == "large document"
+
+    def test_spills_least_recently_used_to_disk(self, tmp_path):
+        store = BlobStore(max_memory_bytes=10, spill_dir=str(tmp_path))
+
+        old = store.put("old text\r\n")
+        new = store.put("new text")
+
+        assert (tmp_path / old.digest).exists()
+        assert store.stats()["memory_blobs"] == 1
+        assert store.get(old) == "old text\r\n"
+        assert store.get(new) == "new text"
+
+    def test_clear_removes_spilled_blobs(self, tmp_path):
+        store = BlobStore(max_memory_bytes=10, spill_dir=str(tmp_path))
+        old = store.put("old text\r\n")
+        store.put("new text")
+
+        store.clear()
+
+        assert not (tmp_path / old.digest).exists()
+        assert old not in store
+        assert store.stats() == {
+            "blobs": 0,
+            "memory_blobs": 0,
+            "memory_bytes": 0,
+            "total_bytes": 0,
+        }
+
+
+class TestAgentBlobStore:
+    def test_store_reused_across_executions(self):
+        agent = Agent(model=None, headless=True)
+        store = agent.blob_store
+        agent.step_results["page"] = "content"
+
+        agent._reset_state("next query")
+
+        assert agent.blob_store is store
+        assert store.stats()["blobs"] == 0
+        assert "page" not in agent.step_results
+
+    def test_shared_store_kept(self):
+        store = BlobStore()
+        handle = store.put("shared")
+        agent = Agent(model=None, headless=True, blob_store=store)
+
+        agent._reset_state("query")
+
+        assert agent.blob_store is store
+        assert handle in store
+
+
+class TestStepResults:
+    def test_keeps_handles_and_resolves_values(self):
+        results = StepResults(BlobStore())
+
+        results["page"] = "content"
+
+        assert isinstance(results.handle("page"), BlobHandle)
+        assert results["page"] == "content"
+        assert dict(results) == {"page": "content"}
+
+    def test_interpolation_reads_only_used_variables(self):
+        agent = Agent(model=None, headless=True)
+        agent.step_results["used"] = "value"
+        agent.step_results["unused"] = "other"
+        reads = []
+        get = agent.blob_store.get
+        agent.blob_store.get = lambda handle: reads.append(handle) or get(handle)
+
+        text = agent._replace_interpolated_variables("$used$!", agent.step_results)
+
+        assert text == "value!"
+        assert reads == [agent.step_results.handle("used")]
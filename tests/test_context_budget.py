@@ -0,0 +1,69 @@
+from core import context_budget
+from core.agent import Agent
+from core.context_budget import ContextBudget
+
+
+def words(n: int, word: str = "alpha") -> str:
+    return " ".join(f"{word}{i}" for i in range(n))
+
+
+class TestContextBudget:
+    def test_results_under_budget_are_unchanged(self):
+        budget = ContextBudget(1000)
+        results = {"a": "short", "b": "also short"}
+
+        assert budget.fit(results) == results
+
+    def test_oversized_result_is_truncated_to_head_and_tail(self):
+        budget = ContextBudget(400)
+        page = words(2000)
+
+        fitted = budget.fit({"page": page})["page"]
+
+        assert fitted.startswith("alpha0 ")
+        assert fitted.endswith("alpha1999")
+        assert "$page$ holds the full value" in fitted
+        assert budget.count(fitted) < budget.count(page)
+        assert budget.count(fitted) <= 400
+
+    def test_recent_results_are_kept_first(self):
+        budget = ContextBudget(300, max_entry_tokens=250)
+        results = {"old": words(500, "old"), "new": words(100, "new")}
+
+        fitted = budget.fit(results)
+
+        assert list(fitted) == ["old", "new"]
+        assert fitted["new"] == results["new"]
+        assert fitted["old"] != results["old"]
+        total = sum(budget.count(value) for value in fitted.values())
+        assert total <= 300
+
+    def test_results_beyond_budget_are_referenced(self):
+        budget = ContextBudget(100, max_entry_tokens=100)
+        results = {"first": words(300), "second": words(300)}
+
+        fitted = budget.fit(results)
+
+        assert fitted["first"].startswith("[")
+        assert "$first$" in fitted["first"]
+
+    def test_memoized_counts_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(context_budget, "MAX_MEMOIZED_COUNTS", 2)
+        budget = ContextBudget(100)
+
+        counts = [budget.count(text) for text in ["one", "two two", "three three three"]]
+
+        assert len(budget._counts) == 2
+        assert budget.count("one") == counts[0]
+
+
+class TestAgentContextBudget:
+    def test_prompt_view_is_budgeted_but_interpolation_is_exact(self):
+        agent = Agent(model=None, headless=True, context_token_budget=200)
+        page = words(3000)
+        agent.step_results = {"page": page}
+
+        prompt_view = agent._format_step_result_variables()
+
+        assert len(prompt_view) < len(page)
+        assert agent._replace_interpolated_variables("$page$", agent.step_results) == page
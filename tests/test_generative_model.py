@@ -0,0 +1,194 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from core import model_backend
+from core.generative_model import GenerativeModel
+from core.model_backend import RecordingBackend, ReplayBackend
+from utility.response_close_detector import ResponseCloseDetector
+
+STREAMED_TEXT = (
+    "Here is my answer:\n```xml\n<response><thought>Done</thought>"
+    "<final_answer>42</final_answer></response>\n```\nLet me know if you need more!"
+)
+
+
+def make_chunks(text: str, size: int = 4):
+    chunks = [
+        SimpleNamespace(
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i : i + size]))],
+            usage=None,
+        )
+        for i in range(0, len(text), size)
+    ]
+    usage = SimpleNamespace(prompt_tokens=10, completion_tokens=30, total_tokens=40)
+    return chunks + [SimpleNamespace(choices=[], usage=usage)]
+
+
+class TestStreaming:
+    def test_stream_stops_at_closing_tag(self, monkeypatch):
+        consumed = []
+
+        def fake_completion(**kwargs):
+            assert kwargs["stream"] is True
+            for chunk in make_chunks(STREAMED_TEXT):
+                consumed.append(chunk)
+                yield chunk
+
+        monkeypatch.setattr(model_backend, "completion", fake_completion)
+        model = GenerativeModel(model="gpt-4o", stream=True)
+
+        stats = model.generate("question")
+
+        assert stats.content.endswith("</response>\n```")
+        assert "Let me know" not in stats.content
+        assert len(consumed) < len(make_chunks(STREAMED_TEXT)) - 1
+        assert 0 <= stats.time_to_first_token <= stats.time_to_close_tag
+        assert stats.prompt_tokens > 0
+        assert stats.completion_tokens > 0
+
+    def test_async_stream_stops_at_closing_tag(self, monkeypatch):
+        class FakeStream:
+            def __init__(self):
+                self.chunks = iter(make_chunks(STREAMED_TEXT))
+                self.closed = False
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                try:
+                    return next(self.chunks)
+                except StopIteration:
+                    raise StopAsyncIteration from None
+
+            async def aclose(self):
+                self.closed = True
+
+        stream = FakeStream()
+
+        async def fake_acompletion(**kwargs):
+            return stream
+
+        monkeypatch.setattr(model_backend, "acompletion", fake_acompletion)
+        model = GenerativeModel(model="gpt-4o", stream=True)
+
+        stats = asyncio.run(model.agenerate("question"))
+
+        assert stats.content.endswith("</response>\n```")
+        assert stream.closed
+        assert stats.time_to_close_tag is not None
+
+
+CDATA_TEXT = (
+    "```xml\n<response><action><tool_name>FileWriterTool</tool_name><arguments>"
+    "<content><![CDATA[# Usage\n```python\nprint('</response>')\n```\n]]></content>"
+    "</arguments></action></response>\n```\nDone!"
+)
+
+
+class TestResponseCloseDetector:
+    @pytest.mark.parametrize("chunk_size", [1, 4, 10_000])
+    def test_markers_inside_cdata_are_content(self, chunk_size):
+        detector = ResponseCloseDetector()
+        for i in range(0, len(CDATA_TEXT), chunk_size):
+            if detector.feed(CDATA_TEXT[i : i + chunk_size]):
+                break
+
+        assert detector.content == CDATA_TEXT[: CDATA_TEXT.index("\nDone!")]
+
+    def test_closes_at_fence_outside_cdata(self):
+        detector = ResponseCloseDetector()
+
+        assert detector.feed("```xml\n<response><thought><![CDATA[ok]]></thought>\n```")
+        assert detector.content.endswith("</thought>\n```")
+
+
+class TestPromptCaching:
+    def test_system_prompt_marked_for_explicit_cache_providers(self):
+        model = GenerativeModel(model="anthropic/claude-3-5-sonnet-20240620")
+
+        kwargs = model._completion_kwargs([], "turn", system_prompt="tools")
+
+        system = kwargs["messages"][0]
+        assert system["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert system["content"][0]["text"].endswith("tools")
+
+    def test_system_prompt_plain_for_automatic_cache_providers(self):
+        model = GenerativeModel(model="gpt-4o")
+
+        kwargs = model._completion_kwargs([], "turn", system_prompt="tools")
+
+        assert kwargs["messages"][0]["content"] == f"{model.role}\ntools"
+        assert model._completion_kwargs([], "turn")["messages"][0]["content"] == (
+            model.role
+        )
+
+    def test_cached_prompt_tokens_reported(self, monkeypatch):
+        usage = SimpleNamespace(
+            prompt_tokens=1200,
+            completion_tokens=30,
+            total_tokens=1230,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+        )
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+            usage=usage,
+        )
+        monkeypatch.setattr(model_backend, "completion", lambda **kwargs: response)
+
+        stats = GenerativeModel(model="gpt-4o").generate("turn", system_prompt="tools")
+
+        assert stats.cached_prompt_tokens == 1024
+
+
+class TestReplayBackend:
+    def test_replays_scripted_responses(self):
+        backend = ReplayBackend(["first", "second"], prompt_tokens=100, completion_tokens=7)
+        model = GenerativeModel(model="gpt-4o", backend=backend)
+
+        assert model.generate("one").content == "first"
+        stats = model.generate("two")
+
+        assert stats.content == "second"
+        assert (stats.prompt_tokens, stats.completion_tokens) == (100, 7)
+        assert backend.calls[1]["messages"][-1]["content"] == "two"
+
+    def test_streams_with_simulated_latency(self):
+        backend = ReplayBackend(
+            [STREAMED_TEXT], latency=0.05, time_to_first_token=0.02, chunk_size=8
+        )
+        model = GenerativeModel(model="gpt-4o", backend=backend, stream=True)
+
+        stats = model.generate("question")
+
+        assert "Let me know" not in stats.content
+        assert stats.time_to_first_token >= 0.02
+        assert stats.completion_tokens > 0
+
+    def test_async_replay(self):
+        model = GenerativeModel(model="gpt-4o", backend=ReplayBackend(["async"]))
+
+        assert asyncio.run(model.agenerate("question")).content == "async"
+
+    def test_replays_recorded_responses(self, tmp_path):
+        path = str(tmp_path / "session.jsonl")
+        recorder = RecordingBackend(
+            path, ReplayBackend(["recorded"], prompt_tokens=12, completion_tokens=3)
+        )
+        GenerativeModel(model="gpt-4o", backend=recorder).generate("question")
+
+        replay = ReplayBackend.from_jsonl(path)
+        stats = GenerativeModel(model="gpt-4o", backend=replay).generate("question")
+
+        assert (stats.content, stats.prompt_tokens, stats.completion_tokens) == (
+            "recorded",
+            12,
+            3,
+        )
+
+    def test_raises_once_exhausted(self):
+        model = GenerativeModel(model="gpt-4o", backend=ReplayBackend([]))
+
+        with pytest.raises(IndexError):
+            model.generate("question")
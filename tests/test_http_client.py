@@ -0,0 +1,62 @@
+from unittest.mock import Mock
+
+import pytest
+import wikipedia.wikipedia
+from tools import http_client
+from tools.beautifulsoup import BeautifulSoupTool
+from tools.file_reader import FileReaderTool
+from tools.http_client import create_session, get_session
+from tools.wikipedia import WikipediaTool
+
+
+class TestHttpClient:
+    def test_tools_share_one_session(self):
+        assert BeautifulSoupTool()._session is get_session()
+        assert FileReaderTool()._session is get_session()
+
+    def test_pool_limits_and_retries(self):
+        adapter = create_session(pool_maxsize=3, retries=2).get_adapter("https://a.b")
+
+        assert adapter._pool_maxsize == 3
+        assert adapter._pool_block is True
+        assert adapter.max_retries.total == 2
+
+    def test_default_timeout(self, monkeypatch):
+        session = create_session(timeout=7)
+        send = Mock(side_effect=RuntimeError("sent"))
+        monkeypatch.setattr(session, "send", send)
+
+        with pytest.raises(RuntimeError):
+            session.get("https://example.com")
+
+        assert send.call_args.kwargs["timeout"] == 7
+
+    def test_file_reader_downloads_with_injected_session(self):
+        response = Mock(headers={"content-type": "text/plain"})
+        response.iter_content.return_value = [b"hello"]
+        session = Mock()
+        session.get.return_value = response
+
+        content = FileReaderTool(session=session).execute("https://example.com/a.txt")
+
+        assert content == "hello"
+        session.get.assert_called_once()
+
+    def test_set_session(self):
+        session = create_session()
+        previous = http_client.set_session(session)
+        try:
+            assert BeautifulSoupTool()._session is session
+        finally:
+            http_client.set_session(previous)
+
+    def test_wikipedia_uses_shared_session(self):
+        session = Mock()
+        previous = http_client.set_session(session)
+        try:
+            WikipediaTool()
+            wikipedia.wikipedia.requests.get("https://en.wikipedia.org/w/api.php")
+        finally:
+            http_client.set_session(previous)
+
+        session.get.assert_called_once_with("https://en.wikipedia.org/w/api.php")
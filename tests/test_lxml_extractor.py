@@ -0,0 +1,81 @@
+import pytest
+from bs4 import BeautifulSoup
+from tools import beautifulsoup, lxml_extractor
+from tools.beautifulsoup import BeautifulSoupTool
+from tools.lxml_extractor import FAST_PARSER
+
+from tests.test_page_cache import FakeSession, make_response
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Title</title><style>p { color: red; }</style></head>
+<body>
+<h1>Main  title</h1>
+<p>Intro with <a href="/wiki/Link">a <b>link</b></a> &amp; an entity.</p>
+<!-- a comment -->
+<div>Loose text <span>in a span</span><script>var x = 1;</script> after the script
+  <h2>Nested heading</h2>
+  <ul><li>One <ul><li>nested</li></ul></li><li>Two</li></ul>
+  <ol><li>First</li><li>Second</li></ol>
+</div>
+<img src="/image.png" alt="An image"><img alt="No source">
+<pre>code  block</pre>
+<p>Inline <code>call()</code> here.</p>
+<blockquote>Quoted
+text</blockquote>
+<a href="">empty</a>
+</body></html>
+"""
+
+XHTML_PAGE = """<?xml version="1.0" encoding="ISO-8859-1"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN"
+  "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml"><body><p>Café page</p></body></html>
+"""
+
+
+class TestLxmlExtractor:
+    @pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+    @pytest.mark.parametrize("extract_type", ["markdown", "text", "links", "images"])
+    def test_matches_beautifulsoup(self, parser, extract_type):
+        tool = BeautifulSoupTool(session=FakeSession())
+        expected = tool._extract_content(BeautifulSoup(PAGE, parser), extract_type)
+
+        assert lxml_extractor.extract(PAGE, extract_type) == expected
+
+    def test_markdown(self):
+        markdown = lxml_extractor.extract(PAGE, "markdown")
+
+        assert markdown.startswith("# Main title\n\nIntro with a link & an entity.")
+        assert markdown.endswith("> Quoted text\n\n[empty]()")
+        assert "comment" not in markdown
+        assert "var x" not in markdown
+        assert "Loose textin a spanafter the script## Nested heading" in markdown
+        assert "* One nested\n* Two\n\n1. First\n2. Second" in markdown
+
+    @pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+    @pytest.mark.parametrize("extract_type", ["markdown", "text", "links", "all"])
+    def test_empty_page(self, parser, extract_type):
+        tool = BeautifulSoupTool(session=FakeSession())
+        expected = tool._extract_content(BeautifulSoup("", parser), extract_type)
+
+        assert lxml_extractor.extract("", extract_type) == expected
+
+    def test_xhtml_with_encoding_declaration(self):
+        assert lxml_extractor.extract(XHTML_PAGE, "markdown") == "Café page"
+        assert lxml_extractor.extract(XHTML_PAGE, "text") == "Café page"
+
+    def test_invalid_extract_type(self):
+        assert lxml_extractor.extract(PAGE, "pdf").startswith("Error:")
+
+    def test_tool_uses_fast_parser(self, monkeypatch):
+        session = FakeSession(
+            make_response(200, PAGE.encode(), **{"content-type": "text/html"})
+        )
+        tool = BeautifulSoupTool(session=session)
+        monkeypatch.setattr(
+            beautifulsoup, "BeautifulSoup", lambda *args: pytest.fail("BeautifulSoup used")
+        )
+
+        content = tool.execute("https://example.com", parser=FAST_PARSER)
+
+        assert content.startswith("# Main title")
@@ -0,0 +1,80 @@
+import pytest
+from tools import lxml_extractor, main_content
+from tools.beautifulsoup import BeautifulSoupTool
+from tools.main_content import MAIN_CONTENT
+
+from tests.test_page_cache import FakeSession, make_response
+
+ARTICLE = """
+<h1>The headline</h1>
+<p>First paragraph of the story, with commas, clauses, and enough words to count.</p>
+<p>Second paragraph of the story, adding detail, context, and quotes from people.</p>
+<p>Third paragraph, with a <a href="/ref">reference</a> and more prose to be long enough.</p>
+"""
+
+PAGE = f"""<html><body>
+<header><a href="/">Home</a> <a href="/news">News</a></header>
+<nav><ul><li><a href="/a">Section A, with a long navigation label</a></li></ul></nav>
+<div id="wrapper">
+  <div class="sidebar"><p>Popular: <a href="/x">Some other story that is popular today</a></p></div>
+  <div class="article-body">{ARTICLE}</div>
+  <div class="related"><ul><li><a href="/r1">Related story number one, with a title</a></li></ul></div>
+</div>
+<footer>Copyright 2024, all rights reserved, terms, privacy, and contact details.</footer>
+</body></html>"""
+
+
+class TestMainContent:
+    def test_keeps_only_the_article(self):
+        extracted = main_content.extract(PAGE)
+
+        expected = lxml_extractor.extract(f"<html><body>{ARTICLE}</body></html>", "markdown")
+        assert extracted.markdown == expected
+        assert extracted.main_chars < extracted.page_chars
+        assert extracted.reduction == extracted.page_chars / extracted.main_chars
+
+    def test_keeps_pages_without_boilerplate(self):
+        page = f"<html><body><div>{ARTICLE}</div><p>A closing paragraph next to the article, long enough and without links to be kept.</p></body></html>"
+
+        extracted = main_content.extract(page)
+
+        assert extracted.markdown == lxml_extractor.extract(page, "markdown")
+        assert extracted.reduction == 1.0
+
+    def test_falls_back_to_body_without_text_blocks(self):
+        extracted = main_content.extract("<html><body><div>Short</div></body></html>")
+
+        assert extracted.markdown == "Short"
+
+    def test_xhtml_with_encoding_declaration(self):
+        page = f'<?xml version="1.0" encoding="utf-8"?>\n{PAGE}'
+
+        assert main_content.extract(page).markdown == main_content.extract(PAGE).markdown
+
+    def test_empty_page(self):
+        extracted = main_content.extract("")
+
+        assert (extracted.markdown, extracted.page_chars) == ("", 0)
+
+    def test_link_density(self):
+        element = lxml_extractor.parse(
+            '<html><body><div>text <a href="/">link</a></div></body></html>'
+        ).find("body/div")
+
+        assert main_content.link_density(element) == len("link") / len("text link")
+
+    @pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+    def test_tool_extract_type(self, parser):
+        page = f'<?xml version="1.0" encoding="utf-8"?>\n{PAGE}'
+        session = FakeSession(
+            make_response(200, page.encode(), **{"content-type": "text/html"})
+        )
+        tool = BeautifulSoupTool(session=session)
+
+        content = tool.execute(
+            "https://example.com", parser=parser, extract_type=MAIN_CONTENT
+        )
+
+        assert content.startswith("# The headline")
+        assert "Popular" not in content
+        assert "Copyright" not in content
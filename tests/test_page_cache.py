@@ -0,0 +1,103 @@
+import requests
+from tools import beautifulsoup
+from tools.beautifulsoup import BeautifulSoupTool
+from tools.page_cache import PageCache
+from utility.sqlite_cache import SqliteCache
+
+PAGE = b"<html><body><h1>Title</h1><p>Some text.</p></body></html>"
+
+
+def make_response(status: int, body: bytes = b"", **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response._content_consumed = True
+    response.headers.update(headers)
+    return response
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+
+def make_tool(tmp_path, session, fresh_for=0.0):
+    cache = PageCache(SqliteCache(tmp_path / "pages.sqlite"), fresh_for=fresh_for)
+    return BeautifulSoupTool(session=session, page_cache=cache)
+
+
+class TestPageCache:
+    def test_revalidates_with_validators_and_skips_parsing(self, tmp_path, monkeypatch):
+        session = FakeSession(
+            make_response(
+                200,
+                PAGE,
+                **{
+                    "content-type": "text/html",
+                    "etag": '"v1"',
+                    "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                },
+            ),
+            make_response(304),
+        )
+        tool = make_tool(tmp_path, session)
+
+        first = tool.execute("https://example.com", extract_type="markdown")
+        parses = []
+        monkeypatch.setattr(
+            beautifulsoup, "BeautifulSoup", lambda *args: parses.append(args)
+        )
+        second = tool.execute("https://example.com", extract_type="markdown")
+
+        assert first == second == "# Title\n\nSome text."
+        assert parses == []
+        assert session.requests[1]["If-None-Match"] == '"v1"'
+        assert session.requests[1]["If-Modified-Since"].startswith("Mon, 01 Jan")
+
+    def test_fresh_page_is_not_requested(self, tmp_path):
+        session = FakeSession(
+            make_response(
+                200, PAGE, **{"content-type": "text/html", "cache-control": "max-age=600"}
+            )
+        )
+        tool = make_tool(tmp_path, session)
+
+        tool.execute("https://example.com", extract_type="text")
+        text = tool.execute("https://example.com", extract_type="text")
+
+        assert text == "Title Some text."
+        assert len(session.requests) == 1
+
+    def test_changed_page_is_extracted_again(self, tmp_path):
+        session = FakeSession(
+            make_response(200, PAGE, **{"content-type": "text/html", "etag": '"v1"'}),
+            make_response(
+                200,
+                PAGE.replace(b"Some", b"New"),
+                **{"content-type": "text/html", "etag": '"v2"'},
+            ),
+        )
+        tool = make_tool(tmp_path, session)
+
+        tool.execute("https://example.com", extract_type="text")
+
+        assert tool.execute("https://example.com", extract_type="text") == "Title New text."
+
+    def test_cache_shared_across_tools(self, tmp_path):
+        response = make_response(
+            200, PAGE, **{"content-type": "text/html", "etag": '"v1"'}
+        )
+        make_tool(tmp_path, FakeSession(response), fresh_for=60).execute(
+            "https://example.com"
+        )
+        session = FakeSession()
+
+        content = make_tool(tmp_path, session, fresh_for=60).execute("https://example.com")
+
+        assert content == "# Title\n\nSome text."
+        assert session.requests == []
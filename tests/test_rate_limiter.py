@@ -0,0 +1,55 @@
+import time
+
+from tools.http_client import create_session
+from tools.rate_limiter import HostRateLimiter, TokenBucket
+
+
+class TestTokenBucket:
+    def test_burst_passes_without_waiting(self):
+        bucket = TokenBucket(rate=1.0, burst=3)
+
+        assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    def test_waits_once_burst_is_used(self):
+        bucket = TokenBucket(rate=10.0, burst=1)
+
+        assert bucket.reserve() == 0.0
+        assert 0.09 <= bucket.reserve() <= 0.1
+        # Callers queue behind each other
+        assert 0.19 <= bucket.reserve() <= 0.2
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket(rate=100.0, burst=1)
+        bucket.acquire()
+
+        time.sleep(0.02)
+
+        assert bucket.reserve() == 0.0
+
+
+class TestHostRateLimiter:
+    def test_hosts_have_separate_buckets(self):
+        limiter = HostRateLimiter(rate=1.0, burst=1, host_limits={})
+
+        assert limiter.acquire("https://a.example/page") == 0.0
+        assert limiter.acquire("https://b.example/page") == 0.0
+        assert limiter.bucket("https://a.example/other").reserve() > 0
+
+    def test_host_limits_apply_to_subdomains(self):
+        limiter = HostRateLimiter(host_limits={"wikipedia.org": (5.0, 10)})
+
+        bucket = limiter.bucket("https://en.wikipedia.org/w/api.php")
+
+        assert (bucket.rate, bucket.burst) == (5.0, 10)
+        assert limiter.bucket("other.org").burst == limiter.burst
+
+    def test_session_requests_are_rate_limited(self, monkeypatch):
+        limiter = HostRateLimiter(host_limits={})
+        acquired = []
+        monkeypatch.setattr(limiter, "acquire", acquired.append)
+        session = create_session(rate_limiter=limiter)
+        monkeypatch.setattr(session, "send", lambda request, **kwargs: request)
+
+        session.get("https://example.com/page")
+
+        assert acquired == ["https://example.com/page"]
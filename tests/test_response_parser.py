@@ -0,0 +1,139 @@
+import pytest
+from models.response_bs4_xml_parser import ResponseBs4XmlParser
+from models.response_stream_parser import ResponseStreamParser
+from models.response_xml_parser import ResponseXmlParser
+
+MULTI_ACTION_XML = """
+<response>
+    <thought>
+        <reasoning>Search two sources at once.</reasoning>
+        <to_do>
+            <step>
+                <name>search_wikipedia</name>
+                <description><![CDATA[Search Wikipedia]]></description>
+                <reason><![CDATA[Encyclopedic source]]></reason>
+            </step>
+            <step>
+                <name>search_web</name>
+                <description><![CDATA[Search the web]]></description>
+                <reason><![CDATA[Recent news]]></reason>
+            </step>
+        </to_do>
+    </thought>
+    <actions>
+        <action>
+            <step_name>search_wikipedia</step_name>
+            <tool_name>WikipediaTool</tool_name>
+            <reason><![CDATA[Background]]></reason>
+            <arguments>
+                <query><![CDATA[Prime Minister of France]]></query>
+            </arguments>
+        </action>
+        <action>
+            <step_name>search_web</step_name>
+            <tool_name>DuckDuckGoSearchTool</tool_name>
+            <reason><![CDATA[News]]></reason>
+            <arguments>
+                <query><![CDATA[Prime Minister of France news]]></query>
+            </arguments>
+        </action>
+    </actions>
+</response>
+"""
+
+
+@pytest.mark.parametrize("parser", [ResponseXmlParser, ResponseBs4XmlParser])
+class TestMultiActionParsing:
+    def test_actions_list(self, parser):
+        response = parser.parse(MULTI_ACTION_XML)
+
+        assert response.action is None
+        assert [action.step_name for action in response.get_actions()] == [
+            "search_wikipedia",
+            "search_web",
+        ]
+        assert response.actions[1].tool_name == "DuckDuckGoSearchTool"
+        assert response.actions[1].arguments == {
+            "query": "Prime Minister of France news"
+        }
+
+
+MALFORMED_XML = """Here is my answer:
+```xml
+<response>
+    <thought>
+        <reasoning>Check that 1 < 2 & 3 > 2.</reasoning>
+        <to_do>
+            <step>
+                <name>read_file</name>
+                <description><![CDATA[Read the file</description>
+                <reason><![CDATA]></reason>
+            </step>
+        </to_do>
+    </thought>
+    <action>
+        <step_name>read_file</step_name>
+        <tool_name>FileReaderTool</tool_name>
+        <reason><![CDATA[Need the <content>]]></reason>
+        <arguments>
+            <file_path><![CDATA[notes & todo.txt]]></file_path>
+        </arguments>
+    </action>
+</response>
+```
+Let me know if you need anything else."""
+
+
+class TestResponseStreamParser:
+    @pytest.mark.parametrize("chunk_size", [1, 5, 64, 10_000])
+    def test_repairs_malformed_xml(self, chunk_size):
+        parser = ResponseStreamParser()
+        for i in range(0, len(MALFORMED_XML), chunk_size):
+            parser.feed(MALFORMED_XML[i : i + chunk_size])
+        response = parser.close()
+
+        assert response.thought.reasoning == "Check that 1 < 2 & 3 > 2."
+        step = response.thought.to_do[0]
+        assert (step.description, step.reason) == ("Read the file", "")
+        assert response.action.reason == "Need the <content>"
+        assert response.action.arguments == {"file_path": "notes & todo.txt"}
+
+    def test_action_reported_at_closing_tag(self):
+        seen = []
+        parser = ResponseStreamParser(on_action=seen.append)
+        cut = MALFORMED_XML.index("</action>") + len("</action>")
+
+        parser.feed(MALFORMED_XML[: cut - 1])
+        assert seen == []
+        parser.feed(MALFORMED_XML[cut - 1 : cut])
+        assert [action.step_name for action in seen] == ["read_file"]
+        assert [step.name for step in parser.to_do] == ["read_file"]
+
+    def test_final_answer(self):
+        response = ResponseStreamParser.parse(
+            "<response><thought><![CDATA[Done]]></thought>"
+            "<final_answer><![CDATA[Paris]]></final_answer></response>"
+        )
+
+        assert response.thought.reasoning == "Done"
+        assert response.final_answer == "Paris"
+
+    def test_missing_response_raises(self):
+        with pytest.raises(ValueError, match="No response element"):
+            ResponseStreamParser.parse("I cannot answer that.")
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 10_000])
+    def test_response_close_tag_inside_cdata(self, chunk_size):
+        xml = (
+            "<response><thought><![CDATA[Write it]]></thought><action>"
+            "<step_name>write</step_name><tool_name>PythonTool</tool_name>"
+            "<reason><![CDATA[Run]]></reason><arguments>"
+            '<code><![CDATA[print("</response>")\nmore]]></code>'
+            "</arguments></action></response>\nTrailing </response> chatter"
+        )
+        parser = ResponseStreamParser()
+        for i in range(0, len(xml), chunk_size):
+            parser.feed(xml[i : i + chunk_size])
+        response = parser.close()
+
+        assert response.action.arguments == {"code": 'print("</response>")\nmore'}
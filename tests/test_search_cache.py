@@ -0,0 +1,210 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from tools import duckduckgo
+from tools.duckduckgo import DuckDuckGoSearchTool
+from tools.rate_limiter import HostRateLimiter
+from tools.search_cache import MemorySearchCache, SqliteSearchCache
+from utility.sqlite_cache import SqliteCache
+
+RESULTS = [{"text": "Python - a language", "href": "https://python.org", "summary": "S"}]
+
+
+class FakeDDGS:
+    def __init__(self, results=RESULTS):
+        self.results = results
+        self.queries = []
+
+    def text(self, query, max_results):
+        self.queries.append(query)
+        return iter(self.results)
+
+
+@pytest.fixture()
+def ddgs(monkeypatch):
+    fake = FakeDDGS()
+    monkeypatch.setattr(duckduckgo, "get_ddgs", lambda: fake)
+    limiter = HostRateLimiter(rate=1000, burst=1000, host_limits={})
+    monkeypatch.setattr(duckduckgo, "get_rate_limiter", lambda: limiter)
+    return fake
+
+
+class TestMemorySearchCache:
+    def test_expires_entries(self, monkeypatch):
+        cache = MemorySearchCache(ttl=10)
+        cache.put("engine", "query", 5, RESULTS)
+        assert cache.get("engine", "query", 5) == RESULTS
+
+        monkeypatch.setattr("tools.search_cache.time.time", lambda: 10**12)
+
+        assert cache.get("engine", "query", 5) is None
+
+    def test_evicts_least_recently_used(self):
+        cache = MemorySearchCache(maxsize=2)
+        cache.put("engine", "a", 5, RESULTS)
+        cache.put("engine", "b", 5, RESULTS)
+        cache.get("engine", "a", 5)
+        cache.put("engine", "c", 5, RESULTS)
+
+        assert cache.get("engine", "b", 5) is None
+        assert cache.get("engine", "a", 5) == RESULTS
+        assert cache.stats()["entries"] == 2
+
+    def test_normalizes_queries(self):
+        cache = MemorySearchCache()
+        cache.put("engine", "Python  Language", 5, RESULTS)
+
+        assert cache.get("engine", " python language ", 5) == RESULTS
+        assert cache.get("engine", "python language", 10) is None
+        assert cache.stats()["hit_rate"] == 0.5
+
+
+class TestSqliteSearchCache:
+    def test_shared_between_processes(self, tmp_path):
+        path = tmp_path / "search.sqlite"
+        writer = SqliteSearchCache(SqliteCache(path, ttl=60))
+        reader = SqliteSearchCache(SqliteCache(path, ttl=60))
+
+        writer.put("engine", "query", 5, RESULTS)
+
+        assert reader.get("engine", "query", 5) == RESULTS
+        assert reader.stats()["hits"] == 1
+        assert reader.stats()["entries"] == 1
+
+
+class TestDuckDuckGoSearchCache:
+    def test_searches_once(self, ddgs, tmp_path):
+        cache = SqliteSearchCache(SqliteCache(tmp_path / "search.sqlite"))
+        tool = DuckDuckGoSearchTool(search_cache=cache)
+
+        first = tool.execute("python")
+        second = DuckDuckGoSearchTool(search_cache=cache).execute("Python")
+
+        assert first == second
+        assert "https://python.org" in first
+        assert ddgs.queries == ["python"]
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_does_not_cache_empty_results(self, ddgs):
+        ddgs.results = []
+        tool = DuckDuckGoSearchTool(search_cache=MemorySearchCache())
+
+        tool.execute("nothing")
+        tool.execute("nothing")
+
+        assert ddgs.queries == ["nothing", "nothing"]
+
+
+class MultiDDGS:
+    def __init__(self, results_by_query, failing=()):
+        self.results_by_query = results_by_query
+        self.failing = set(failing)
+        self.queries = []
+
+    def text(self, query, max_results):
+        self.queries.append(query)
+        if query in self.failing:
+            raise RuntimeError("throttled")
+        return iter(self.results_by_query[query][:max_results])
+
+
+def result(href):
+    return {"text": f"Title {href} - site", "href": href, "summary": "S"}
+
+
+@pytest.fixture()
+def multi_ddgs(monkeypatch):
+    fake = MultiDDGS(
+        {
+            "python asyncio": [result("https://a.example/"), result("https://b.example")],
+            "asyncio tutorial": [result("https://c.example"), result("https://www.a.example")],
+            "asyncio guide": [result("https://d.example")],
+        },
+        failing={"broken"},
+    )
+    monkeypatch.setattr(duckduckgo, "get_ddgs", lambda: fake)
+    limiter = HostRateLimiter(rate=1000, burst=1000, host_limits={})
+    monkeypatch.setattr(duckduckgo, "get_rate_limiter", lambda: limiter)
+    return fake
+
+
+class TestDuckDuckGoBatch:
+    def test_merges_deduplicates_and_ranks(self, multi_ddgs):
+        tool = DuckDuckGoSearchTool(search_cache=MemorySearchCache())
+
+        results, errors = tool.search_many(
+            ["python asyncio", "asyncio tutorial", "asyncio guide"], 10
+        )
+
+        assert [r["href"] for r in results] == [
+            "https://a.example/",
+            "https://c.example",
+            "https://d.example",
+            "https://b.example",
+        ]
+        assert results[0]["queries"] == ["python asyncio", "asyncio tutorial"]
+        assert errors == {}
+
+    def test_execute_with_queries(self, multi_ddgs):
+        tool = DuckDuckGoSearchTool(search_cache=MemorySearchCache())
+
+        output = tool.execute(
+            queries='["python asyncio", "Python  asyncio", "broken"]',
+            number_of_articles="2",
+        )
+
+        assert sorted(multi_ddgs.queries) == ["broken", "python asyncio"]
+        assert output.startswith("1. Title https://a.example/")
+        assert "Found by: python asyncio" in output
+        assert "2. Title https://b.example" in output
+        assert output.endswith("Failed queries:\n- broken: throttled")
+
+    def test_all_queries_failing(self, multi_ddgs):
+        tool = DuckDuckGoSearchTool(search_cache=MemorySearchCache())
+
+        with pytest.raises(duckduckgo.DuckDuckGoAPIError):
+            tool.execute(queries="broken")
+
+    def test_searches_concurrently(self, multi_ddgs, monkeypatch):
+        # Each search waits for the other one, so they only finish together
+        barrier = threading.Barrier(2, timeout=5)
+        text = multi_ddgs.text
+
+        def text_together(query, max_results):
+            barrier.wait()
+            return text(query, max_results)
+
+        monkeypatch.setattr(multi_ddgs, "text", text_together)
+        tool = DuckDuckGoSearchTool(search_cache=MemorySearchCache())
+
+        results, errors = tool.search_many(["python asyncio", "asyncio guide"], 10)
+
+        assert errors == {}
+        assert len(results) == 3
+
+    def test_one_client_per_thread(self, monkeypatch):
+        monkeypatch.setattr(duckduckgo, "DDGS", object)
+        monkeypatch.setattr(duckduckgo, "_ddgs_local", threading.local())
+        clients = []
+        thread = threading.Thread(target=lambda: clients.append(duckduckgo.get_ddgs()))
+        thread.start()
+        thread.join()
+
+        assert duckduckgo.get_ddgs() is duckduckgo.get_ddgs()
+        assert duckduckgo.get_ddgs() is not clients[0]
+
+
+class TestSearchCacheStats:
+    def test_counts_concurrent_lookups(self):
+        cache = MemorySearchCache()
+        cache.put("engine", "cached", 10, [result("https://a.example")])
+
+        def lookup(i):
+            cache.get("engine", "cached" if i % 2 else f"missing {i}", 10)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lookup, range(2000)))
+
+        assert cache.stats()["hits"] == 1000
+        assert cache.stats()["misses"] == 1000
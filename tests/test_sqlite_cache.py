@@ -0,0 +1,81 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from core import model_backend
+from core.generative_model import GenerativeModel
+from utility.sqlite_cache import SqliteCache
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    return SqliteCache(tmp_path / "cache.sqlite")
+
+
+class TestSqliteCache:
+    def test_hit_and_miss_counters(self, cache):
+        assert cache.get("key") is None
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_expired_entries_are_misses(self, tmp_path, monkeypatch):
+        cache = SqliteCache(tmp_path / "cache.sqlite", ttl=10)
+        cache.set("key", "value")
+
+        later = time.time() + 11
+        monkeypatch.setattr("utility.sqlite_cache.time.time", lambda: later)
+
+        assert cache.get("key") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path, monkeypatch):
+        clock = iter(range(100))
+        monkeypatch.setattr("utility.sqlite_cache.time.time", lambda: next(clock))
+        cache = SqliteCache(tmp_path / "cache.sqlite", max_bytes=10)
+
+        cache.set("a", "aaaa")
+        cache.set("b", "bbbb")
+        cache.get("a")
+        cache.set("c", "cccc")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "aaaa"
+        assert cache.get("c") == "cccc"
+
+    def test_shared_between_instances(self, tmp_path):
+        SqliteCache(tmp_path / "cache.sqlite").set("key", "value")
+
+        assert SqliteCache(tmp_path / "cache.sqlite").get("key") == "value"
+
+
+class TestGenerativeModelCache:
+    def test_identical_requests_hit_the_cache(self, cache, monkeypatch):
+        calls = []
+
+        def fake_completion(**kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="answer"))],
+                usage=SimpleNamespace(
+                    prompt_tokens=10, completion_tokens=5, total_tokens=15
+                ),
+            )
+
+        monkeypatch.setattr(model_backend, "completion", fake_completion)
+        model = GenerativeModel(model="test/model", cache=cache)
+
+        first = model.generate("question")
+        second = model.generate("question")
+        model.temperature = 0.1
+        model.generate("question")
+
+        assert len(calls) == 2
+        assert not first.cached
+        assert second.cached
+        assert second.content == "answer"
+        assert second.total_tokens == 15
+        assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+
+import pytest
+from core.agent import Agent
+from core.async_agent import AsyncAgent
+from core.generative_model import GenerativeModel
+from core.model_backend import ReplayBackend
+from models.response_parser import ResponseParser
+from models.response_stream_parser import ResponseStreamParser
+from models.responsestats import ResponseStats
+from utility import tracing
+from utility.tracing import JsonlSpanExporter, OtlpHttpSpanExporter, Tracer
+
+from tests.helpers import ACTION_TEMPLATE, FINAL_RESPONSE, StubTool
+
+
+class ListExporter(tracing.SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture()
+def exporter():
+    exporter = ListExporter()
+    previous = tracing.set_tracer(Tracer(exporter))
+    yield exporter
+    tracing.set_tracer(previous)
+
+
+def make_agent(agent_class=Agent):
+    backend = ReplayBackend(
+        [ACTION_TEMPLATE.format(index=0), FINAL_RESPONSE],
+        prompt_tokens=50,
+        completion_tokens=5,
+    )
+    agent = agent_class(GenerativeModel(model="gpt-4o", backend=backend), headless=True)
+    agent.register(StubTool(result_bytes=300))
+    return agent
+
+
+class TestTracer:
+    def test_disabled_by_default(self):
+        with Tracer().span("noop") as span:
+            span.set_attribute("ignored", 1)
+
+        assert span is tracing.NOOP_SPAN
+
+    def test_spans_nest_and_record_errors(self, exporter):
+        tracer = tracing.get_tracer()
+
+        def nested_spans():
+            with tracer.span("outer"):
+                with tracer.span("inner", size=3):
+                    pass
+                raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            nested_spans()
+
+        inner, outer = exporter.spans
+        assert inner.parent_id == outer.span_id
+        assert inner.trace_id == outer.trace_id
+        assert inner.attributes == {"size": 3}
+        assert outer.status == "error"
+        assert outer.error == "RuntimeError: boom"
+
+
+class TestAgentTracing:
+    @pytest.mark.parametrize("agent_class", [Agent, AsyncAgent])
+    def test_session_spans(self, exporter, agent_class):
+        agent = make_agent(agent_class)
+
+        if agent_class is AsyncAgent:
+            asyncio.run(agent.aexecute("Fetch"))
+        else:
+            agent.execute("Fetch")
+
+        by_id = {span.span_id: span for span in exporter.spans}
+        names = [span.name for span in exporter.spans]
+        assert names.count("agent.iteration") == 2
+        assert names.count("model.generate") == 2
+        assert names[-1] == "agent.execute"
+        root = exporter.spans[-1]
+        assert root.attributes["iterations"] == 2
+
+        tool = next(span for span in exporter.spans if span.name == "tool.execute")
+        assert tool.attributes["result_chars"] == 300
+        # Dispatched while the response is parsed, so under the generation span
+        assert by_id[tool.parent_id].name in ("model.generate", "agent.iteration")
+
+        parses = [span for span in exporter.spans if span.name == "response.parse"]
+        assert len(parses) == 2
+        assert all(span.attributes["stream_fallback"] is False for span in parses)
+        assert all(by_id[span.parent_id].name == "agent.iteration" for span in parses)
+
+        model = next(span for span in exporter.spans if span.name == "model.generate")
+        assert model.attributes["prompt_tokens"] == 50
+        assert model.attributes["prompt_chars"] > 0
+        assert by_id[model.parent_id].parent_id == root.span_id
+
+    def test_stream_fallback_is_one_span(self, exporter):
+        agent = Agent(model=None, headless=True)
+        stats = ResponseStats(
+            content=FINAL_RESPONSE,
+            prompt_tokens=0,
+            completion_tokens=0,
+            total_tokens=0,
+            tokens_per_second=0.0,
+            execution_time=0.0,
+        )
+
+        response = agent._handle_llm_response(stats, ResponseStreamParser())
+
+        assert response.final_answer == "Done"
+        parses = [span for span in exporter.spans if span.name == "response.parse"]
+        assert len(parses) == 1
+        assert parses[0].attributes["stream_fallback"] is True
+
+    def test_parser_span(self, exporter):
+        ResponseParser.parse("<response><thought>t</thought></response>")
+
+        assert exporter.spans[0].name == "response.parse"
+
+
+class TestExporters:
+    def test_jsonl_exporter(self, tmp_path):
+        path = tmp_path / "spans.jsonl"
+        tracer = Tracer(JsonlSpanExporter(str(path)))
+
+        with tracer.span("outer"), tracer.span("inner"):
+            pass
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [record["name"] for record in records] == ["inner", "outer"]
+        assert records[0]["parent_id"] == records[1]["span_id"]
+
+    def test_otlp_exporter_batches_spans(self):
+        posts = []
+
+        class FakeSession:
+            def post(self, url, data, headers, timeout):
+                posts.append((url, json.loads(data)))
+
+                class Response:
+                    def raise_for_status(self):
+                        pass
+
+                return Response()
+
+        exporter = OtlpHttpSpanExporter(batch_size=2, session=FakeSession())
+        tracer = Tracer(exporter)
+        for _ in range(3):
+            with tracer.span("step", tokens=5, ratio=0.5, cached=False):
+                pass
+        exporter.flush()
+
+        batches = [payload["resourceSpans"][0]["scopeSpans"][0]["spans"] for _, payload in posts]
+        assert [len(spans) for spans in batches] == [2, 1]
+        url, payload = posts[0]
+        assert url == "http://localhost:4318/v1/traces"
+        span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert len(span["traceId"]) == 32
+        assert len(span["spanId"]) == 16
+        assert {"key": "tokens", "value": {"intValue": "5"}} in span["attributes"]
+        assert {"key": "cached", "value": {"boolValue": False}} in span["attributes"]